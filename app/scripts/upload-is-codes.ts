@@ -20,6 +20,7 @@ interface ChunkData {
     has_tables: boolean;
     table_count: number;
     char_count: number;
+    token_count?: number;
 }
 
 async function uploadIS456ToRCC() {
@@ -97,7 +98,8 @@ async function uploadIS456ToRCC() {
                 pageNumber: chunk.pages && chunk.pages.length > 0 ? chunk.pages[0] : null,
                 clauseNumber: chunk.clause,
                 sectionTitle: chunk.title,
-                tokenCount: Math.ceil(chunk.content.split(/\s+/).length), // Rough token estimate
+                // Exact tiktoken count from the splitter, rough estimate for older chunk files
+                tokenCount: chunk.token_count ?? Math.ceil(chunk.content.split(/\s+/).length),
             }));
 
             await prisma.chunk.createMany({
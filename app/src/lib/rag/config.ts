@@ -14,4 +14,14 @@ export const RAG_CONFIG = {
 
     // Domains that support RAG
     SUPPORTED_DOMAINS: ['rcc', 'steel', 'general'],
+
+    // Query caches in front of retrieval (query-cache.ts)
+    QUERY_CACHE: {
+        EMBEDDING_MAX_ENTRIES: 1000,
+        EMBEDDING_TTL_MS: 24 * 60 * 60 * 1000,
+        RESULT_MAX_ENTRIES: 200,
+        RESULT_TTL_MS: 60 * 60 * 1000,
+        // Cosine similarity of query embeddings that counts as the same question
+        RESULT_SIMILARITY: 0.97,
+    },
 };
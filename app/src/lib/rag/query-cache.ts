@@ -0,0 +1,210 @@
+/**
+ * Query caches in front of retrieval
+ * - Embedding cache: query embeddings memoized by normalized text
+ *   (LRU + TTL), so a repeated question skips the OpenAI round trip
+ * - Result cache: search results keyed by query vector; a new query whose
+ *   embedding is within RESULT_SIMILARITY of a cached one reuses its
+ *   results instead of scanning every chunk again
+ *
+ * Python reference implementation (and replay benchmark): scripts/query_cache.py
+ */
+
+import { RAG_CONFIG } from './config';
+
+interface CacheEntry<T> {
+    value: T;
+    expiresAt: number;
+}
+
+interface ResultEntry<T> {
+    vector: number[];
+    norm: number;
+    topK: number;
+    minSimilarity: number;
+    results: T;
+    expiresAt: number;
+}
+
+interface QueryCacheStats {
+    embeddingHits: number;
+    embeddingMisses: number;
+    resultHits: number;
+    resultMisses: number;
+    evictions: number;
+    expirations: number;
+    // Estimated from the average cost of the misses
+    apiCallsSaved: number;
+    msSaved: number;
+    embeddingHitRate: number;
+    resultHitRate: number;
+}
+
+/**
+ * Lowercase, collapse whitespace, drop trailing punctuation:
+ * "Minimum cover for slab?" and "minimum  cover for slab" share an entry
+ */
+export function normalizeQuery(query: string): string {
+    return query.toLowerCase().replace(/\s+/g, ' ').trim().replace(/[\s?.!]+$/, '');
+}
+
+/**
+ * Map-backed LRU with per-entry expiry (Map keeps insertion order,
+ * so re-inserting on read moves an entry to the most recent end)
+ */
+class LRUCache<T> {
+    private entries = new Map<string, CacheEntry<T>>();
+    evictions = 0;
+    expirations = 0;
+
+    constructor(private maxEntries: number, private ttlMs: number) {}
+
+    get(key: string, now: number = Date.now()): T | undefined {
+        const entry = this.entries.get(key);
+        if (!entry) return undefined;
+        this.entries.delete(key);
+        if (entry.expiresAt <= now) {
+            this.expirations++;
+            return undefined;
+        }
+        this.entries.set(key, entry);
+        return entry.value;
+    }
+
+    set(key: string, value: T, now: number = Date.now()): void {
+        this.entries.delete(key);
+        this.entries.set(key, { value, expiresAt: now + this.ttlMs });
+        while (this.entries.size > this.maxEntries) {
+            const oldest = this.entries.keys().next().value as string;
+            this.entries.delete(oldest);
+            this.evictions++;
+        }
+    }
+
+    get size(): number {
+        return this.entries.size;
+    }
+
+    clear(): void {
+        this.entries.clear();
+    }
+}
+
+class QueryCache<R> {
+    private embeddings: LRUCache<number[]>;
+    private results: ResultEntry<R>[] = [];  // most recently used last
+    private hits = { embedding: 0, result: 0 };
+    private misses = { embedding: 0, result: 0 };
+    private resultEvictions = 0;
+    private resultExpirations = 0;
+    private embedMs = 0;    // total time spent on embedding misses
+    private searchMs = 0;   // total time spent on result misses
+
+    constructor(private config = RAG_CONFIG.QUERY_CACHE) {
+        this.embeddings = new LRUCache(config.EMBEDDING_MAX_ENTRIES, config.EMBEDDING_TTL_MS);
+    }
+
+    /**
+     * Cached embedding for query, calling embed() only on a miss.
+     * variant separates embeddings of another model or size.
+     */
+    async getEmbedding(
+        query: string,
+        embed: (query: string) => Promise<number[]>,
+        variant: string = ''
+    ): Promise<number[]> {
+        const key = variant ? `${variant}:${normalizeQuery(query)}` : normalizeQuery(query);
+        const cached = this.embeddings.get(key);
+        if (cached) {
+            this.hits.embedding++;
+            return cached;
+        }
+        this.misses.embedding++;
+        const started = Date.now();
+        const vector = await embed(query);
+        this.embedMs += Date.now() - started;
+        this.embeddings.set(key, vector);
+        return vector;
+    }
+
+    /**
+     * Results of a previous search whose query vector is at least
+     * RESULT_SIMILARITY cosine-similar (same topK / minSimilarity)
+     */
+    getResults(vector: number[], topK: number, minSimilarity: number): R | undefined {
+        const now = Date.now();
+        const before = this.results.length;
+        this.results = this.results.filter(entry => entry.expiresAt > now);
+        this.resultExpirations += before - this.results.length;
+
+        const norm = vectorNorm(vector);
+        let best = -1;
+        let bestSimilarity = this.config.RESULT_SIMILARITY;
+        for (let i = 0; i < this.results.length; i++) {
+            const entry = this.results[i];
+            if (entry.topK !== topK || entry.minSimilarity !== minSimilarity) continue;
+            const similarity = dot(vector, entry.vector) / (norm * entry.norm || 1);
+            if (similarity >= bestSimilarity) {
+                best = i;
+                bestSimilarity = similarity;
+            }
+        }
+        if (best < 0) {
+            this.misses.result++;
+            return undefined;
+        }
+        this.hits.result++;
+        const [entry] = this.results.splice(best, 1);
+        this.results.push(entry);
+        return entry.results;
+    }
+
+    setResults(vector: number[], topK: number, minSimilarity: number, results: R, searchMs: number): void {
+        this.searchMs += searchMs;
+        this.results.push({
+            vector, norm: vectorNorm(vector), topK, minSimilarity, results,
+            expiresAt: Date.now() + this.config.RESULT_TTL_MS,
+        });
+        while (this.results.length > this.config.RESULT_MAX_ENTRIES) {
+            this.results.shift();
+            this.resultEvictions++;
+        }
+    }
+
+    stats(): QueryCacheStats {
+        const embedLookups = this.hits.embedding + this.misses.embedding;
+        const resultLookups = this.hits.result + this.misses.result;
+        const averageEmbedMs = this.misses.embedding ? this.embedMs / this.misses.embedding : 0;
+        const averageSearchMs = this.misses.result ? this.searchMs / this.misses.result : 0;
+        return {
+            embeddingHits: this.hits.embedding,
+            embeddingMisses: this.misses.embedding,
+            resultHits: this.hits.result,
+            resultMisses: this.misses.result,
+            evictions: this.embeddings.evictions + this.resultEvictions,
+            expirations: this.embeddings.expirations + this.resultExpirations,
+            apiCallsSaved: this.hits.embedding,
+            msSaved: this.hits.embedding * averageEmbedMs + this.hits.result * averageSearchMs,
+            embeddingHitRate: embedLookups ? this.hits.embedding / embedLookups : 0,
+            resultHitRate: resultLookups ? this.hits.result / resultLookups : 0,
+        };
+    }
+
+    /**
+     * Drop cached results (chunks reloaded); embeddings stay valid
+     */
+    clearResults(): void {
+        this.results = [];
+    }
+}
+
+function dot(a: number[], b: number[]): number {
+    let sum = 0;
+    for (let i = 0; i < a.length; i++) sum += a[i] * b[i];
+    return sum;
+}
+
+function vectorNorm(a: number[]): number {
+    return Math.sqrt(dot(a, a));
+}
+
+export { QueryCache, LRUCache, type QueryCacheStats };
@@ -6,6 +6,10 @@
 import OpenAI from 'openai';
 import * as fs from 'fs';
 import * as path from 'path';
+import { QueryCache } from './query-cache';
+
+const EMBEDDING_MODEL = 'text-embedding-3-small';
+const FULL_DIMENSIONS = 1536;
 
 // Lazy OpenAI client — only created when actually needed
 // DO NOT instantiate at module top level (crashes if API key missing)
@@ -31,6 +35,10 @@ interface ChunkData {
     table_count: number;
     char_count: number;
     embedding?: number[];
+    // Table chunks (scripts/table_extractor.py)
+    type?: 'table';
+    table?: string | null;
+    parent?: string;
 }
 
 interface SearchResult {
@@ -42,6 +50,9 @@ interface SearchResult {
 class VectorStore {
     private chunks: ChunkData[] = [];
     private isInitialized = false;
+    // Size of the pre-computed vectors (precompute --dimensions); queries must match
+    private dimensions = FULL_DIMENSIONS;
+    private queryCache = new QueryCache<SearchResult[]>();
 
     /**
      * Load chunks with pre-computed embeddings from JSON file
@@ -68,7 +79,8 @@ class VectorStore {
                 this.chunks = JSON.parse(chunksData);
 
                 const withEmbeddings = this.chunks.filter(c => c.embedding).length;
-                console.log(`[RAG] Loaded ${this.chunks.length} chunks (${withEmbeddings} with embeddings)`);
+                this.dimensions = this.chunks.find(c => c.embedding)?.embedding?.length ?? FULL_DIMENSIONS;
+                console.log(`[RAG] Loaded ${this.chunks.length} chunks (${withEmbeddings} with embeddings, ${this.dimensions} dims)`);
                 this.isInitialized = true;
             }
         } catch (error) {
@@ -83,8 +95,10 @@ class VectorStore {
     private async getEmbedding(text: string): Promise<number[]> {
         try {
             const response = await getOpenAIClient().embeddings.create({
-                model: 'text-embedding-3-small',
+                model: EMBEDDING_MODEL,
                 input: text.substring(0, 8000),
+                // Reduced-size artifacts need query vectors of the same size
+                ...(this.dimensions !== FULL_DIMENSIONS ? { dimensions: this.dimensions } : {}),
             });
 
             return response.data[0].embedding;
@@ -120,8 +134,18 @@ class VectorStore {
             return [];
         }
 
-        // Only generate embedding for the query (1 API call)
-        const queryEmbedding = await this.getEmbedding(query);
+        // Only generate embedding for the query (1 API call, none if cached)
+        const queryEmbedding = await this.queryCache.getEmbedding(
+            query, text => this.getEmbedding(text), `${EMBEDDING_MODEL}:${this.dimensions}`
+        );
+
+        // Same (or near-identical) question answered recently
+        const cached = this.queryCache.getResults(queryEmbedding, topK, minSimilarity);
+        if (cached) {
+            this.logCacheStats();
+            return cached;
+        }
+        const started = Date.now();
 
         // Calculate similarities using PRE-COMPUTED embeddings
         const results: SearchResult[] = [];
@@ -133,7 +157,9 @@ class VectorStore {
             const similarity = this.cosineSimilarity(queryEmbedding, chunk.embedding);
 
             // Create citation
-            const citation = chunk.clause
+            const citation = chunk.table
+                ? `IS 456:2000, ${chunk.table}${chunk.title ? ` (${chunk.title})` : ''}`
+                : chunk.clause
                 ? `IS 456:2000, Clause ${chunk.clause}${chunk.title ? ` (${chunk.title})` : ''}`
                 : `IS 456:2000, Page ${chunk.pages[0]}`;
 
@@ -154,7 +180,26 @@ class VectorStore {
             console.log(`[RAG] Top similarities: ${topResults.slice(0, 3).map(r => r.similarity.toFixed(3)).join(', ')}`);
         }
 
-        return topResults.filter(r => r.similarity > minSimilarity);
+        const filtered = topResults.filter(r => r.similarity > minSimilarity);
+        this.queryCache.setResults(queryEmbedding, topK, minSimilarity, filtered, Date.now() - started);
+        this.logCacheStats();
+        return filtered;
+    }
+
+    /**
+     * Query cache hit rates and estimated savings
+     */
+    cacheStats() {
+        return this.queryCache.stats();
+    }
+
+    private logCacheStats(): void {
+        const stats = this.queryCache.stats();
+        console.log(
+            `[RAG] Query cache: embeddings ${stats.embeddingHits}/${stats.embeddingHits + stats.embeddingMisses} hits, ` +
+            `results ${stats.resultHits}/${stats.resultHits + stats.resultMisses} hits, ` +
+            `~${Math.round(stats.msSaved)} ms saved`
+        );
     }
 
     /**
@@ -163,6 +208,7 @@ class VectorStore {
     reset(): void {
         this.chunks = [];
         this.isInitialized = false;
+        this.queryCache.clearResults();
     }
 }
 
@@ -7,13 +7,8 @@ import sys
 import json
 from pathlib import Path
 
-try:
-    import pdfplumber
-except ImportError:
-    print("Installing pdfplumber...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pdfplumber"])
-    import pdfplumber
+from extraction_cache import ExtractionCache
+from page_triage import BLANK, COVER, TABLE, TriageReport, Stopwatch, triage_page
 
 def analyze_pdf(pdf_path):
     """Analyze PDF structure and extract sample content"""
@@ -24,27 +19,34 @@ def analyze_pdf(pdf_path):
         'sample_pages': [],
         'tables_found': 0,
         'total_pages': 0,
-        'sections': []
+        'sections': [],
+        'page_classes': {}
     }
+    report = TriageReport()
     
     print(f"\n{'='*60}")
     print(f"Analyzing: {pdf_path}")
     print(f"{'='*60}\n")
     
-    with pdfplumber.open(pdf_path) as pdf:
-        results['total_pages'] = len(pdf.pages)
-        results['metadata'] = pdf.metadata
+    with ExtractionCache(pdf_path) as doc:
+        results['total_pages'] = doc.page_count
+        results['metadata'] = doc.metadata
         
-        print(f"📄 Total Pages: {len(pdf.pages)}")
-        print(f"📋 Metadata: {json.dumps(pdf.metadata, indent=2, default=str)}\n")
+        print(f"📄 Total Pages: {doc.page_count}")
+        print(f"📋 Metadata: {json.dumps(doc.metadata, indent=2, default=str)}\n")
         
         # Analyze first 10 pages
-        for i, page in enumerate(pdf.pages[:10]):
+        for i in range(min(10, doc.page_count)):
             page_num = i + 1
-            print(f"\n--- Page {page_num} ---")
+            
+            # Triage from raw page objects, then only the extractors the page needs
+            watch = Stopwatch()
+            page_class = triage_page(doc, i)
+            triage_seconds = watch.lap()
+            print(f"\n--- Page {page_num} ({page_class}) ---")
             
             # Extract text
-            text = page.extract_text()
+            text = doc.extract_text(i) if page_class != BLANK else None
             if text:
                 lines = text.split('\n')[:10]  # First 10 lines
                 print(f"Text preview (first 10 lines):")
@@ -52,7 +54,7 @@ def analyze_pdf(pdf_path):
                     print(f"  {line[:80]}")
             
             # Check for tables
-            tables = page.extract_tables()
+            tables = doc.extract_tables(i) if page_class == TABLE else []
             if tables:
                 results['tables_found'] += len(tables)
                 print(f"\n📊 Tables found: {len(tables)}")
@@ -64,12 +66,14 @@ def analyze_pdf(pdf_path):
             # Store sample
             results['sample_pages'].append({
                 'page_num': page_num,
+                'page_class': page_class,
                 'text_preview': text[:500] if text else None,
                 'tables_count': len(tables) if tables else 0
             })
             
             # Look for section headings (typically bold or larger font)
-            words = page.extract_words()
+            words = doc.extract_words(i) if page_class not in (BLANK, COVER) else []
+            report.add(page_class, triage_seconds, watch.lap())
             if words:
                 # Detect potential headings (simplified)
                 for word in words[:20]:
@@ -80,6 +84,9 @@ def analyze_pdf(pdf_path):
                             'size': word.get('size')
                         })
         
+        results['page_classes'] = report.to_dict()
+        report.print_report()
+        
         print(f"\n{'='*60}")
         print(f"📊 Summary:")
         print(f"  Total pages: {results['total_pages']}")
@@ -0,0 +1,228 @@
+"""
+IVF-PQ approximate nearest-neighbor index (NumPy only, CPU)
+Vectors are unit-normalized, assigned to one of n_lists coarse k-means
+centroids (inverted file), and their residuals are compressed with
+product quantization into n_subvectors bytes each.
+
+Lists are probed in the order they were assigned: nearest centroid by L2
+(centroids are means of unit vectors, so they are not unit length and a
+plain q . centroid ranking would favour tight clusters).
+
+Scoring uses inner product, which for unit vectors ranks like cosine:
+  q . x  ~=  q . centroid[list]  +  sum_j  q_j . codebook_j[code_j]
+The second term is a lookup table built once per query.
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+from vector_search import normalize_rows, select_top_k, format_citation
+from embedding_artifact import load_artifact, artifact_paths
+
+
+def index_path_for(base_path: str) -> Path:
+    """<artifact>.ivfpq.npz next to an embedding artifact"""
+    return artifact_paths(base_path)[0].with_suffix('.ivfpq.npz')
+
+
+def assign_nearest(x: 'np.ndarray', centroids: 'np.ndarray', block: int = 8192) -> 'np.ndarray':
+    """Index of the nearest centroid (L2) for every row of x"""
+    centroid_sq = (centroids * centroids).sum(axis=1)
+    assignment = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), block):
+        distances = centroid_sq - 2 * (x[start:start + block] @ centroids.T)
+        assignment[start:start + block] = distances.argmin(axis=1)
+    return assignment
+
+
+def kmeans(x: 'np.ndarray', k: int, iterations: int = 15, max_samples: int = 50_000,
+           seed: int = 0) -> 'np.ndarray':
+    """Lloyd's k-means on (a sample of) x, returns (k, dims) float32 centroids"""
+    rng = np.random.default_rng(seed)
+    if len(x) > max_samples:
+        x = x[rng.choice(len(x), max_samples, replace=False)]
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = assign_nearest(x, centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=k)
+        nonempty = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(x[order], starts[nonempty], axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+        # Re-seed empty clusters from random points
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+    return centroids
+
+
+class IVFPQIndex:
+    """
+    n_lists      coarse clusters (rule of thumb: ~4 * sqrt(N))
+    n_subvectors bytes per vector; must divide dims
+    n_probe      lists scanned per query by default
+    """
+
+    def __init__(self, n_lists: int = 256, n_subvectors: int = 64, n_probe: int = 16,
+                 seed: int = 0):
+        self.n_lists = n_lists
+        self.n_subvectors = n_subvectors
+        self.n_probe = n_probe
+        self.seed = seed
+        self.centroids = None      # (n_lists, dims)
+        self.codebooks = None      # (n_subvectors, 256, dims // n_subvectors)
+        self.codes = None          # (N, n_subvectors) uint8, grouped by list
+        self.ids = None            # (N,) original row of each code
+        self.offsets = None        # (n_lists + 1,) list boundaries into codes/ids
+
+    def __len__(self) -> int:
+        return 0 if self.ids is None else len(self.ids)
+
+    @property
+    def dims(self) -> int:
+        return self.centroids.shape[1]
+
+    def build(self, matrix: 'np.ndarray') -> 'IVFPQIndex':
+        """Train centroids and codebooks on matrix and encode every row"""
+        x = normalize_rows(matrix)
+        dims = x.shape[1]
+        if dims % self.n_subvectors:
+            raise ValueError(f"n_subvectors={self.n_subvectors} does not divide dims={dims}")
+        self.n_lists = min(self.n_lists, len(x))
+
+        self.centroids = kmeans(x, self.n_lists, seed=self.seed)
+        self.n_lists = len(self.centroids)
+        assignment = assign_nearest(x, self.centroids)
+        residuals = x - self.centroids[assignment]
+
+        sub_dims = dims // self.n_subvectors
+        self.codebooks = np.empty((self.n_subvectors, 256, sub_dims), dtype=np.float32)
+        codes = np.empty((len(x), self.n_subvectors), dtype=np.uint8)
+        for j in range(self.n_subvectors):
+            part = np.ascontiguousarray(residuals[:, j * sub_dims:(j + 1) * sub_dims])
+            codebook = kmeans(part, 256, iterations=10, max_samples=20_000, seed=self.seed + j)
+            self.codebooks[j, :len(codebook)] = codebook
+            self.codebooks[j, len(codebook):] = 0.0  # unused when fewer than 256 points
+            codes[:, j] = assign_nearest(part, codebook)
+
+        order = np.argsort(assignment, kind='stable')
+        self.codes = codes[order]
+        self.ids = order.astype(np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=self.n_lists))))
+        return self
+
+    def search(self, query: 'np.ndarray', top_k: int = 5, n_probe: int = None,
+               rerank_vectors: 'np.ndarray' = None, shortlist: int = 10) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        (row ids, approximate similarities) for one query, best first.
+        If rerank_vectors (the float matrix the index was built from, may be
+        a memory map) is given, the best top_k * shortlist candidates are
+        re-scored exactly.
+        """
+        q = normalize_rows(query)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+
+        coarse = self.centroids @ q
+        # Same metric as assign_nearest: |c|^2 - 2 q.c (|q|^2 is constant)
+        distances = (self.centroids * self.centroids).sum(axis=1) - 2 * coarse
+        lists = np.argpartition(distances, n_probe - 1)[:n_probe]
+        sizes = self.offsets[lists + 1] - self.offsets[lists]
+        codes = np.concatenate([self.codes[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+        ids = np.concatenate([self.ids[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+        if len(ids) == 0:
+            return ids, np.empty(0, dtype=np.float32)
+
+        sub_query = q.reshape(self.n_subvectors, -1)
+        table = np.einsum('mkd,md->mk', self.codebooks, sub_query)
+        scores = table[np.arange(self.n_subvectors), codes].sum(axis=1)
+        scores += np.repeat(coarse[lists], sizes)
+
+        if rerank_vectors is None:
+            best, best_scores = select_top_k(scores, top_k)
+            return ids[best], best_scores
+
+        candidates, _ = select_top_k(scores, top_k * shortlist)
+        candidate_ids = ids[candidates]
+        exact = normalize_rows(rerank_vectors[candidate_ids]) @ q
+        best, best_scores = select_top_k(exact, top_k)
+        return candidate_ids[best], best_scores
+
+    def save(self, path: str):
+        np.savez(path, centroids=self.centroids, codebooks=self.codebooks, codes=self.codes,
+                 ids=self.ids, offsets=self.offsets,
+                 params=np.array([self.n_lists, self.n_subvectors, self.n_probe, self.seed]))
+
+    @classmethod
+    def load(cls, path: str) -> 'IVFPQIndex':
+        with np.load(path) as data:
+            n_lists, n_subvectors, n_probe, seed = data['params'].tolist()
+            index = cls(n_lists, n_subvectors, n_probe, seed)
+            index.centroids = data['centroids']
+            index.codebooks = data['codebooks']
+            index.codes = data['codes']
+            index.ids = data['ids']
+            index.offsets = data['offsets']
+        return index
+
+    def memory_bytes(self) -> int:
+        return sum(a.nbytes for a in (self.centroids, self.codebooks, self.codes,
+                                      self.ids, self.offsets))
+
+
+class ANNVectorIndex:
+    """IVF-PQ search over an embedding artifact, results shaped like VectorIndex.search"""
+
+    def __init__(self, index: IVFPQIndex, chunks: List[Dict], model: str = None,
+                 matrix: 'np.ndarray' = None):
+        if len(chunks) != len(index):
+            raise ValueError(f"{len(chunks)} chunks for {len(index)} indexed vectors")
+        self.index = index
+        self.chunks = chunks
+        self.model = model
+        self.matrix = matrix  # optional, enables exact reranking of the shortlist
+
+    @classmethod
+    def from_artifact(cls, base_path: str, index_path: str = None,
+                      rerank: bool = True) -> 'ANNVectorIndex':
+        matrix, meta = load_artifact(base_path)
+        index = IVFPQIndex.load(str(index_path or index_path_for(base_path)))
+        return cls(index, meta['chunks'], meta.get('model'), matrix if rerank else None)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def dims(self) -> int:
+        return self.index.dims
+
+    def search_vector(self, query: 'np.ndarray', top_k: int = 5,
+                      n_probe: int = None) -> Tuple['np.ndarray', 'np.ndarray']:
+        """(artifact row indices, similarities) for one query vector"""
+        return self.index.search(query, top_k, n_probe, rerank_vectors=self.matrix)
+
+    def search(self, query: 'np.ndarray', top_k: int = 5, min_similarity: float = 0.3,
+               n_probe: int = None) -> List[Dict]:
+        """Results shaped like VectorStore.search: chunk, similarity, citation"""
+        indices, scores = self.search_vector(query, top_k, n_probe)
+        return [
+            {
+                'chunk': self.chunks[i],
+                'similarity': float(score),
+                'citation': format_citation(self.chunks[i]),
+            }
+            for i, score in zip(indices.tolist(), scores.tolist())
+            if score > min_similarity
+        ]
@@ -0,0 +1,105 @@
+"""
+Benchmark: indented JSON vs binary embedding artifact
+Compares file size and cold load time of the current
+IS_456_2000_v2_with_embeddings.json layout against float32/float16
+.npy + metadata sidecar artifacts for the same chunks.
+
+If the input chunks have no embeddings yet, random unit vectors are
+attached so the comparison can run offline.
+"""
+
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from embedding_artifact import save_artifact, load_artifact
+
+
+DEFAULT_CHUNKS = Path(__file__).parent.parent / 'documents' / 'IS_456_2000_v2.json'
+
+
+def attach_random_embeddings(chunks, dims: int):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((len(chunks), dims)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    for chunk, vector in zip(chunks, vectors):
+        chunk['embedding'] = vector.tolist()
+
+
+def best_of(repeats: int, fn):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and binary embedding artifacts")
+    parser.add_argument('--chunks', default=str(DEFAULT_CHUNKS),
+                        help="Chunks JSON (with or without embeddings)")
+    parser.add_argument('--dims', type=int, default=1536)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.chunks, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    if not all(chunk.get('embedding') for chunk in chunks):
+        attach_random_embeddings(chunks, args.dims)
+
+    query = np.ones(len(chunks[0]['embedding']), dtype=np.float32)
+
+    print(f"\n{'='*60}")
+    print("Embedding Artifact Benchmark")
+    print(f"Chunks: {len(chunks)}, dims: {len(chunks[0]['embedding'])}")
+    print(f"{'='*60}\n")
+    print(f"  {'format':<22}{'size':>10}{'load':>12}{'load+scan':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / 'with_embeddings.json'
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(chunks, f, indent=2, ensure_ascii=False)
+
+        def load_json():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        def scan_json():
+            data = load_json()
+            np.asarray([c['embedding'] for c in data], dtype=np.float32) @ query
+
+        size = json_path.stat().st_size / (1024 * 1024)
+        print(f"  {'JSON (indent=2)':<22}{size:>8.2f}MB{best_of(args.repeats, load_json) * 1000:>10.1f}ms"
+              f"{best_of(args.repeats, scan_json) * 1000:>10.1f}ms")
+
+        for dtype in ('float32', 'float16'):
+            base = Path(tmp) / f'artifact_{dtype}'
+            matrix_path, meta_path = save_artifact(chunks, str(base), dtype=dtype)
+            size = (matrix_path.stat().st_size + meta_path.stat().st_size) / (1024 * 1024)
+
+            def load():
+                return load_artifact(str(base))
+
+            def scan():
+                matrix, _ = load_artifact(str(base))
+                np.asarray(matrix, dtype=np.float32) @ query
+
+            print(f"  {'npy ' + dtype + ' + meta':<22}{size:>8.2f}MB{best_of(args.repeats, load) * 1000:>10.1f}ms"
+                  f"{best_of(args.repeats, scan) * 1000:>10.1f}ms")
+
+        matrix, _ = load_artifact(str(Path(tmp) / 'artifact_float32'))
+        print(f"\n  float32 matrix memory-mapped: {isinstance(matrix, np.memmap)}, "
+              f"C-contiguous: {matrix.flags['C_CONTIGUOUS']}")
+        del matrix
+
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: original per-line regex chain vs single-pass clause detector
+Lines come from both chunk fixtures in documents/ (with [PAGE n] markers
+re-inserted) plus hand-written edge cases. Every line must classify
+identically, and re-chunking the fixture text must give identical
+chunks, before any timing is reported.
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+from clause_detector import classify_line
+
+
+DOCUMENTS = Path(__file__).parent.parent / 'documents'
+FIXTURES = [DOCUMENTS / 'IS_456_2000_v2.json', DOCUMENTS / 'IS_456_2000_chunks.json']
+
+EDGE_CASES = [
+    '', '   ', '[PAGE 12]', ' [PAGE 12]', '[PAGE x]', '[PAGE 7] trailing',
+    '26.4.2.1 Nominal Cover to Meet Durability Requirements',
+    '26.4.2.1.3 Too Deep', '26.4 Nominal 25 mm', '  5.5 Admixtures  ', '5.5 Adm',
+    'SECTION 1 GENERAL', 'SECTION 12', 'SECTIONS 3 X', 'ANNEX A', 'ANNEX B-1 Tables',
+    'ANNEXURE', 'Annex A', '٣.1 Arabic Indic Digit', '² Superscript Title',
+]
+
+
+def legacy_classify(line: str):
+    """The original ISCodeProcessorV2 logic: page regex, then up to three matches"""
+    page_match = re.match(r'\[PAGE (\d+)\]', line)
+    if page_match:
+        return int(page_match.group(1)), None
+
+    line = line.strip()
+    match = re.match(r'^(\d+(?:\.\d+){0,3})\s+([A-Z][^0-9\n]{3,})$', line)
+    if match:
+        clause_num = match.group(1)
+        return None, (clause_num, match.group(2).strip(), len(clause_num.split('.')))
+    match = re.match(r'^(SECTION\s+\d+)\s+(.+)$', line)
+    if match:
+        return None, (match.group(1), match.group(2).strip(), 0)
+    match = re.match(r'^(ANNEX\s+[A-Z](?:-\d+)?)\s*(.*)$', line)
+    if match:
+        return None, (match.group(1), match.group(2).strip() or "Annex", 0)
+    return None, None
+
+
+def fixture_lines():
+    lines = list(EDGE_CASES)
+    for path in FIXTURES:
+        with open(path, 'r', encoding='utf-8') as f:
+            for chunk in json.load(f):
+                for page in chunk.get('pages') or []:
+                    lines.extend(['', f"[PAGE {page}]", ''])
+                lines.extend(chunk['content'].split('\n'))
+    return lines
+
+
+def chunk_with(classify, processor, lines):
+    """Run ISCodeProcessorV2.iter_chunks with a given classifier"""
+    import process_is_code_v2
+    original = process_is_code_v2.classify_line
+    process_is_code_v2.classify_line = classify
+    try:
+        return list(processor.iter_chunks(lines))
+    finally:
+        process_is_code_v2.classify_line = original
+
+
+def lines_per_second(classify, lines, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for line in lines:
+            classify(line)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(lines) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clause detection")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=20, help="Repeat the fixture lines N times")
+    args = parser.parse_args()
+
+    from process_is_code_v2 import ISCodeProcessorV2
+
+    lines = fixture_lines()
+    mismatches = [line for line in lines if legacy_classify(line) != classify_line(line)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} lines classify differently, e.g. {mismatches[:3]!r}")
+        sys.exit(1)
+
+    processor = ISCodeProcessorV2('fixtures')
+    legacy_chunks = chunk_with(legacy_classify, processor, lines)
+    new_chunks = chunk_with(classify_line, processor, lines)
+    if legacy_chunks != new_chunks:
+        print("❌ Chunks differ between legacy and single-pass detector")
+        sys.exit(1)
+
+    workload = lines * args.scale
+    legacy = lines_per_second(legacy_classify, workload, args.repeats)
+    single = lines_per_second(classify_line, workload, args.repeats)
+
+    print(f"\n{'='*60}")
+    print("Clause Detection Benchmark")
+    print(f"{len(lines):,} fixture lines, {len(new_chunks)} identical chunks")
+    print(f"{'='*60}\n")
+    print(f"  legacy regex chain   {legacy:>12,.0f} lines/s")
+    print(f"  single-pass          {single:>12,.0f} lines/s   {single / legacy:.2f}x")
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: per-chunk embedding loop vs batched concurrent EmbeddingEngine
+Runs entirely offline against fake_embedding_server with injected latency
+and errors, using the IS 456 v2 chunks as input texts.
+
+A second table compares request forming: a fixed count of inputs in file
+order against inputs sorted by length and packed under a token budget,
+with the server's delay growing with the tokens in a request.
+"""
+
+import io
+import json
+import time
+import argparse
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from openai import OpenAI
+
+from embedding_engine import EmbeddingEngine, DEFAULT_MODEL
+from fake_embedding_server import FakeEmbeddingServer
+from instrumentation import percentiles
+from token_splitter import count_tokens, token_batches, truncate_tokens
+
+
+DEFAULT_CHUNKS = Path(__file__).parent.parent / 'documents' / 'IS_456_2000_v2.json'
+
+
+def run_sequential(base_url: str, texts):
+    """The old precompute loop: one blocking request per chunk"""
+    client = OpenAI(api_key='test', base_url=base_url, max_retries=6)
+    for text in texts:
+        client.embeddings.create(model=DEFAULT_MODEL, input=text[:8000])
+
+
+def run_engine(base_url: str, texts, batch_size: int, concurrency: int, **options):
+    engine = EmbeddingEngine(api_key='test', base_url=base_url,
+                             batch_size=batch_size, concurrency=concurrency, **options)
+    with redirect_stdout(io.StringIO()):
+        vectors = engine.embed(texts)
+    missing = sum(1 for v in vectors if v is None)
+    return engine, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding throughput offline")
+    parser.add_argument('--chunks', default=str(DEFAULT_CHUNKS))
+    parser.add_argument('--limit', type=int, default=None, help="Only embed the first N chunks")
+    parser.add_argument('--latency-ms', type=float, default=200.0)
+    parser.add_argument('--per-input-ms', type=float, default=2.0)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--skip-sequential', action='store_true')
+    parser.add_argument('--per-1k-tokens-ms', type=float, default=100.0,
+                        help="Server delay per 1000 tokens in the request-forming comparison")
+    parser.add_argument('--max-batch-tokens', type=int, nargs='+', default=[8000, 32000])
+    args = parser.parse_args()
+
+    with open(args.chunks, 'r', encoding='utf-8') as f:
+        texts = [chunk['content'] for chunk in json.load(f)][:args.limit]
+
+    server = FakeEmbeddingServer(('127.0.0.1', 0), args.latency_ms, args.per_input_ms,
+                                 args.error_rate).start()
+
+    print(f"\n{'='*60}")
+    print("Embedding Throughput Benchmark")
+    print(f"Texts: {len(texts)}, latency {args.latency_ms:.0f}ms "
+          f"+ {args.per_input_ms:.1f}ms/input, error rate {args.error_rate:.0%}")
+    print(f"{'='*60}\n")
+
+    try:
+        baseline = None
+        if not args.skip_sequential:
+            start = time.perf_counter()
+            run_sequential(server.base_url, texts)
+            baseline = time.perf_counter() - start
+            print(f"  sequential per-chunk        {baseline:7.2f}s  {len(texts) / baseline:7.1f} texts/s")
+
+        for batch_size in args.batch_sizes:
+            for concurrency in args.concurrency:
+                start = time.perf_counter()
+                engine, missing = run_engine(server.base_url, texts, batch_size, concurrency)
+                elapsed = time.perf_counter() - start
+                speedup = f"{baseline / elapsed:6.1f}x" if baseline else ""
+                print(f"  batch {batch_size:4d} x {concurrency:2d} in flight  {elapsed:7.2f}s  "
+                      f"{len(texts) / elapsed:7.1f} texts/s  {speedup}  "
+                      f"retries={engine.stats['retries']} missing={missing}")
+    finally:
+        server.stop()
+
+    # Request forming: fixed count in file order vs token budget, longest first
+    batch_size, concurrency = max(args.batch_sizes), max(args.concurrency)
+    lengths = [count_tokens(truncate_tokens(text)) for text in texts]
+    server = FakeEmbeddingServer(('127.0.0.1', 0), args.latency_ms, args.per_input_ms,
+                                 per_1k_tokens_ms=args.per_1k_tokens_ms).start()
+    print(f"\n📊 Request forming ({concurrency} in flight, +{args.per_1k_tokens_ms:.0f}ms per 1k tokens, "
+          f"{sum(lengths):,} tokens)\n")
+    print(f"  {'':<34}{'time':>8}{'tokens/s':>10}{'requests':>10}{'tokens per request (p50/max)':>30}")
+    try:
+        modes = [(f"{batch_size} inputs, file order", dict(max_batch_tokens=0, sort_by_length=False))]
+        modes += [(f"<= {budget:,} tokens, sorted", dict(max_batch_tokens=budget))
+                  for budget in args.max_batch_tokens]
+        for label, options in modes:
+            budget = options['max_batch_tokens'] or None
+            sizes = [sum(lengths[i] for i in batch)
+                     for batch in token_batches(lengths, batch_size, budget,
+                                                sort=options.get('sort_by_length', True))]
+            start = time.perf_counter()
+            engine, missing = run_engine(server.base_url, texts, batch_size, concurrency, **options)
+            elapsed = time.perf_counter() - start
+            spread = percentiles(sizes)
+            print(f"  {label:<34}{elapsed:>7.2f}s{engine.stats['tokens'] / elapsed:>10.0f}{len(sizes):>10}"
+                  f"{spread['p50']:>19,} / {max(sizes):,}")
+    finally:
+        server.stop()
+
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
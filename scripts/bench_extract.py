@@ -0,0 +1,68 @@
+"""
+Benchmark: serial vs multi-process page extraction
+Runs ISCodeProcessorV2.extract_all_text with different worker counts
+and checks that every parallel run is byte-identical to the serial one
+"""
+
+import sys
+import os
+import io
+import time
+import argparse
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from process_is_code_v2 import ISCodeProcessorV2
+
+
+def time_extraction(pdf_path: str, workers: int, repeats: int):
+    """Return (best_seconds, text) for extract_all_text with N workers"""
+    best = None
+    text = None
+    for _ in range(repeats):
+        # Measure pdfplumber itself, not the extraction cache
+        processor = ISCodeProcessorV2(pdf_path, workers=workers, extraction_cache=None,
+                                      tables=False)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            text = processor.extract_all_text()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel PDF extraction")
+    parser.add_argument('pdf', help="PDF to extract")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[2, 4, os.cpu_count() or 1],
+                        help="Worker counts to compare against serial")
+    parser.add_argument('--repeats', type=int, default=1)
+    args = parser.parse_args()
+
+    if not Path(args.pdf).exists():
+        print(f"❌ PDF not found: {args.pdf}")
+        sys.exit(1)
+
+    print(f"\n{'='*60}")
+    print("Extraction Benchmark")
+    print(f"File: {args.pdf}")
+    print(f"{'='*60}\n")
+
+    serial_time, serial_text = time_extraction(args.pdf, 1, args.repeats)
+    print(f"  serial      {serial_time:8.2f}s   1.00x   ({len(serial_text):,} chars)")
+
+    ok = True
+    for workers in sorted(set(w for w in args.workers if w > 1)):
+        elapsed, text = time_extraction(args.pdf, workers, args.repeats)
+        identical = text == serial_text
+        ok = ok and identical
+        print(f"  {workers:2d} workers  {elapsed:8.2f}s  {serial_time / elapsed:5.2f}x   "
+              f"{'identical' if identical else '❌ OUTPUT DIFFERS'}")
+
+    print(f"\n{'='*60}\n")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
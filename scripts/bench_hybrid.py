@@ -0,0 +1,181 @@
+"""
+Benchmark: hybrid retrieval vs vector-only search, per query type
+Chunks come from a synthetic IS-code PDF (vectors from fake_embedding) or
+from an existing --artifact. Three query mixes are drawn from the chunks:
+
+  clause   "clause 5.2.1" (answered from the reference map), "requirements
+           of 5.2" (bare clause number: ranked by the fusion, embedded)
+  table    "Table 3 values"                        (answered from the reference map)
+  text     a few words taken from a chunk          (embedded, BM25 + cosine fusion)
+
+Vector-only embeds every query and searches the matrix; the hybrid
+retriever embeds only the queries it cannot answer from the reference map. Both embed through
+EmbeddingEngine against a local FakeEmbeddingServer with --latency-ms of
+round trip (or the configured endpoint with --endpoint env), so latencies
+include the API call they would make. Reported per type: p50 / p95 ms,
+embedding calls, and how often the top result is the referenced clause /
+table (or, for text, whether the source chunk is in the top k).
+
+  python bench_hybrid.py --pages 60
+  python bench_hybrid.py --artifact ../documents/IS_456_2000_v2_with_embeddings --endpoint env
+"""
+
+import io
+import re
+import time
+import random
+import argparse
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from hybrid_search import HybridRetriever
+from instrumentation import percentiles
+from lexical_index import BM25Index, reference_map, table_key
+from vector_search import VectorIndex
+
+CLAUSE_PATTERN = re.compile(r'^\d+(?:\.\d+)+$')
+
+
+def synthetic_chunks(pages: int, seed: int):
+    from pathlib import Path
+    from bench_ingest import DEFAULT_PDF_DIR, synthetic_pdf
+    from process_is_code_v2 import ISCodeProcessorV2
+
+    pdf_path = synthetic_pdf(Path(DEFAULT_PDF_DIR), pages, 5, seed)
+    with redirect_stdout(io.StringIO()):
+        return ISCodeProcessorV2(str(pdf_path), extraction_cache=None).process()
+
+
+def build_queries(chunks, count: int, seed: int):
+    """[(type, query, expected)] with expected = clause, table key or source row"""
+    rng = random.Random(seed)
+    clauses = sorted({chunk['clause'] for chunk in chunks
+                      if not chunk.get('table') and CLAUSE_PATTERN.match(chunk.get('clause') or '')})
+    tables = sorted({chunk['table'] for chunk in chunks if chunk.get('table')})
+    queries = []
+    for i in range(count):
+        if clauses:
+            clause = rng.choice(clauses)
+            query = f"clause {clause}" if i % 2 else f"requirements of {clause}"
+            queries.append(('clause', query, clause))
+        if tables:
+            table = rng.choice(tables)
+            queries.append(('table', f"{table} values", table_key(table)))
+        row = rng.randrange(len(chunks))
+        words = [word for word in chunks[row]['content'].split() if word.isalpha()]
+        if len(words) >= 6:
+            start = rng.randrange(len(words) - 5)
+            queries.append(('text', ' '.join(words[start:start + 6]), row))
+    return queries
+
+
+def is_hit(kind: str, expected, results, rows_by_id) -> bool:
+    if not results:
+        return False
+    if kind == 'clause':
+        return results[0]['chunk'].get('clause') == expected and not results[0]['chunk'].get('table')
+    if kind == 'table':
+        return table_key(results[0]['chunk'].get('table') or '') == expected
+    return any(rows_by_id[id(result['chunk'])] == expected for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid vs vector-only retrieval")
+    parser.add_argument('--artifact', help="Artifact base path (default: chunks from a synthetic PDF)")
+    parser.add_argument('--pages', type=int, default=60, help="Synthetic PDF pages")
+    parser.add_argument('--queries', type=int, default=50, help="Queries per type")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--alpha', type=float, default=0.6)
+    parser.add_argument('--endpoint', choices=['fake', 'env'], default='fake',
+                        help="fake: local FakeEmbeddingServer; env: the artifact's model (OPENAI_* settings or local)")
+    parser.add_argument('--latency-ms', type=float, default=80.0, help="Fake server round trip")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from embedding_engine import EmbeddingEngine, engine_for_index
+    from fake_embedding_server import FakeEmbeddingServer, fake_embedding
+
+    if args.artifact:
+        index = VectorIndex.from_artifact(args.artifact)
+        chunks = index.chunks
+    else:
+        print(f"  Chunking a {args.pages}-page synthetic PDF...")
+        chunks = synthetic_chunks(args.pages, args.seed)
+        index = VectorIndex(np.array([fake_embedding(chunk['content']) for chunk in chunks]), chunks)
+
+    start = time.perf_counter()
+    bm25 = BM25Index().build([chunk['content'] for chunk in chunks])
+    references = reference_map(chunks)
+    build_seconds = time.perf_counter() - start
+
+    server = None
+    if args.endpoint == 'fake':
+        server = FakeEmbeddingServer(('127.0.0.1', 0), latency_ms=args.latency_ms,
+                                     dimensions=index.dims).start()
+        engine = EmbeddingEngine(api_key='sk-fake-bench', base_url=server.base_url, max_retries=0)
+    else:
+        engine = engine_for_index(index.model, index.dims)
+
+    embed_calls = {'vector': 0}
+
+    def embed(query):
+        with redirect_stdout(io.StringIO()):
+            return engine.embed([query])[0]
+
+    def vector_only(query):
+        embed_calls['vector'] += 1
+        vector = embed(query)
+        return [] if vector is None else index.search(np.asarray(vector), args.top_k, min_similarity=-1.0)
+
+    retriever = HybridRetriever(index, bm25, references, embed=embed, alpha=args.alpha)
+    queries = build_queries(chunks, args.queries, args.seed)
+    rows_by_id = {id(chunk): row for row, chunk in enumerate(chunks)}
+
+    # Warm up connections and the tokenizer before timing
+    vector_only(queries[0][1])
+    retriever.search(queries[0][1], args.top_k)
+    embed_calls['vector'] = 0
+    retriever.stats = {key: 0 for key in retriever.stats}
+
+    kinds = ('clause', 'table', 'text')
+    timings = {(kind, mode): [] for kind in kinds for mode in ('vector', 'hybrid')}
+    hits = {(kind, mode): 0 for kind in kinds for mode in ('vector', 'hybrid')}
+    for kind, query, expected in queries:
+        for mode, search in (('vector', vector_only), ('hybrid', lambda q: retriever.search(q, args.top_k))):
+            start = time.perf_counter()
+            results = search(query)
+            timings[kind, mode].append((time.perf_counter() - start) * 1000)
+            hits[kind, mode] += is_hit(kind, expected, results, rows_by_id)
+
+    if server:
+        server.stop()
+
+    print(f"\n{'='*60}")
+    print("Hybrid Retrieval Benchmark (ms per query)")
+    print(f"{len(chunks)} chunks, {len(bm25.vocabulary):,} terms, {len(references['clauses'])} clauses, "
+          f"{len(references['tables'])} tables; lexical build {build_seconds * 1000:.0f} ms")
+    print(f"endpoint={args.endpoint}" + (f" ({args.latency_ms:.0f} ms)" if server else '')
+          + f", top_k={args.top_k}, alpha={args.alpha}")
+    print(f"{'='*60}\n")
+    print(f"  {'type':<8}{'n':>5}{'vector p50':>12}{'p95':>9}{'hybrid p50':>12}{'p95':>9}"
+          f"{'speedup':>9}{'vector hit':>12}{'hybrid hit':>12}")
+    for kind in kinds:
+        vector, hybrid = timings[kind, 'vector'], timings[kind, 'hybrid']
+        if not vector:
+            continue
+        v, h = percentiles(vector), percentiles(hybrid)
+        print(f"  {kind:<8}{len(vector):>5}{v['p50']:>12.2f}{v['p95']:>9.2f}{h['p50']:>12.2f}{h['p95']:>9.2f}"
+              f"{v['p50'] / max(h['p50'], 1e-9):>8.1f}x"
+              f"{hits[kind, 'vector'] / len(vector):>12.0%}{hits[kind, 'hybrid'] / len(hybrid):>12.0%}")
+
+    print(f"\n  Embedding calls: vector-only {embed_calls['vector']}, "
+          f"hybrid {retriever.stats['embedding_calls']} "
+          f"({retriever.stats['direct']} answered from the reference map)")
+    if not args.artifact:
+        print("  (hash vectors carry no meaning: vector-only hit rates are a floor, not a quality measure)")
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
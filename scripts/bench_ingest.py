@@ -0,0 +1,267 @@
+"""
+End-to-end ingestion benchmark on synthetic IS-code PDFs
+Generates (and reuses) deterministic PDFs with synthetic_pdf.py, then runs
+each size in a fresh process so peak RSS belongs to that run alone:
+
+  extract     ISCodeProcessorV2.extract_all_text (triage + pdfplumber)
+  chunk       chunk_by_content
+  split       split_large_chunks + table chunks
+  precompute  precompute_embeddings against a local FakeEmbeddingServer
+  upload      bulk load of chunks + vectors (SQLite stand-in, or --dsn Postgres)
+
+Every stage records wall and CPU seconds, items, items/s and peak RSS so
+far. One JSON line per invocation (git commit, environment, config, per
+size results) is appended to --history; the previous line with the same
+config is the baseline, and stages that lose more than --tolerance
+throughput (or grow peak RSS by as much) are reported as regressions.
+
+  python bench_ingest.py --pages 100 500 2000
+  python bench_ingest.py --pages 500 --fail-on-regression
+"""
+
+import io
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+from instrumentation import Metrics, peak_rss_mb
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_HISTORY = SCRIPTS_DIR.parent / 'documents' / 'bench_ingest.jsonl'
+DEFAULT_PDF_DIR = Path(tempfile.gettempdir()) / 'civilllm_bench'
+
+STAGES = ('extract', 'chunk', 'split', 'precompute', 'upload')
+
+# Stages faster than this are timer noise and are not compared
+MIN_COMPARE_SECONDS = 0.05
+
+
+def timed(metrics: Metrics, name: str, fn, count=len):
+    """Run fn as stage name with its progress output silenced; items = count(result)"""
+    with metrics.stage(name) as stage, redirect_stdout(io.StringIO()):
+        result = fn()
+        stage.items = count(result)
+    return result
+
+
+def run_pipeline(pdf_path: str, workers: int, dsn: str = None) -> dict:
+    """All stages on one PDF in this process; returns the per-stage measurements"""
+    from process_is_code_v2 import ISCodeProcessorV2
+    from precompute_embeddings import precompute_embeddings
+    from embedding_artifact import load_artifact
+    from bulk_loader import PostgresBulkLoader, SQLiteBulkLoader
+    from upload_to_rcc_bot import IS_456_DOCUMENT, RCC_DOMAIN
+
+    metrics = Metrics('bench_ingest')
+    processor = ISCodeProcessorV2(pdf_path, workers=workers, extraction_cache=None, metrics=metrics)
+
+    full_text = timed(metrics, 'extract', processor.extract_all_text,
+                      lambda _: sum(processor.triage.pages.values()))
+    chunks = timed(metrics, 'chunk', lambda: processor.chunk_by_content(full_text))
+    chunks = timed(metrics, 'split', lambda: processor.split_large_chunks(chunks) + processor.table_chunks)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks_file = os.path.join(tmp, 'chunks.json')
+        with open(chunks_file, 'w', encoding='utf-8') as f:
+            json.dump(chunks, f, ensure_ascii=False)
+
+        output_file = os.path.join(tmp, 'embeddings.json')
+        timed(metrics, 'precompute',
+              lambda: precompute_embeddings(chunks_file, output_file, cache_path=None, write_json=False),
+              lambda _: len(chunks))
+        vectors, meta = load_artifact(str(Path(output_file).with_suffix('')))
+
+        if dsn:
+            loader = PostgresBulkLoader(dsn)
+        else:
+            loader = SQLiteBulkLoader(os.path.join(tmp, 'bench.db'))
+        try:
+            timed(metrics, 'upload',
+                  lambda: loader.load_document(dict(IS_456_DOCUMENT), meta['chunks'], vectors,
+                                               domain=RCC_DOMAIN),
+                  lambda result: result['rows'])
+        finally:
+            loader.close()
+
+    stages = metrics.to_dict()['stages']
+    return {
+        'pdf_bytes': os.path.getsize(pdf_path),
+        'chunks': len(chunks),
+        'tables': len(processor.table_chunks),
+        'total_seconds': round(sum(stages[name]['seconds'] for name in STAGES), 4),
+        'peak_rss_mb': round(peak_rss_mb() or 0.0, 1),
+        'stages': stages,
+    }
+
+
+def synthetic_pdf(pdf_dir: Path, pages: int, tables_every: int, seed: int) -> Path:
+    """Cached synthetic PDF for (pages, tables_every, seed)"""
+    from synthetic_pdf import write_synthetic_pdf
+
+    pdf_dir.mkdir(parents=True, exist_ok=True)
+    path = pdf_dir / f"is_synthetic_{pages}p_t{tables_every}_s{seed}.pdf"
+    if not path.exists():
+        print(f"  Generating {path.name}...")
+        write_synthetic_pdf(str(path), pages, tables_every, seed)
+    return path
+
+
+def run_child(pdf_path: Path, workers: int, dsn: str, env: dict) -> dict:
+    """Run one size in a fresh interpreter and read its JSON result from stdout"""
+    command = [sys.executable, str(Path(__file__).resolve()), '--child', str(pdf_path),
+               '--workers', str(workers)]
+    if dsn:
+        command += ['--dsn', dsn]
+    result = subprocess.run(command, env=env, cwd=SCRIPTS_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr)
+        raise RuntimeError(f"benchmark run failed for {pdf_path.name}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_record(history: Path, config: dict):
+    """Most recent history record with the same benchmark config"""
+    if not history.exists():
+        return None
+    previous = None
+    with open(history, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get('config') == config:
+                    previous = record
+    return previous
+
+
+def compare(record: dict, baseline: dict, tolerance: float) -> list:
+    """(pages, stage, metric, before, after) for throughput drops and peak RSS growth beyond tolerance"""
+    regressions = []
+    before_runs = {run['pages']: run for run in baseline['runs']}
+    for run in record['runs']:
+        before = before_runs.get(run['pages'])
+        if not before:
+            continue
+        for stage in STAGES:
+            old, new = before['stages'].get(stage), run['stages'].get(stage)
+            if not old or not new or not old['items_per_second'] or not new['items_per_second']:
+                continue
+            if max(old['seconds'], new['seconds']) < MIN_COMPARE_SECONDS:
+                continue
+            if new['items_per_second'] < old['items_per_second'] * (1 - tolerance):
+                regressions.append((run['pages'], stage, 'items/s',
+                                    old['items_per_second'], new['items_per_second']))
+        if before['peak_rss_mb'] and run['peak_rss_mb'] > before['peak_rss_mb'] * (1 + tolerance):
+            regressions.append((run['pages'], 'all', 'peak RSS MB',
+                                before['peak_rss_mb'], run['peak_rss_mb']))
+    return regressions
+
+
+def print_run(run: dict, baseline_run: dict = None):
+    print(f"\n  {run['pages']} pages, {run['chunks']} chunks ({run['tables']} tables), "
+          f"{run['pdf_bytes'] / (1024 * 1024):.1f} MB PDF")
+    print(f"  {'stage':<11}{'wall':>9}{'cpu':>9}{'items':>8}{'items/s':>14}{'RSS MB':>9}{'vs prev':>9}")
+    for name in STAGES:
+        stage = run['stages'][name]
+        change = ''
+        if baseline_run and name in baseline_run['stages']:
+            before = baseline_run['stages'][name]['items_per_second']
+            if before and stage['items_per_second']:
+                change = f"{stage['items_per_second'] / before:.2f}x"
+        print(f"  {name:<11}{stage['seconds']:>8.2f}s{stage['cpu_seconds']:>8.2f}s{stage['items']:>8}"
+              f"{stage['items_per_second']:>14,.1f}{stage.get('peak_rss_mb', 0.0):>9.1f}{change:>9}")
+    print(f"  {'total':<11}{run['total_seconds']:>8.2f}s{'':>39}{run['peak_rss_mb']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion pipeline on synthetic PDFs")
+    parser.add_argument('--pages', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--tables-every', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="Extraction processes")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="Fake embedding API latency per request")
+    parser.add_argument('--per-input-ms', type=float, default=0.1, help="Fake embedding API latency per input")
+    parser.add_argument('--dsn', help="Upload to this Postgres database instead of a SQLite stand-in")
+    parser.add_argument('--pdf-dir', default=str(DEFAULT_PDF_DIR), help="Where synthetic PDFs are kept")
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY), help="JSON Lines results file")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed slowdown / RSS growth")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_pipeline(args.child, args.workers, args.dsn)))
+        return
+
+    from fake_embedding_server import FakeEmbeddingServer
+
+    config = {
+        'tables_every': args.tables_every, 'seed': args.seed, 'workers': args.workers,
+        'latency_ms': args.latency_ms, 'per_input_ms': args.per_input_ms,
+        'upload': 'postgres' if args.dsn else 'sqlite',
+    }
+    history = Path(args.history)
+    baseline = previous_record(history, config)
+    baseline_runs = {run['pages']: run for run in baseline['runs']} if baseline else {}
+
+    print(f"\n{'='*60}")
+    print("Ingestion Benchmark (synthetic IS-code PDFs)")
+    print(f"{'='*60}")
+    if baseline:
+        print(f"  Baseline: {baseline['timestamp']} (commit {baseline['commit']})")
+
+    server = FakeEmbeddingServer(('127.0.0.1', 0), latency_ms=args.latency_ms,
+                                 per_input_ms=args.per_input_ms).start()
+    env = dict(os.environ, OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY='sk-fake-bench')
+
+    runs = []
+    try:
+        for pages in args.pages:
+            pdf_path = synthetic_pdf(Path(args.pdf_dir), pages, args.tables_every, args.seed)
+            run = dict(pages=pages, **run_child(pdf_path, args.workers, args.dsn, env))
+            runs.append(run)
+            print_run(run, baseline_runs.get(pages))
+    finally:
+        server.stop()
+
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': config,
+        'runs': runs,
+    }
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with open(history, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"\n💾 Appended results to: {history}")
+
+    regressions = compare(record, baseline, args.tolerance) if baseline else []
+    for pages, stage, metric, before, after in regressions:
+        print(f"  ⚠️  {pages} pages, {stage}: {metric} {before:,.1f} -> {after:,.1f}")
+    if baseline and not regressions:
+        print(f"  ✅ No regressions beyond {args.tolerance:.0%} vs {baseline['commit']}")
+    print(f"{'='*60}\n")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: local CPU embedding throughput (LocalEmbeddingEngine)
+Embeds the IS 456 v2 chunks with a local model, no key or network needed
+once the model is downloaded, and reports chunks/s, tokens/s and how many
+of the tokens fed to the model were padding:
+
+  batching     unsorted inputs padded to max_tokens (static-shape baseline),
+               unsorted with per-batch padding, sorted by length, and sorted
+               under a padded-token budget (default)
+  batch size   sorted, a fixed count per batch
+  token budget sorted, at most --max-batch-tokens padded tokens per batch
+  threads      default batching, at each --threads
+
+and what a whole code takes at the best setting.
+
+  python bench_local_embeddings.py
+  python bench_local_embeddings.py --model path/to/onnx-model-dir --threads 1 2 4
+"""
+
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+
+from local_embedding import DEFAULT_LOCAL_BATCH_TOKENS, DEFAULT_LOCAL_MODEL, RUNTIMES, LocalEmbeddingEngine
+
+
+DEFAULT_CHUNKS = Path(__file__).parent.parent / 'documents' / 'IS_456_2000_v2.json'
+
+
+def run(engine: LocalEmbeddingEngine, texts):
+    """Seconds to embed texts, plus the tokens and padded tokens it took"""
+    for name in ('tokens', 'padded_tokens'):
+        engine.stats[name] = 0
+    start = time.perf_counter()
+    engine.embed(texts)
+    return time.perf_counter() - start, engine.stats['tokens'], engine.stats['padded_tokens']
+
+
+def report(label: str, texts, seconds: float, tokens: int, padded: int) -> float:
+    padding = f"{1 - tokens / padded:>9.0%}" if padded else f"{'-':>9}"
+    print(f"  {label:<30}{seconds:>8.2f}s{len(texts) / seconds:>10.1f}{tokens / seconds:>10.0f}{padding}")
+    return len(texts) / seconds
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark local CPU embedding throughput")
+    parser.add_argument('--chunks', default=str(DEFAULT_CHUNKS))
+    parser.add_argument('--limit', type=int, default=None, help="Only embed the first N chunks")
+    parser.add_argument('--model', default=DEFAULT_LOCAL_MODEL, help="Hub repo id or ONNX model directory")
+    parser.add_argument('--runtime', choices=RUNTIMES, default='onnx')
+    parser.add_argument('--batch-size', type=int, default=32, help="Fixed count for the batching rows")
+    # Without a token budget, large counts of 512-token inputs need GBs for attention
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--max-batch-tokens', type=int, nargs='+', default=[1024, 2048, 4096, 8192, 16384])
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=sorted({1, max(1, cores // 2), cores}))
+    parser.add_argument('--code-chunks', type=int, default=2000,
+                        help="Project the time to embed a code of this many chunks")
+    args = parser.parse_args()
+
+    with open(args.chunks, 'r', encoding='utf-8') as f:
+        texts = [chunk['content'] for chunk in json.load(f)][:args.limit]
+    threads = max(args.threads)
+
+    engine = LocalEmbeddingEngine(args.model, runtime=args.runtime, threads=threads)
+    start = time.perf_counter()
+    engine.embed(texts[:2])  # load and warm up
+    load_seconds = time.perf_counter() - start
+
+    print(f"\n{'='*60}")
+    print("Local Embedding Benchmark")
+    print(f"Model: {args.model} ({args.runtime}), {engine.output_dims} dims, loaded in {load_seconds:.1f}s")
+    print(f"Texts: {len(texts)}, {cores} cores, max {engine.max_tokens} tokens")
+    print(f"{'='*60}\n")
+    header = f"  {'':<30}{'time':>9}{'chunks/s':>10}{'tokens/s':>10}{'padding':>9}"
+
+    best = 0.0
+    default_batch = engine.batch_size
+    if args.runtime == 'onnx':
+        print(f"📊 Batching ({threads} threads)\n")
+        print(header)
+        for label, batch_size, budget, padding, sort in [
+                (f"{args.batch_size}, unsorted, pad to max", args.batch_size, 0, 'max', False),
+                (f"{args.batch_size}, unsorted, per batch", args.batch_size, 0, 'dynamic', False),
+                (f"{args.batch_size}, sorted, per batch", args.batch_size, 0, 'dynamic', True),
+                (f"<= {DEFAULT_LOCAL_BATCH_TOKENS} tokens, sorted", default_batch,
+                 DEFAULT_LOCAL_BATCH_TOKENS, 'dynamic', True)]:
+            engine.batch_size, engine.max_batch_tokens = batch_size, budget
+            engine.padding, engine.sort_by_length = padding, sort
+            best = max(best, report(label, texts, *run(engine, texts)))
+        print()
+
+    print(f"📊 Batch size, sorted ({threads} threads)\n")
+    print(header)
+    engine.max_batch_tokens = 0
+    for batch_size in args.batch_sizes:
+        engine.batch_size = batch_size
+        best = max(best, report(f"batch {batch_size}", texts, *run(engine, texts)))
+
+    if args.runtime == 'onnx':
+        print(f"\n📊 Token budget, sorted ({threads} threads, at most {default_batch} inputs)\n")
+        print(header)
+        engine.batch_size = default_batch
+        for budget in args.max_batch_tokens:
+            engine.max_batch_tokens = budget
+            best = max(best, report(f"<= {budget} tokens", texts, *run(engine, texts)))
+
+    print(f"\n📊 Threads (default batching)\n")
+    print(header)
+    for count in sorted(args.threads):
+        timed = LocalEmbeddingEngine(args.model, runtime=args.runtime, threads=count)
+        timed.embed(texts[:2])
+        best = max(best, report(f"{count} threads", texts, *run(timed, texts)))
+
+    print(f"\n  Best: {best:.1f} chunks/s -> {len(texts)} chunks in {len(texts) / best:.0f}s, "
+          f"a {args.code_chunks:,}-chunk code in {args.code_chunks / best / 60:.1f} min")
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Memory benchmark: whole-document chunking vs streaming pipeline
+Feeds synthetic IS-code style pages (no PDF parsing) through
+
+  list path:    join_pages -> chunk_by_content -> split_large_chunks -> json.dump
+  stream path:  iter_lines -> iter_chunks -> iter_split -> JSON Lines
+
+and reports tracemalloc peaks. The list path grows with page count; the
+streaming path stays flat, bounded by the largest clause. Both outputs
+are checked to be identical.
+"""
+
+import io
+import os
+import json
+import random
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+
+from process_is_code_v2 import ISCodeProcessorV2
+from chunk_io import write_jsonl, load_chunks
+
+
+WORDS = ("concrete reinforcement cover shall be not less than mm the member "
+         "exposure condition nominal minimum grade of steel bars spacing").split()
+
+
+def synthetic_pages(count: int, lines_per_page: int = 45, seed: int = 0):
+    """Yield (page_number, text) with a numbered clause heading every few lines"""
+    rng = random.Random(seed)
+    clause = [1, 1]
+    for page in range(4, count + 4):
+        lines = ["IS 456 : 2000"]
+        for n in range(lines_per_page):
+            if n % 9 == 0:
+                clause[1] += 1
+                if clause[1] > 12:
+                    clause = [clause[0] + 1, 1]
+                lines.append(f"{clause[0]}.{clause[1]} Nominal Cover Requirement")
+            else:
+                lines.append(' '.join(rng.choice(WORDS) for _ in range(14)))
+        yield page, '\n'.join(lines)
+
+
+def measure(fn):
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of list vs streaming chunking")
+    parser.add_argument('--pages', type=int, nargs='+', default=[100, 500, 1000, 2000])
+    args = parser.parse_args()
+
+    processor = ISCodeProcessorV2('synthetic.pdf')
+
+    print(f"\n{'='*60}")
+    print("Chunking Memory Benchmark (tracemalloc peak)")
+    print(f"{'='*60}\n")
+    print(f"  {'pages':>6}{'list path':>14}{'streaming':>14}{'chunks':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        list_path = os.path.join(tmp, 'chunks.json')
+        stream_path = os.path.join(tmp, 'chunks.jsonl')
+
+        for count in args.pages:
+            def list_pipeline():
+                full_text = processor.join_pages(synthetic_pages(count))
+                chunks = processor.chunk_by_content(full_text)
+                chunks = processor.split_large_chunks(chunks)
+                with open(list_path, 'w', encoding='utf-8') as f:
+                    json.dump(chunks, f, ensure_ascii=False)
+
+            def stream_pipeline():
+                lines = processor.iter_lines(synthetic_pages(count))
+                write_jsonl(processor.iter_split(processor.iter_chunks(lines)), stream_path)
+
+            list_peak = measure(list_pipeline)
+            stream_peak = measure(stream_pipeline)
+
+            with open(list_path, 'r', encoding='utf-8') as f:
+                expected = json.load(f)
+            assert load_chunks(stream_path) == expected, "streaming output differs"
+
+            print(f"  {count:>6}{list_peak:>12.2f}MB{stream_peak:>12.2f}MB{len(expected):>9}")
+
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: int8 / binary quantized search vs float32, with rescoring
+Builds both quantized indexes (quantized_index.py) from an artifact or a
+synthetic clustered corpus and compares them against exact float32
+search on held-out queries: recall@k, ms per query and memory.
+
+The float vectors used for rescoring are memory-mapped from an .npy file,
+as in production, so only the shortlisted rows are read per query.
+
+  python bench_quantized.py --synthetic 100000
+  python bench_quantized.py --artifact ../documents/IS_456_2000_v2_with_embeddings
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from build_ann_index import held_out_queries, recall_at_k, synthetic_corpus
+from embedding_artifact import artifact_paths, load_artifact
+from quantized_index import BinaryIndex, Int8Index
+from vector_search import VectorIndex
+
+MB = 1024 * 1024
+
+
+def per_query(fn, queries):
+    start = time.perf_counter()
+    found = [fn(q)[0] for q in queries]
+    return found, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding search")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--artifact', help="Artifact base path (without .npy)")
+    source.add_argument('--synthetic', type=int, help="Generate a clustered corpus of N vectors")
+    parser.add_argument('--dims', type=int, default=1536, help="Dims for --synthetic")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--shortlist', type=int, nargs='+', default=[2, 4, 10, 30],
+                        help="Rescore the best top_k * shortlist candidates exactly")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.artifact:
+        rerank_path = artifact_paths(args.artifact)[0]
+        matrix, _ = load_artifact(args.artifact)
+    else:
+        matrix = synthetic_corpus(args.synthetic, args.dims)
+        tmp = tempfile.NamedTemporaryFile(suffix='.npy', delete=False)
+        tmp.close()
+        np.save(tmp.name, matrix.astype('<f4'))
+        rerank_path = tmp.name
+    vectors = np.load(rerank_path, mmap_mode='r')
+    n, dims = vectors.shape
+
+    print(f"\n{'='*60}")
+    print("Quantized Search Benchmark")
+    print(f"Vectors: {n:,} x {dims}, top_k={args.top_k}, {args.queries} queries")
+    print(f"{'='*60}\n")
+
+    start = time.perf_counter()
+    int8 = Int8Index().build(matrix)
+    int8_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    binary = BinaryIndex().build(matrix)
+    binary_seconds = time.perf_counter() - start
+    print(f"✅ Built int8 in {int8_seconds:.1f}s, binary in {binary_seconds:.1f}s\n")
+
+    exact = VectorIndex(matrix)
+    del matrix
+    queries = held_out_queries(exact.matrix, min(args.queries, n))
+    truth, exact_ms = per_query(lambda q: exact.search_vector(q, args.top_k), queries)
+
+    print(f"📊 recall@{args.top_k} vs float32 brute force\n")
+    print(f"  {'mode':<26}{'recall':>8}{'ms/query':>11}{'rows read':>11}")
+    print(f"  {'float32 (mat-vec)':<26}{1.0:>8.3f}{exact_ms:>11.2f}{n:>11,}")
+
+    modes = [('int8', lambda q: int8.search(q, args.top_k), 0),
+             ('binary (hamming)', lambda q: binary.search(q, args.top_k), 0)]
+    for shortlist in args.shortlist:
+        rows = min(args.top_k * shortlist, n)
+        modes.append((f"int8 + rescore x{shortlist}",
+                      lambda q, s=shortlist: int8.search(q, args.top_k, vectors, s), rows))
+        modes.append((f"binary + rescore x{shortlist}",
+                      lambda q, s=shortlist: binary.search(q, args.top_k, vectors, s), rows))
+    for label, fn, rows in modes:
+        found, ms = per_query(fn, queries)
+        recall = np.mean([recall_at_k(f, t) for f, t in zip(found, truth)])
+        print(f"  {label:<26}{recall:>8.3f}{ms:>11.2f}{rows or '-':>11}")
+
+    # Resident memory of the searchable form (binary + rescoring keeps only
+    # the codes resident; the float rows come from the page cache on demand)
+    print(f"\n📦 Memory for {n:,} x {dims} vectors\n")
+    sizes = [
+        ("JSON doubles in JS arrays", n * dims * 8),
+        ("float32 matrix", n * dims * 4),
+        ("float16 matrix", n * dims * 2),
+        ("int8 codes + scales", int8.memory_bytes()),
+        ("binary codes + means", binary.memory_bytes()),
+    ]
+    for label, size in sizes:
+        ratio = n * dims * 4 / size
+        print(f"  {label:<28}{size / MB:>10.1f} MB" + (f"{ratio:>8.1f}x smaller" if ratio > 1 else ''))
+
+    # Same memory figures projected to a 100k-chunk corpus
+    if n != 100_000:
+        print(f"\n  At 100,000 chunks: float32 {100_000 * dims * 4 / MB:.0f} MB, "
+              f"int8 {100_000 * dims / MB:.0f} MB, binary {100_000 * ((dims + 63) // 64) * 8 / MB:.1f} MB")
+    print(f"\n{'='*60}\n")
+
+    del vectors
+    if tmp:
+        os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Replay benchmark for the query caches (query_cache.py)
+Generates a chat query log: intents drawn with Zipf popularity, each asked
+as exact repeats with different case / spacing / punctuation or as a
+paraphrase. The log is replayed twice against the same VectorIndex:
+
+  uncached   embed every query, then search (what VectorStore.search does)
+  cached     QueryCache.search: embedding LRU + TTL, then result cache
+
+Embedding is simulated with --embed-ms of latency. Intents built from the
+same question template share part of their vector (cosine ~--related-
+similarity), and each intent has --chunks-per-intent chunks near it in the
+index. A paraphrase gets its intent's vector plus a per-text perturbation,
+its cosine drawn from the --paraphrase-similarity range, which straddles
+--result-similarity: some paraphrases hit the result cache and some miss.
+A result hit is false when its results differ from a fresh search for the
+query's own vector. --endpoint env embeds through EmbeddingEngine instead
+(random index, so only hit rates are meaningful there). A simulated clock
+advances --gap-seconds per query so TTL expiry takes part.
+
+  python bench_query_cache.py --queries 1000 --intents 80
+"""
+
+import io
+import time
+import random
+import hashlib
+import argparse
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from instrumentation import percentiles
+from query_cache import QueryCache
+from vector_search import VectorIndex
+
+TOPICS = [
+    "slab", "beam", "column", "footing", "staircase", "retaining wall", "shear wall",
+    "flat slab", "one way slab", "two way slab", "lintel", "pile cap", "water tank", "chimney",
+]
+TEMPLATES = [
+    ("minimum cover for {}", ["what is the minimum cover for a {}", "{} nominal cover requirement"]),
+    ("minimum reinforcement in {}", ["how much minimum steel is needed in a {}", "{} minimum rebar"]),
+    ("maximum spacing of bars in {}", ["max bar spacing for {}", "how far apart can bars be in a {}"]),
+    ("deflection limit for {}", ["allowable deflection of a {}", "{} span to depth ratio"]),
+    ("concrete grade for {}", ["which concrete grade should a {} use", "minimum grade of concrete in {}"]),
+    ("lap length in {}", ["splice length for bars in a {}", "how long should laps be in {}"]),
+]
+
+
+def intents(count: int, seed: int):
+    """[(canonical, [paraphrases], template index)] for count topic x template combinations"""
+    combos = [(t, topic) for t in range(len(TEMPLATES)) for topic in TOPICS]
+    random.Random(seed).shuffle(combos)
+    return [(TEMPLATES[t][0].format(topic), [p.format(topic) for p in TEMPLATES[t][1]], t)
+            for t, topic in combos[:count]]
+
+
+def surface_variant(text: str, rng: random.Random) -> str:
+    """Same question after normalization: case, spacing, trailing punctuation"""
+    choice = rng.randrange(4)
+    if choice == 0:
+        return text[0].upper() + text[1:] + '?'
+    if choice == 1:
+        return text.replace(' ', '  ', 1) + ' '
+    if choice == 2:
+        return text.upper()
+    return text
+
+
+def query_log(intent_list, length: int, paraphrase_rate: float, seed: int):
+    """[(intent index, query text)] with Zipf(1.1) intent popularity"""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) ** 1.1 for rank in range(len(intent_list))]
+    log = []
+    for intent in rng.choices(range(len(intent_list)), weights=weights, k=length):
+        canonical, paraphrases, _ = intent_list[intent]
+        text = rng.choice(paraphrases) if rng.random() < paraphrase_rate else canonical
+        log.append((intent, surface_variant(text, rng)))
+    return log
+
+
+def unit_rows(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def intent_bases(intent_list, dims: int, related: float, seed: int) -> np.ndarray:
+    """Unit intent vectors; two intents from the same template are ~related cosine-similar"""
+    rng = np.random.default_rng(seed)
+    shared = unit_rows(rng.standard_normal((len(TEMPLATES), dims)))
+    own = unit_rows(rng.standard_normal((len(intent_list), dims)))
+    templates = [template for _, _, template in intent_list]
+    return unit_rows(np.sqrt(related) * shared[templates] + np.sqrt(1 - related) * own).astype(np.float32)
+
+
+def intent_chunks(bases: np.ndarray, per_intent: int, total: int, seed: int) -> np.ndarray:
+    """per_intent chunks around each intent (cosine 0.5-0.9), padded with unrelated chunks to total"""
+    rng = np.random.default_rng(seed)
+    near = np.repeat(bases, per_intent, axis=0)
+    cosine = rng.uniform(0.5, 0.9, (len(near), 1)).astype(np.float32)
+    offset = rng.standard_normal(near.shape).astype(np.float32)
+    offset -= (offset * near).sum(axis=1, keepdims=True) * near
+    near = cosine * near + np.sqrt(1 - cosine ** 2) * unit_rows(offset)
+    filler = rng.standard_normal((max(total - len(near), 0), bases.shape[1])).astype(np.float32)
+    return np.vstack([near, filler])
+
+
+class SimulatedEmbedder:
+    """Intent vector + text-seeded perturbation, after sleeping embed_ms"""
+
+    def __init__(self, intent_of: dict, canonical: dict, bases: np.ndarray, embed_ms: float,
+                 similarity: tuple):
+        self.bases = bases
+        self.intent_of = intent_of
+        self.canonical = canonical
+        self.embed_ms = embed_ms
+        self.similarity = similarity
+
+    def __call__(self, query: str):
+        time.sleep(self.embed_ms / 1000)
+        base = self.bases[self.intent_of[query]]
+        text = ' '.join(query.lower().split()).rstrip('?.! ')
+        seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+        rng = np.random.default_rng(seed)
+        # |noise| = tan(arccos(similarity)) puts cos(base, base + noise) at similarity
+        similarity = rng.uniform(*self.similarity)
+        noise = rng.standard_normal(base.shape).astype(np.float32)
+        noise -= noise.dot(base) * base
+        noise *= np.tan(np.arccos(similarity)) / (np.linalg.norm(noise) or 1.0)
+        # Canonical wording gets the base vector itself
+        return (base if text == self.canonical.get(self.intent_of[query]) else base + noise).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a query log through the query caches")
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--intents', type=int, default=80)
+    parser.add_argument('--paraphrase-rate', type=float, default=0.3)
+    parser.add_argument('--paraphrase-similarity', type=float, nargs=2, default=[0.94, 0.995],
+                        metavar=('LOW', 'HIGH'), help="Cosine of a paraphrase to its intent, drawn uniformly")
+    parser.add_argument('--related-similarity', type=float, default=0.9,
+                        help="Cosine between intents sharing a question template")
+    parser.add_argument('--chunks', type=int, default=600)
+    parser.add_argument('--chunks-per-intent', type=int, default=6)
+    parser.add_argument('--dims', type=int, default=1536)
+    parser.add_argument('--embed-ms', type=float, default=200.0)
+    parser.add_argument('--gap-seconds', type=float, default=60.0, help="Simulated time between queries")
+    parser.add_argument('--max-embeddings', type=int, default=1000)
+    parser.add_argument('--embedding-ttl', type=float, default=24 * 3600)
+    parser.add_argument('--result-ttl', type=float, default=3600)
+    parser.add_argument('--result-similarity', type=float, default=0.97)
+    parser.add_argument('--endpoint', choices=['fake', 'env'], default='fake',
+                        help="fake: simulated embeddings; env: EmbeddingEngine with OPENAI_* settings")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    intent_list = intents(args.intents, args.seed)
+    log = query_log(intent_list, args.queries, args.paraphrase_rate, args.seed)
+
+    if args.endpoint == 'env':
+        from embedding_engine import EmbeddingEngine
+        engine = EmbeddingEngine()
+
+        def embed(query):
+            with redirect_stdout(io.StringIO()):
+                return engine.embed([query])[0]
+        probe = embed(log[0][1])
+        dims = len(probe)
+        matrix = np.random.default_rng(args.seed + 1).standard_normal((args.chunks, dims)).astype(np.float32)
+    else:
+        bases = intent_bases(intent_list, args.dims, args.related_similarity, args.seed)
+        embed = SimulatedEmbedder({query: intent for intent, query in log},
+                                  {i: canonical for i, (canonical, _, _) in enumerate(intent_list)},
+                                  bases, args.embed_ms, tuple(args.paraphrase_similarity))
+        dims = args.dims
+        matrix = intent_chunks(bases, args.chunks_per_intent, args.chunks, args.seed + 1)
+
+    index = VectorIndex(matrix, [{'id': i} for i in range(len(matrix))])
+
+    def search(vector, top_k, min_similarity):
+        return index.search(np.asarray(vector), top_k, min_similarity)
+
+    def chunk_ids(results):
+        return [result['chunk']['id'] for result in results]
+
+    # Uncached replay: embed + search per query; its results are the reference for false hits
+    uncached = []
+    expected = []
+    for _, query in log:
+        start = time.perf_counter()
+        vector = embed(query)
+        expected.append(chunk_ids(search(vector, 5, 0.3)))
+        uncached.append((time.perf_counter() - start) * 1000)
+
+    now = [0.0]
+    cache = QueryCache(max_embeddings=args.max_embeddings, embedding_ttl=args.embedding_ttl,
+                       result_ttl=args.result_ttl, result_similarity=args.result_similarity,
+                       clock=lambda: now[0])
+    cached = []
+    false_hits = wrong_top = 0
+    for (_, query), reference in zip(log, expected):
+        hits = cache.counters['result_hits']
+        start = time.perf_counter()
+        results = chunk_ids(cache.search(query, embed, search, 5, 0.3))
+        cached.append((time.perf_counter() - start) * 1000)
+        now[0] += args.gap_seconds
+        if cache.counters['result_hits'] > hits and results != reference:
+            false_hits += 1
+            wrong_top += results[:1] != reference[:1]
+
+    stats = cache.stats()
+    u, c = percentiles(uncached), percentiles(cached)
+
+    print(f"\n{'='*60}")
+    print("Query Cache Replay")
+    print(f"{len(log)} queries over {len(intent_list)} intents, {args.paraphrase_rate:.0%} paraphrased, "
+          f"{len(index)} chunks x {dims} dims")
+    if args.endpoint == 'fake':
+        low, high = args.paraphrase_similarity
+        print(f"paraphrase cosine {low}-{high}, related intents {args.related_similarity}")
+    print(f"endpoint={args.endpoint}" + (f" ({args.embed_ms:.0f} ms)" if args.endpoint == 'fake' else '')
+          + f", gap={args.gap_seconds:.0f}s, embedding TTL={args.embedding_ttl:.0f}s, "
+          f"result TTL={args.result_ttl:.0f}s, similarity>={args.result_similarity}")
+    print(f"{'='*60}\n")
+    print(f"  {'':<10}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}{'API calls':>11}")
+    print(f"  {'uncached':<10}{u['p50']:>10.2f}{u['p95']:>10.2f}{sum(uncached) / 1000:>10.1f}{len(log):>11}")
+    print(f"  {'cached':<10}{c['p50']:>10.2f}{c['p95']:>10.2f}{sum(cached) / 1000:>10.1f}"
+          f"{stats['embedding_misses']:>11}")
+    print(f"\n  Embedding cache: {stats['embedding_hits']}/{len(log)} hits "
+          f"({stats['embedding_hit_rate']:.1%}), {stats['api_calls_saved']} API calls saved")
+    print(f"  Result cache:    {stats['result_hits']}/{stats['result_hits'] + stats['result_misses']} hits "
+          f"({stats['result_hit_rate']:.1%})")
+    print(f"  False hits:      {false_hits}/{stats['result_hits']} result hits "
+          f"({false_hits / (stats['result_hits'] or 1):.1%}) differ from a fresh search, "
+          f"{wrong_top} with a different top result")
+    print(f"  Evictions: {stats['evictions']}, expirations: {stats['expirations']}")
+    print(f"  Estimated saving: {stats['ms_saved'] / 1000:.1f} s "
+          f"(measured: {(sum(uncached) - sum(cached)) / 1000:.1f} s)")
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: per-query search latency at 600, 10k and 100k chunks
+Compares the VectorStore.search approach (per-chunk cosine with both
+norms recomputed, then a full sort) against VectorIndex (pre-normalized
+matrix, one mat-vec, argpartition) and batched queries (one mat-mat).
+"""
+
+import time
+import argparse
+
+import numpy as np
+
+from vector_search import VectorIndex
+
+
+def naive_search(vectors, query, top_k: int):
+    """Mirror of VectorStore.search: cosine per chunk, sort everything"""
+    results = []
+    for i, vector in enumerate(vectors):
+        similarity = np.dot(query, vector) / (np.linalg.norm(query) * np.linalg.norm(vector))
+        results.append((similarity, i))
+    results.sort(reverse=True)
+    return results[:top_k]
+
+
+def per_query_ms(fn, queries, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(queries)
+        elapsed = (time.perf_counter() - start) / len(queries) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector search latency")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[600, 10_000, 100_000])
+    parser.add_argument('--dims', type=int, default=1536)
+    parser.add_argument('--queries', type=int, default=32)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--naive-limit', type=int, default=10_000,
+                        help="Skip the per-chunk baseline above this many chunks")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dims)).astype(np.float32)
+
+    print(f"\n{'='*60}")
+    print("Vector Search Benchmark (ms per query)")
+    print(f"dims={args.dims}, top_k={args.top_k}, {args.queries} queries")
+    print(f"{'='*60}\n")
+    print(f"  {'chunks':>8}{'naive loop':>14}{'mat-vec':>12}{'batched':>12}")
+
+    for size in args.sizes:
+        matrix = rng.standard_normal((size, args.dims)).astype(np.float32)
+        index = VectorIndex(matrix)
+
+        naive = '-'
+        if size <= args.naive_limit:
+            ms = per_query_ms(lambda qs: [naive_search(matrix, q, args.top_k) for q in qs[:4]],
+                              queries[:4], 1)
+            naive = f"{ms:.2f}"
+
+        single = per_query_ms(lambda qs: [index.search_vector(q, args.top_k) for q in qs],
+                              queries, args.repeats)
+        batched = per_query_ms(lambda qs: index.search_batch(qs, args.top_k),
+                               queries, args.repeats)
+
+        # Same answers from both fast paths
+        expected, _ = index.search_batch(queries[:1], args.top_k)
+        got, _ = index.search_vector(queries[0], args.top_k)
+        assert (expected[0] == got).all()
+
+        print(f"  {size:>8,}{naive:>14}{single:>12.3f}{batched:>12.3f}")
+        del matrix, index
+
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
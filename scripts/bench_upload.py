@@ -0,0 +1,132 @@
+"""
+Benchmark: Prisma-style create_many batches vs bulk loader
+The baseline mirrors upload_to_rcc_bot's original path: one 50-row
+multi-row INSERT per create_many call, each in its own transaction.
+The bulk loader writes the same rows in one transaction per document,
+either with COPY (Postgres) or batched executemany.
+
+All methods write the embedding column too, so rows are identical in
+size. Runs against a scratch SQLite file by default, or a Postgres
+database with --dsn (tables are created if missing).
+"""
+
+import os
+import io
+import json
+import time
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+from bulk_loader import (CHUNK_COLUMNS, PostgresBulkLoader, SQLiteBulkLoader,
+                         chunk_rows, _quoted)
+
+
+DEFAULT_CHUNKS = Path(__file__).parent.parent / 'documents' / 'IS_456_2000_v2.json'
+
+DOCUMENT = {'title': 'Benchmark document', 'filename': 'bench.pdf', 'codeNumber': 'IS 456'}
+
+
+def synthetic_chunks(path: str, scale: int, dims: int):
+    with open(path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    chunks = [dict(chunk, id=f"{chunk['id']}#{copy}") for copy in range(scale) for chunk in base]
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((len(chunks), dims)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return chunks, vectors
+
+
+def create_many_sqlite(loader: SQLiteBulkLoader, chunks, vectors, batch_size: int = 50):
+    """Document insert, then one committed multi-row INSERT per batch"""
+    conn = loader.conn
+    document_id = f"baseline-{time.perf_counter_ns()}"
+    conn.execute('INSERT INTO documents (id, title, filename, status) VALUES (?, ?, ?, ?)',
+                 (document_id, DOCUMENT['title'], DOCUMENT['filename'], 'PROCESSING'))
+    rows = list(chunk_rows(chunks, document_id, vectors))
+    row_sql = f"({', '.join('?' * len(CHUNK_COLUMNS))})"
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        conn.execute(f'INSERT INTO chunks ({_quoted(CHUNK_COLUMNS)}) VALUES '
+                     f'{", ".join([row_sql] * len(batch))}',
+                     [value for row in batch for value in row])
+    conn.execute('UPDATE documents SET status = ? WHERE id = ?', ('INDEXED', document_id))
+
+
+def create_many_postgres(loader: PostgresBulkLoader, chunks, vectors, batch_size: int = 50):
+    conn = loader.conn
+    conn.autocommit = True
+    try:
+        document_id = f"baseline-{time.perf_counter_ns()}"
+        conn.execute('INSERT INTO documents (id, title, filename, status, "updatedAt") '
+                     'VALUES (%s, %s, %s, \'PROCESSING\', now())',
+                     (document_id, DOCUMENT['title'], DOCUMENT['filename']))
+        rows = list(chunk_rows(chunks, document_id, vectors))
+        row_sql = f"({', '.join(['%s'] * len(CHUNK_COLUMNS))})"
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            conn.execute(f'INSERT INTO chunks ({_quoted(CHUNK_COLUMNS)}) VALUES '
+                         f'{", ".join([row_sql] * len(batch))}',
+                         [value for row in batch for value in row])
+        conn.execute('UPDATE documents SET status = \'INDEXED\' WHERE id = %s', (document_id,))
+    finally:
+        conn.autocommit = False
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunk upload paths")
+    parser.add_argument('--chunks', default=str(DEFAULT_CHUNKS))
+    parser.add_argument('--scale', type=int, default=20, help="Repeat the fixture chunks N times")
+    parser.add_argument('--dims', type=int, default=1536)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[500, 5000])
+    parser.add_argument('--dsn', help="Postgres URL (default: scratch SQLite file)")
+    args = parser.parse_args()
+
+    chunks, vectors = synthetic_chunks(args.chunks, args.scale, args.dims)
+    n = len(chunks)
+
+    print(f"\n{'='*60}")
+    print("Upload Benchmark")
+    print(f"{n:,} chunks x {args.dims} dims, {'Postgres' if args.dsn else 'SQLite'}")
+    print(f"{'='*60}\n")
+
+    results = []
+    if args.dsn:
+        loader = PostgresBulkLoader(args.dsn)
+        loader.create_schema()
+        results.append(('create_many x50', timed(lambda: create_many_postgres(loader, chunks, vectors))))
+        for batch_size in args.batch_sizes:
+            loader.batch_size, loader.use_copy = batch_size, False
+            results.append((f'pipelined insert {batch_size}',
+                            timed(lambda: loader.load_document(DOCUMENT, chunks, vectors))))
+        loader.use_copy = True
+        results.append(('copy', timed(lambda: loader.load_document(DOCUMENT, chunks, vectors))))
+        loader.close()
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            loader = SQLiteBulkLoader(os.path.join(tmp, 'bench.sqlite'))
+            results.append(('create_many x50', timed(lambda: create_many_sqlite(loader, chunks, vectors))))
+            for batch_size in args.batch_sizes:
+                loader.batch_size = batch_size
+                results.append((f'bulk insert {batch_size}',
+                                timed(lambda: loader.load_document(DOCUMENT, chunks, vectors))))
+            loader.close()
+
+    baseline = results[0][1]
+    for name, elapsed in results:
+        print(f"  {name:<24} {elapsed:7.2f}s  {n / elapsed:>10,.0f} rows/s  {baseline / elapsed:5.2f}x")
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
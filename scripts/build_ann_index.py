@@ -0,0 +1,111 @@
+"""
+Build an IVF-PQ ANN index after precompute and report recall / latency
+Reads an embedding artifact (see embedding_artifact.py), trains and
+serializes the index to <artifact>.ivfpq.npz, then compares it against
+exact brute-force search (VectorIndex) on held-out queries.
+
+  python build_ann_index.py --artifact ../documents/IS_456_2000_v2_with_embeddings
+  python build_ann_index.py --synthetic 100000      # clustered random corpus
+"""
+
+import math
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from ann_index import IVFPQIndex, index_path_for
+from vector_search import VectorIndex
+from embedding_artifact import load_artifact
+
+
+def synthetic_corpus(size: int, dims: int, clusters: int = 500, seed: int = 0):
+    """Clustered unit vectors: a rough stand-in for topic structure in real codes"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dims)).astype(np.float32)
+    labels = rng.integers(0, clusters, size)
+    matrix = centers[labels] + 0.6 * rng.standard_normal((size, dims)).astype(np.float32)
+    return matrix
+
+
+def held_out_queries(matrix: 'np.ndarray', count: int, seed: int = 1):
+    """Perturbed copies of random rows, so queries are near but not equal to data"""
+    rng = np.random.default_rng(seed)
+    rows = np.asarray(matrix[rng.choice(len(matrix), count, replace=False)], dtype=np.float32)
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows + 0.5 * rng.standard_normal(rows.shape).astype(np.float32) / math.sqrt(rows.shape[1])
+
+
+def recall_at_k(found: 'np.ndarray', truth: 'np.ndarray') -> float:
+    return len(set(found.tolist()) & set(truth.tolist())) / len(truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and evaluate an IVF-PQ index")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--artifact', help="Artifact base path (without .npy)")
+    source.add_argument('--synthetic', type=int, help="Generate a clustered corpus of N vectors")
+    parser.add_argument('--dims', type=int, default=1536, help="Dims for --synthetic")
+    parser.add_argument('--output', help="Index file (default: <artifact>.ivfpq.npz)")
+    parser.add_argument('--lists', type=int, default=None, help="Coarse clusters (default 4*sqrt(N))")
+    parser.add_argument('--subvectors', type=int, default=64, help="PQ bytes per vector")
+    parser.add_argument('--probe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--shortlist', type=int, default=10,
+                        help="Rerank the best top_k * shortlist PQ candidates exactly")
+    args = parser.parse_args()
+
+    if args.artifact:
+        matrix, _ = load_artifact(args.artifact)
+        output = args.output or str(index_path_for(args.artifact))
+    else:
+        matrix = synthetic_corpus(args.synthetic, args.dims)
+        output = args.output or f"synthetic_{args.synthetic}.ivfpq.npz"
+
+    n_lists = args.lists or max(1, int(4 * math.sqrt(len(matrix))))
+
+    print(f"\n{'='*60}")
+    print("Building IVF-PQ Index")
+    print(f"Vectors: {len(matrix):,} x {matrix.shape[1]}, lists: {n_lists}, "
+          f"PQ bytes/vector: {args.subvectors}")
+    print(f"{'='*60}\n")
+
+    start = time.perf_counter()
+    index = IVFPQIndex(n_lists=n_lists, n_subvectors=args.subvectors).build(matrix)
+    print(f"✅ Built in {time.perf_counter() - start:.1f}s")
+    index.save(output)
+    print(f"💾 Saved to: {output} ({Path(output).stat().st_size / (1024 * 1024):.2f} MB, "
+          f"float32 matrix would be {matrix.shape[0] * matrix.shape[1] * 4 / (1024 * 1024):.2f} MB)\n")
+
+    # Ground truth from exact search
+    exact = VectorIndex(matrix)
+    queries = held_out_queries(matrix, min(args.queries, len(matrix)))
+
+    start = time.perf_counter()
+    truth = [exact.search_vector(q, args.top_k)[0] for q in queries]
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    print(f"📊 recall@{args.top_k} vs brute force ({len(queries)} queries)\n")
+    print(f"  {'mode':<22}{'recall':>8}{'ms/query':>11}")
+    print(f"  {'exact (mat-vec)':<22}{1.0:>8.3f}{exact_ms:>11.3f}")
+
+    for n_probe in args.probe:
+        if n_probe > index.n_lists:
+            continue
+        for rerank in (False, True):
+            vectors = exact.matrix if rerank else None
+            start = time.perf_counter()
+            found = [index.search(q, args.top_k, n_probe, rerank_vectors=vectors,
+                                  shortlist=args.shortlist)[0] for q in queries]
+            ms = (time.perf_counter() - start) / len(queries) * 1000
+            recall = np.mean([recall_at_k(f, t) for f, t in zip(found, truth)])
+            label = f"probe={n_probe}" + (" +rerank" if rerank else "")
+            print(f"  {label:<22}{recall:>8.3f}{ms:>11.3f}")
+
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+"""
+High-throughput chunk loader for the RCC Bot database
+Writes a document, all of its chunks and their embedding vectors in one
+transaction per document:
+
+  PostgresBulkLoader  COPY ... FROM STDIN (or pipelined executemany
+                      INSERTs with use_copy=False) over one reused
+                      connection
+  SQLiteBulkLoader    same schema and row layout, for offline tests and
+                      benchmarks without a Postgres server
+
+Vectors are stored in chunks.embedding as little-endian float32 bytes
+(the same layout as the .npy artifact) and chunks.embeddingId holds the
+chunk's id in the artifact. With pgvector=True they go into
+rag_vectors.chunk_vectors instead (one vector(dims) row per chunk,
+deleted with it), and an HNSW or IVFFlat cosine index is built over it
+for pgvector_search.py. That table lives in its own Postgres schema,
+which Prisma does not manage: `prisma db push` and `prisma migrate` never
+see it, so they never offer to drop or reset it.
+
+replace_id deletes an earlier upload of the same document (and, through
+the chunks foreign key, its chunks) in the same transaction, so a re-run
+never leaves two copies searchable.
+"""
+
+import sys
+import time
+import uuid
+import struct
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+from token_splitter import count_tokens
+
+
+CHUNK_COLUMNS = (
+    'id', 'documentId', 'content', 'tokenCount', 'chunkIndex', 'pageNumber',
+    'clauseNumber', 'sectionTitle', 'embeddingId', 'embedding',
+)
+
+# Postgres types of CHUNK_COLUMNS for binary COPY
+CHUNK_COPY_TYPES = ('text', 'text', 'text', 'int4', 'int4', 'int4', 'text', 'text', 'text', 'bytea')
+
+# pgvector storage, outside the Prisma-managed schema
+VECTOR_SCHEMA = 'rag_vectors'
+VECTOR_TABLE = f'{VECTOR_SCHEMA}.chunk_vectors'
+VECTOR_COLUMN = 'embeddingVector'
+VECTOR_TABLE_COLUMNS = ('chunkId', 'documentId', VECTOR_COLUMN)
+# pgvector values are pre-encoded, so they are passed through as bytea
+VECTOR_COPY_TYPES = ('text', 'text', 'bytea')
+
+VECTOR_INDEXES = ('hnsw', 'ivfflat')
+
+DOCUMENT_COLUMNS = (
+    'id', 'title', 'filename', 'codeNumber', 'version', 'year', 'jurisdiction',
+    'status', 'chunkCount', 'domainId', 'uploadedById', 'mimeType', 'updatedAt',
+)
+
+# Prisma-only connection string parameters that libpq rejects
+PRISMA_ONLY_PARAMS = {'schema', 'pgbouncer', 'connection_limit', 'pool_timeout',
+                      'socket_timeout', 'statement_cache_size'}
+
+# Minimal copy of the Prisma tables, for SQLite stand-ins and scratch databases
+SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS domains (
+    id TEXT PRIMARY KEY, name TEXT UNIQUE NOT NULL, displayName TEXT NOT NULL,
+    description TEXT, icon TEXT, color TEXT, isActive INTEGER DEFAULT 1,
+    sortOrder INTEGER DEFAULT 0, createdAt TEXT DEFAULT CURRENT_TIMESTAMP, updatedAt TEXT
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY, title TEXT NOT NULL, filename TEXT NOT NULL, codeNumber TEXT,
+    version TEXT, year INTEGER, jurisdiction TEXT, status TEXT DEFAULT 'PENDING',
+    chunkCount INTEGER DEFAULT 0, indexedAt TEXT, domainId TEXT, uploadedById TEXT,
+    mimeType TEXT, createdAt TEXT DEFAULT CURRENT_TIMESTAMP, updatedAt TEXT
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY, documentId TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    content TEXT NOT NULL, tokenCount INTEGER, chunkIndex INTEGER NOT NULL,
+    pageNumber INTEGER, clauseNumber TEXT, sectionTitle TEXT, embeddingId TEXT,
+    embedding BLOB, createdAt TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS chunks_documentId_idx ON chunks(documentId);
+'''
+
+# The same tables as Prisma creates them in Postgres, for scratch databases
+POSTGRES_SCHEMA = '''
+DO $$ BEGIN
+    CREATE TYPE "IndexingStatus" AS ENUM ('PENDING', 'PROCESSING', 'INDEXED', 'FAILED');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, email TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS domains (
+    id TEXT PRIMARY KEY, name TEXT UNIQUE NOT NULL, "displayName" TEXT NOT NULL,
+    description TEXT, icon TEXT, color TEXT, "isActive" BOOLEAN NOT NULL DEFAULT true,
+    "sortOrder" INTEGER NOT NULL DEFAULT 0, "systemPrompt" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP, "updatedAt" TIMESTAMP(3) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY, title TEXT NOT NULL, filename TEXT NOT NULL, "fileUrl" TEXT,
+    "fileSize" INTEGER, "mimeType" TEXT, "codeNumber" TEXT, version TEXT, year INTEGER,
+    jurisdiction TEXT, status "IndexingStatus" NOT NULL DEFAULT 'PENDING',
+    "chunkCount" INTEGER NOT NULL DEFAULT 0, "indexedAt" TIMESTAMP(3), "indexError" TEXT,
+    "versionLabel" TEXT, "previousVersionId" TEXT,
+    "uploadedById" TEXT REFERENCES users(id), "domainId" TEXT REFERENCES domains(id),
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP, "updatedAt" TIMESTAMP(3) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    "documentId" TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    content TEXT NOT NULL, "tokenCount" INTEGER, "chunkIndex" INTEGER NOT NULL,
+    "pageNumber" INTEGER, "clauseNumber" TEXT, "sectionTitle" TEXT, "embeddingId" TEXT,
+    embedding BYTEA, "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "chunks_documentId_idx" ON chunks("documentId");
+'''
+
+
+def libpq_dsn(database_url: str) -> str:
+    """Turn a Prisma DATABASE_URL into something psycopg accepts"""
+    parts = urlsplit(database_url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    schema = dict(params).get('schema')
+    kept = [(k, v) for k, v in params if k not in PRISMA_ONLY_PARAMS]
+    if schema and schema != 'public':
+        kept.append(('options', f'-csearch_path={schema}'))
+    return urlunsplit(parts._replace(query=urlencode(kept)))
+
+
+def pack_vector(vector) -> Optional[bytes]:
+    if vector is None:
+        return None
+    return np.asarray(vector, dtype='<f4').tobytes()
+
+
+def pgvector_binary(vector) -> Optional[bytes]:
+    """pgvector's binary wire format: int16 dims, int16 unused, big-endian float32s"""
+    if vector is None:
+        return None
+    values = np.asarray(vector, dtype='>f4')
+    return struct.pack('>HH', len(values), 0) + values.tobytes()
+
+
+class PgVectorBinary(bytes):
+    """pgvector_binary() output, sent as a binary 'vector' parameter"""
+
+
+def vector_literal(vector) -> Optional[str]:
+    """pgvector text input, '[x,y,...]'"""
+    if vector is None:
+        return None
+    return '[' + ','.join(map(repr, np.asarray(vector, dtype=np.float32).tolist())) + ']'
+
+
+def chunk_rows(chunks: Sequence[Dict], document_id: str, vectors: Sequence = None,
+               encode=pack_vector) -> Iterator[tuple]:
+    """One tuple per chunk in CHUNK_COLUMNS order, vectors converted by encode()"""
+    for index, chunk in enumerate(chunks):
+        pages = chunk.get('pages') or []
+        vector = vectors[index] if vectors is not None else chunk.get('embedding')
+        yield (
+            str(uuid.uuid4()),
+            document_id,
+            chunk['content'],
+            # Exact count from the splitter; older chunk files are counted here
+            chunk['token_count'] if 'token_count' in chunk else count_tokens(chunk['content']),
+            index,
+            pages[0] if pages else None,
+            chunk.get('clause'),
+            chunk.get('title'),
+            chunk.get('id') if vector is not None else None,
+            encode(vector),
+        )
+
+
+def split_vector_rows(rows: Iterable[tuple], document_id: str, vector_rows: List) -> Iterator[tuple]:
+    """Chunk rows without their vector; vectors are appended to vector_rows in VECTOR_TABLE_COLUMNS order"""
+    for row in rows:
+        if row[-1] is not None:
+            vector_rows.append((row[0], document_id, row[-1]))
+        yield row[:-1] + (None,)
+
+
+def batched(rows: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def utc_now() -> datetime:
+    """Naive UTC, as Prisma stores DateTime (timestamp without time zone)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _quoted(columns) -> str:
+    return ', '.join(f'"{column}"' for column in columns)
+
+
+def _postgres_placeholders(columns) -> str:
+    # status is the "IndexingStatus" enum, which text parameters don't cast to implicitly
+    return ', '.join('%s::"IndexingStatus"' if c == 'status' else '%s' for c in columns)
+
+
+class PostgresBulkLoader:
+    """
+    batch_size  rows per executemany call (use_copy=False) or per
+                progress line (COPY streams continuously)
+    pgvector    write vectors to VECTOR_TABLE instead of the bytea
+                column; call ensure_vector_table() before and
+                build_vector_index() after loading
+    """
+
+    def __init__(self, database_url: str, batch_size: int = 5000, use_copy: bool = True,
+                 pgvector: bool = False):
+        try:
+            import psycopg
+        except ImportError:
+            print("Installing psycopg...")
+            import subprocess
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "psycopg[binary]"])
+            import psycopg
+        self._psycopg = psycopg
+        self.dsn = libpq_dsn(database_url)
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.pgvector = pgvector
+        self._conn = None
+        self._vector_dumper = False
+
+    @property
+    def conn(self):
+        """One connection reused for every document loaded by this instance"""
+        if self._conn is None or self._conn.closed:
+            self._conn = self._psycopg.connect(self.dsn)
+        return self._conn
+
+    def create_schema(self):
+        """Create the tables in a scratch database (production uses prisma migrate)"""
+        with self.conn.transaction():
+            self.conn.execute(POSTGRES_SCHEMA)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._vector_dumper = False
+
+    def _register_vector_dumper(self):
+        """Let executemany send PgVectorBinary values in pgvector's binary format"""
+        if self._vector_dumper:
+            return
+        from psycopg.adapt import Dumper
+        from psycopg.pq import Format
+        from psycopg.types import TypeInfo
+
+        info = TypeInfo.fetch(self.conn, 'vector')
+        if info is None:
+            raise RuntimeError("pgvector extension is not installed in this database")
+
+        class VectorDumper(Dumper):
+            format = Format.BINARY
+            oid = info.oid
+
+            def dump(self, obj):
+                return obj
+
+        self.conn.adapters.register_dumper(PgVectorBinary, VectorDumper)
+        self._vector_dumper = True
+
+    def ensure_vector_table(self, dims: int):
+        """Create the pgvector extension and VECTOR_TABLE with a vector(dims) column if missing"""
+        with self.conn.transaction():
+            self.conn.execute('CREATE EXTENSION IF NOT EXISTS vector')
+            self.conn.execute(f'CREATE SCHEMA IF NOT EXISTS {VECTOR_SCHEMA}')
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {VECTOR_TABLE} ('
+                f'"chunkId" TEXT PRIMARY KEY REFERENCES chunks(id) ON DELETE CASCADE, '
+                f'"documentId" TEXT NOT NULL, "{VECTOR_COLUMN}" vector({dims}) NOT NULL)'
+            )
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS "chunk_vectors_documentId_idx" '
+                              f'ON {VECTOR_TABLE} ("documentId")')
+            # format_type gives e.g. 'vector(1536)'
+            column_type = self.conn.execute(
+                'SELECT format_type(atttypid, atttypmod) FROM pg_attribute '
+                'WHERE attrelid = %s::regclass AND attname = %s', (VECTOR_TABLE, VECTOR_COLUMN)
+            ).fetchone()[0]
+        if column_type != f'vector({dims})':
+            raise ValueError(f"{VECTOR_TABLE}.{VECTOR_COLUMN} is {column_type}, vectors have {dims} dims")
+
+    def build_vector_index(self, kind: str = 'hnsw', lists: int = None, m: int = 16,
+                           ef_construction: int = 64) -> Dict:
+        """
+        Build the cosine index if it does not exist yet. Build after the
+        first bulk load: IVFFlat trains its lists on the rows present, and
+        HNSW builds faster in one pass than row by row. Later loads are
+        added to the existing index incrementally.
+        """
+        if kind not in VECTOR_INDEXES:
+            raise ValueError(f"kind must be one of {VECTOR_INDEXES}, got {kind!r}")
+        name = f'chunk_vectors_{kind}_idx'
+        started = time.perf_counter()
+        with self.conn.transaction():
+            exists = self.conn.execute('SELECT to_regclass(%s)', (f'{VECTOR_SCHEMA}.{name}',)).fetchone()[0]
+            if exists is None:
+                if kind == 'hnsw':
+                    options = f'm = {m}, ef_construction = {ef_construction}'
+                else:
+                    if lists is None:
+                        # pgvector guidance: rows / 1000 lists up to 1M rows
+                        rows = self.conn.execute(f'SELECT count(*) FROM {VECTOR_TABLE}').fetchone()[0]
+                        lists = max(10, rows // 1000)
+                    options = f'lists = {lists}'
+                self.conn.execute("SET LOCAL maintenance_work_mem = '512MB'")
+                self.conn.execute(f'CREATE INDEX {name} ON {VECTOR_TABLE} USING {kind} '
+                                  f'("{VECTOR_COLUMN}" vector_cosine_ops) WITH ({options})')
+        return {'name': name, 'created': exists is None,
+                'seconds': time.perf_counter() - started}
+
+    def find_user_id(self, email: str) -> Optional[str]:
+        with self.conn.cursor() as cur:
+            cur.execute('SELECT id FROM users WHERE email = %s', (email,))
+            row = cur.fetchone()
+        self.conn.commit()
+        return row[0] if row else None
+
+    def find_document_ids(self, document: Dict) -> List[str]:
+        """Earlier uploads of document (same codeNumber and version, else same title), newest first"""
+        with self.conn.cursor() as cur:
+            if document.get('codeNumber'):
+                cur.execute('SELECT id FROM documents WHERE "codeNumber" = %s '
+                            'AND version IS NOT DISTINCT FROM %s ORDER BY "createdAt" DESC',
+                            (document['codeNumber'], document.get('version')))
+            else:
+                cur.execute('SELECT id FROM documents WHERE title = %s ORDER BY "createdAt" DESC',
+                            (document['title'],))
+            rows = cur.fetchall()
+        self.conn.commit()
+        return [row[0] for row in rows]
+
+    def ensure_domain(self, cur, domain: Dict) -> str:
+        cur.execute('SELECT id FROM domains WHERE id = %s', (domain['id'],))
+        if cur.fetchone() is None:
+            columns = list(domain) + ['updatedAt']
+            cur.execute(
+                f'INSERT INTO domains ({_quoted(columns)}) '
+                f'VALUES ({", ".join(["%s"] * len(columns))})',
+                list(domain.values()) + [utc_now()]
+            )
+        return domain['id']
+
+    def load_document(self, document: Dict, chunks: Sequence[Dict], vectors: Sequence = None,
+                      domain: Dict = None, replace_id: str = None) -> Dict:
+        """Insert document + chunks atomically (replacing document replace_id); returns stats including rows/s"""
+        started = time.perf_counter()
+        document_id = str(uuid.uuid4())
+        conn = self.conn
+        if self.pgvector and not self.use_copy:
+            # Cursors copy the connection's adapters when created
+            self._register_vector_dumper()
+
+        with conn.transaction():
+            with conn.cursor() as cur:
+                replaced = 0
+                if replace_id:
+                    # ON DELETE CASCADE removes the old chunks
+                    cur.execute('DELETE FROM documents WHERE id = %s', (replace_id,))
+                    replaced = cur.rowcount
+                if domain:
+                    document = dict(document, domainId=self.ensure_domain(cur, domain))
+                row = dict(document, id=document_id, status='PROCESSING',
+                           chunkCount=len(chunks), updatedAt=utc_now())
+                columns = [c for c in DOCUMENT_COLUMNS if c in row]
+                cur.execute(
+                    f'INSERT INTO documents ({_quoted(columns)}) '
+                    f'VALUES ({_postgres_placeholders(columns)})',
+                    [row[c] for c in columns]
+                )
+
+                rows = chunk_rows(chunks, document_id, vectors,
+                                  pgvector_binary if self.pgvector else pack_vector)
+                vector_rows = []
+                if self.pgvector:
+                    # Vectors follow into VECTOR_TABLE once their chunks exist
+                    rows = split_vector_rows(rows, document_id, vector_rows)
+                written = 0
+                if self.use_copy:
+                    # Binary format: vectors go over the wire as raw bytes, not hex text
+                    with cur.copy(f'COPY chunks ({_quoted(CHUNK_COLUMNS)}) '
+                                  f'FROM STDIN (FORMAT BINARY)') as copy:
+                        copy.set_types(CHUNK_COPY_TYPES)
+                        for values in rows:
+                            copy.write_row(values)
+                            written += 1
+                            if written % self.batch_size == 0:
+                                print(f"  Streamed {written}/{len(chunks)} chunks...")
+                    if vector_rows:
+                        with cur.copy(f'COPY {VECTOR_TABLE} ({_quoted(VECTOR_TABLE_COLUMNS)}) '
+                                      f'FROM STDIN (FORMAT BINARY)') as copy:
+                            copy.set_types(VECTOR_COPY_TYPES)
+                            for values in vector_rows:
+                                copy.write_row(values)
+                else:
+                    insert = (f'INSERT INTO chunks ({_quoted(CHUNK_COLUMNS)}) '
+                              f'VALUES ({", ".join(["%s"] * len(CHUNK_COLUMNS))})')
+                    for batch in batched(rows, self.batch_size):
+                        # psycopg 3 pipelines executemany: one round-trip per batch
+                        cur.executemany(insert, batch)
+                        written += len(batch)
+                        print(f"  Inserted {written}/{len(chunks)} chunks...")
+                    # %b: the vector dumper is binary-only
+                    insert = (f'INSERT INTO {VECTOR_TABLE} ({_quoted(VECTOR_TABLE_COLUMNS)}) '
+                              f'VALUES (%s, %s, %b)')
+                    for batch in batched(vector_rows, self.batch_size):
+                        cur.executemany(insert, [(chunk_id, doc_id, PgVectorBinary(vector))
+                                                 for chunk_id, doc_id, vector in batch])
+
+                now = utc_now()
+                cur.execute(
+                    'UPDATE documents SET status = %s::"IndexingStatus", "indexedAt" = %s, '
+                    '"updatedAt" = %s WHERE id = %s',
+                    ('INDEXED', now, now, document_id)
+                )
+
+        elapsed = time.perf_counter() - started
+        return {'document_id': document_id, 'rows': written, 'seconds': elapsed,
+                'rows_per_second': written / elapsed if elapsed else 0.0, 'replaced': replaced}
+
+
+class SQLiteBulkLoader:
+    """Stand-in with the same interface, writing to a SQLite file"""
+
+    def __init__(self, path: str, batch_size: int = 5000):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def find_user_id(self, email: str) -> Optional[str]:
+        # The stand-in schema has no users table
+        return None
+
+    def find_document_ids(self, document: Dict) -> List[str]:
+        """Earlier uploads of document (same codeNumber and version, else same title), newest first"""
+        if document.get('codeNumber'):
+            rows = self.conn.execute('SELECT id FROM documents WHERE codeNumber = ? AND version IS ? '
+                                     'ORDER BY createdAt DESC',
+                                     (document['codeNumber'], document.get('version'))).fetchall()
+        else:
+            rows = self.conn.execute('SELECT id FROM documents WHERE title = ? ORDER BY createdAt DESC',
+                                     (document['title'],)).fetchall()
+        return [row[0] for row in rows]
+
+    def ensure_domain(self, cur, domain: Dict) -> str:
+        cur.execute('SELECT id FROM domains WHERE id = ?', (domain['id'],))
+        if cur.fetchone() is None:
+            columns = list(domain) + ['updatedAt']
+            cur.execute(
+                f'INSERT INTO domains ({_quoted(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                list(domain.values()) + [utc_now().isoformat()]
+            )
+        return domain['id']
+
+    def load_document(self, document: Dict, chunks: Sequence[Dict], vectors: Sequence = None,
+                      domain: Dict = None, replace_id: str = None) -> Dict:
+        started = time.perf_counter()
+        document_id = str(uuid.uuid4())
+        cur = self.conn.cursor()
+        cur.execute('BEGIN')
+        try:
+            replaced = 0
+            if replace_id:
+                # SQLite leaves foreign keys unenforced by default, so no cascade
+                cur.execute('DELETE FROM chunks WHERE documentId = ?', (replace_id,))
+                cur.execute('DELETE FROM documents WHERE id = ?', (replace_id,))
+                replaced = cur.rowcount
+            if domain:
+                document = dict(document, domainId=self.ensure_domain(cur, domain))
+            row = dict(document, id=document_id, status='PROCESSING',
+                       chunkCount=len(chunks), updatedAt=utc_now().isoformat())
+            columns = [c for c in DOCUMENT_COLUMNS if c in row]
+            cur.execute(f'INSERT INTO documents ({_quoted(columns)}) '
+                        f'VALUES ({", ".join("?" * len(columns))})', [row[c] for c in columns])
+
+            insert = (f'INSERT INTO chunks ({_quoted(CHUNK_COLUMNS)}) '
+                      f'VALUES ({", ".join("?" * len(CHUNK_COLUMNS))})')
+            written = 0
+            for batch in batched(chunk_rows(chunks, document_id, vectors), self.batch_size):
+                cur.executemany(insert, batch)
+                written += len(batch)
+
+            now = utc_now().isoformat()
+            cur.execute('UPDATE documents SET status = ?, indexedAt = ?, updatedAt = ? WHERE id = ?',
+                        ('INDEXED', now, now, document_id))
+            cur.execute('COMMIT')
+        except Exception:
+            cur.execute('ROLLBACK')
+            raise
+
+        elapsed = time.perf_counter() - started
+        return {'document_id': document_id, 'rows': written, 'seconds': elapsed,
+                'rows_per_second': written / elapsed if elapsed else 0.0,
+                'replaced': replaced}
@@ -0,0 +1,340 @@
+"""
+Chunk deduplication between chunking and embedding
+Every chunk that reaches the embedder costs an API call, a row in every
+index and a slot in somebody's top-K. This stage removes the ones that
+add nothing:
+
+  furniture   running headers / footers ("IS 456 : 2000", "BUREAU OF
+              INDIAN STANDARDS") left inside chunks wherever a clause
+              crossed a page: short lines at the top or bottom of many
+              pages, or equal to the code designation, are stripped
+  toc         contents pages that triage let through (a continuation page
+              has no CONTENTS heading or dot leaders): most lines are
+              "<heading> <page>" with page numbers that only go up
+  exact       same text after whitespace / case normalization (hash)
+  near        MinHash over word shingles, LSH banding for candidates,
+              exact Jaccard >= near_threshold to confirm
+
+The first chunk of each duplicate group is kept and lists the rest under
+'duplicates' as {index, id, pages, clause / table}, as do the report
+entries: ids repeat within a code, so index (position in the input list)
+identifies the chunk. Their clause numbers and table labels are also
+merged into 'duplicate_clauses' / 'duplicate_tables', so exact clause and
+table lookups still land on the kept chunk. Table chunks are deduplicated
+but never stripped or taken for contents, and their rows are never
+furniture.
+
+  python chunk_dedup.py --input ../documents/IS_456_2000_v2.json --output v2_dedup.json
+"""
+
+import re
+import sys
+import json
+import zlib
+import hashlib
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+from chunk_io import load_chunks
+from token_splitter import count_tokens
+
+
+# Running header / footer lines
+FURNITURE_MAX_CHARS = 60
+FURNITURE_MIN_PAGES = 4
+FURNITURE_PAGE_FRACTION = 0.1
+FURNITURE_EDGE_LINES = 3
+
+# Contents chunks
+TOC_MIN_LINES = 4
+TOC_LINE_FRACTION = 0.5
+TOC_ORDERED_FRACTION = 0.8
+# "5.2 Mineral Admixtures 13": digits only in the clause number and the page
+# ("Mild 300 0.55 M 20" is a table row)
+TOC_LINE = re.compile(r'^(?:[A-Z]?\d+(?:\.\d+)*\s*)?(?=[^\d]*[A-Za-z])[^\d]{2,80}?[\s.]+(\d{1,3})$')
+
+# Near duplicates
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+LSH_BANDS = 32
+NEAR_THRESHOLD = 0.85
+MERSENNE_PRIME = (1 << 61) - 1
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize_text(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def furniture_key(line: str) -> str:
+    """'IS 456: 2000', 'IS456 : 2000' and 'is456:2000' are one header"""
+    return re.sub(r'\s+', '', line.lower())
+
+
+def is_furniture_candidate(line: str) -> bool:
+    """Short, with a digit or capital (not 'where', '=', 'or') and some substance"""
+    stripped = line.strip()
+    return (len(stripped) <= FURNITURE_MAX_CHARS
+            and sum(ch.isalnum() for ch in stripped) >= 3
+            and any(ch.isdigit() or ch.isupper() for ch in stripped))
+
+
+def page_edges(text: str, lines: int = FURNITURE_EDGE_LINES) -> List[str]:
+    """The first and last non-blank lines of a page, where running headers and footers sit"""
+    kept = [line for line in (text or '').split('\n') if line.strip()]
+    return kept if len(kept) <= 2 * lines else kept[:lines] + kept[-lines:]
+
+
+def find_furniture(chunks: List[Dict], page_lines: Dict[int, List[str]] = None) -> set:
+    """
+    Line keys repeated on many pages, plus the code designations.
+    page_lines ({page number: page_edges(text)} from extraction) counts a
+    line once per physical page it heads or foots. Without it, each
+    occurrence inside the text chunks counts as one page: a header repeats
+    once per page break, body text once (a chunk's 'pages' cannot say
+    which page a line sits on).
+    """
+    table_rows = set()
+    for chunk in chunks:
+        if chunk.get('type') == 'table':
+            # A table printed on every page repeats too, but its rows are content
+            table_rows.update(furniture_key(line.replace('|', ' ')) for line in chunk['content'].split('\n'))
+
+    pages_per_line = defaultdict(int)
+    if page_lines is not None:
+        total_pages = len(page_lines)
+        for lines in page_lines.values():
+            for key in {furniture_key(line) for line in lines if is_furniture_candidate(line)}:
+                pages_per_line[key] += 1
+    else:
+        all_pages = set()
+        for chunk in chunks:
+            if chunk.get('type') == 'table':
+                continue
+            all_pages.update(chunk.get('pages') or [chunk.get('id')])
+            # The first line is the clause heading, never furniture
+            for line in chunk['content'].split('\n')[1:]:
+                if is_furniture_candidate(line):
+                    pages_per_line[furniture_key(line)] += 1
+        total_pages = len(all_pages)
+    min_pages = max(FURNITURE_MIN_PAGES, FURNITURE_PAGE_FRACTION * total_pages)
+    furniture = {key for key, pages in pages_per_line.items()
+                 if pages >= min_pages and key not in table_rows}
+    furniture.update(furniture_key(chunk['code']) for chunk in chunks if chunk.get('code'))
+    return furniture
+
+
+def strip_furniture(text: str, furniture: set) -> Tuple[str, int]:
+    """text without furniture lines (after the heading) and the number removed"""
+    lines = text.split('\n')
+    kept = lines[:1] + [line for line in lines[1:] if furniture_key(line) not in furniture]
+    cleaned = re.sub(r'\n{3,}', '\n\n', '\n'.join(kept)).strip()
+    return cleaned, len(lines) - len(kept)
+
+
+def is_toc_chunk(text: str) -> bool:
+    """Mostly '<heading> <page>' lines whose page numbers run upward"""
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    pages = [int(match.group(1)) for match in map(TOC_LINE.match, lines) if match]
+    if len(pages) < TOC_MIN_LINES or len(pages) < TOC_LINE_FRACTION * len(lines):
+        return False
+    ordered = sum(1 for a, b in zip(pages, pages[1:]) if b >= a)
+    return ordered >= TOC_ORDERED_FRACTION * (len(pages) - 1)
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """NUM_PERM universal hashes (a*x + b mod 2^61-1) over 32-bit shingle hashes"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a < 2^29 and x < 2^32 keep a*x + b inside uint64
+        self.a = rng.integers(1, 1 << 29, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, items: set) -> 'np.ndarray':
+        if not items:
+            return np.full(len(self.a), MERSENNE_PRIME, dtype=np.uint64)
+        x = np.fromiter((zlib.crc32(item.encode('utf-8')) for item in items), dtype=np.uint64)
+        return ((self.a[:, None] * x[None, :] + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+
+def lsh_candidates(signatures: 'np.ndarray', bands: int = LSH_BANDS) -> set:
+    """Row pairs sharing at least one band of their signatures"""
+    rows = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for i, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            buckets[key].append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    return pairs
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class _Groups:
+    """Union-find over chunk positions; the earliest chunk leads its group"""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        a, b = self.find(i), self.find(j)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def chunk_ref(index: int, chunk: Dict) -> Dict:
+    """Where a removed chunk came from: input position, id, pages and clause or table"""
+    ref = {'index': index, 'id': chunk.get('id')}
+    for field in ('pages', 'clause', 'table'):
+        if chunk.get(field):
+            ref[field] = chunk[field]
+    return ref
+
+
+def dedup_chunks(chunks: List[Dict], near_threshold: Optional[float] = NEAR_THRESHOLD,
+                 strip: bool = True, drop_toc: bool = True,
+                 page_lines: Dict[int, List[str]] = None) -> Tuple[List[Dict], Dict]:
+    """
+    Chunks worth embedding, in their original order, and a report of what
+    was removed (chunks and tokens per reason). near_threshold=None skips
+    the near-duplicate pass. page_lines (ISCodeProcessorV2.page_edges)
+    locates furniture per page; see find_furniture.
+    """
+    before_tokens = sum(chunk.get('token_count') or count_tokens(chunk['content']) for chunk in chunks)
+    report = {'input_chunks': len(chunks), 'input_tokens': before_tokens,
+              'furniture_lines': 0, 'furniture_tokens': 0, 'furniture_patterns': [],
+              'toc': [], 'exact': [], 'near': []}
+
+    # 1. Page furniture
+    working = [dict(chunk) for chunk in chunks]
+    if strip:
+        furniture = find_furniture(working, page_lines)
+        report['furniture_patterns'] = sorted(furniture)
+        for chunk in working:
+            if chunk.get('type') == 'table':
+                continue
+            cleaned, removed = strip_furniture(chunk['content'], furniture)
+            if removed:
+                tokens = count_tokens(cleaned)
+                report['furniture_lines'] += removed
+                report['furniture_tokens'] += (chunk.get('token_count') or count_tokens(chunk['content'])) - tokens
+                chunk.update(content=cleaned, char_count=len(cleaned),
+                             word_count=len(cleaned.split()), token_count=tokens)
+
+    # 2. Contents pages
+    keep = [True] * len(working)
+    if drop_toc:
+        for i, chunk in enumerate(working):
+            if chunk.get('type') != 'table' and is_toc_chunk(chunk['content']):
+                keep[i] = False
+                report['toc'].append(chunk_ref(i, chunk))
+
+    # 3. Exact and 4. near duplicates among the rest
+    live = [i for i in range(len(working)) if keep[i]]
+    groups = _Groups(len(working))
+    seen = {}
+    for i in live:
+        digest = hashlib.sha256(normalize_text(working[i]['content']).encode('utf-8')).hexdigest()
+        if digest in seen:
+            groups.union(seen[digest], i)
+        else:
+            seen[digest] = i
+    exact = {i for i in live if groups.find(i) != i}
+
+    near = set()
+    if near_threshold is not None:
+        unique = [i for i in live if i not in exact]
+        sets = [shingles(working[i]['content']) for i in unique]
+        hasher = MinHasher()
+        signatures = np.stack([hasher.signature(s) for s in sets]) if sets else np.empty((0, NUM_PERM))
+        for x, y in sorted(lsh_candidates(signatures)):
+            if jaccard(sets[x], sets[y]) >= near_threshold:
+                groups.union(unique[x], unique[y])
+        near = {i for i in unique if groups.find(i) != i}
+
+    for i in sorted(exact | near):
+        keep[i] = False
+        leader = working[groups.find(i)]
+        ref = chunk_ref(i, working[i])
+        leader.setdefault('duplicates', []).append(ref)
+        for field, alias in (('clause', 'duplicate_clauses'), ('table', 'duplicate_tables')):
+            value = working[i].get(field)
+            if value and value != leader.get(field) and value not in leader.get(alias, []):
+                leader.setdefault(alias, []).append(value)
+        report['exact' if i in exact else 'near'].append(ref)
+
+    result = [chunk for chunk, kept in zip(working, keep) if kept]
+    after_tokens = sum(chunk['token_count'] if 'token_count' in chunk else count_tokens(chunk['content'])
+                       for chunk in result)
+    report.update(output_chunks=len(result), output_tokens=after_tokens,
+                  saved_chunks=len(chunks) - len(result), saved_tokens=before_tokens - after_tokens)
+    return result, report
+
+
+def print_report(report: Dict):
+    def share(part, whole):
+        return f"{part / whole:.1%}" if whole else "-"
+
+    print(f"🧹 Dedup: {report['input_chunks']} -> {report['output_chunks']} chunks, "
+          f"{report['input_tokens']:,} -> {report['output_tokens']:,} tokens")
+    print(f"  Contents chunks:  {len(report['toc'])}")
+    print(f"  Exact duplicates: {len(report['exact'])}")
+    print(f"  Near duplicates:  {len(report['near'])}")
+    print(f"  Furniture lines:  {report['furniture_lines']} ({report['furniture_tokens']:,} tokens)")
+    print(f"  Saved: {report['saved_chunks']} chunks ({share(report['saved_chunks'], report['input_chunks'])}), "
+          f"{report['saved_tokens']:,} tokens ({share(report['saved_tokens'], report['input_tokens'])})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove duplicate, contents and page-furniture chunks")
+    parser.add_argument('--input', required=True, help="Chunks (.json or .jsonl)")
+    parser.add_argument('--output', required=True, help="Deduplicated chunks (.json)")
+    parser.add_argument('--report', help="Write the full report (removed chunks per reason) here")
+    parser.add_argument('--near-threshold', type=float, default=NEAR_THRESHOLD,
+                        help="Shingle Jaccard at which chunks count as near duplicates")
+    parser.add_argument('--no-near', action='store_true', help="Exact duplicates only")
+    parser.add_argument('--keep-furniture', action='store_true', help="Do not strip header/footer lines")
+    parser.add_argument('--keep-toc', action='store_true', help="Keep contents-like chunks")
+    args = parser.parse_args()
+
+    chunks, report = dedup_chunks(load_chunks(args.input),
+                                  near_threshold=None if args.no_near else args.near_threshold,
+                                  strip=not args.keep_furniture, drop_toc=not args.keep_toc)
+    print_report(report)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(chunks, f, indent=2, ensure_ascii=False)
+    print(f"✅ Saved {len(chunks)} chunks to: {args.output}")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📋 Report: {args.report}")
@@ -0,0 +1,34 @@
+"""
+Chunk file helpers
+Chunks are stored either as one JSON array (.json) or as JSON Lines
+(.jsonl, one chunk per line) when written incrementally by the
+streaming processor.
+"""
+
+import json
+from typing import Dict, Iterable, Iterator, List
+
+
+def iter_chunks(path: str) -> Iterator[Dict]:
+    """Yield chunks from a .json array or a .jsonl file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if str(path).endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def load_chunks(path: str) -> List[Dict]:
+    return list(iter_chunks(path))
+
+
+def write_jsonl(chunks: Iterable[Dict], path: str) -> int:
+    """Write chunks one per line as they arrive; returns the count written"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk, ensure_ascii=False) + '\n')
+            count += 1
+    return count
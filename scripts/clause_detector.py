@@ -0,0 +1,57 @@
+"""
+Single-pass line classifier for IS code text
+Replaces the per-line chain of re.match calls (page marker, numbered
+clause, SECTION, ANNEX) with a first-character dispatch and one
+precompiled alternation with named groups.
+"""
+
+import re
+from typing import Optional, Tuple
+
+
+# Same three heading patterns as the original detect_clause, in one regex.
+# The alternatives start with a digit, "SECTION" or "ANNEX", so at most one
+# can match and the order of the original checks is preserved.
+HEADING_PATTERN = re.compile(
+    r'(?:'
+    r'(?P<num>\d+(?:\.\d+){0,3})\s+(?P<num_title>[A-Z][^0-9\n]{3,})'
+    r'|(?P<section>SECTION\s+\d+)\s+(?P<section_title>.+)'
+    r'|(?P<annex>ANNEX\s+[A-Z](?:-\d+)?)\s*(?P<annex_title>.*)'
+    r')$'
+)
+
+PAGE_PATTERN = re.compile(r'\[PAGE (\d+)\]')
+
+
+def detect_heading(line: str) -> Optional[Tuple[str, str, int]]:
+    """(clause_num, title, level) if the line is a clause heading, else None"""
+    line = line.strip()
+    first = line[:1]
+    # Cheap prefix check: only lines starting with a digit, S or A can match
+    if not (first == 'S' or first == 'A' or first.isdecimal()):
+        return None
+
+    match = HEADING_PATTERN.match(line)
+    if match is None:
+        return None
+
+    groups = match.groupdict()
+    if groups['num'] is not None:
+        clause_num = groups['num']
+        return (clause_num, groups['num_title'].strip(), clause_num.count('.') + 1)
+    if groups['section'] is not None:
+        return (groups['section'], groups['section_title'].strip(), 0)
+    return (groups['annex'], groups['annex_title'].strip() or "Annex", 0)
+
+
+def classify_line(line: str) -> Tuple[Optional[int], Optional[Tuple[str, str, int]]]:
+    """
+    Classify one raw line in a single pass.
+    Returns (page_number, None) for a [PAGE n] marker, (None, heading) for a
+    clause heading and (None, None) for ordinary content.
+    """
+    if line[:1] == '[':
+        match = PAGE_PATTERN.match(line)
+        if match:
+            return int(match.group(1)), None
+    return None, detect_heading(line)
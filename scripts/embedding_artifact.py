@@ -0,0 +1,80 @@
+"""
+Binary embedding artifact
+Writes chunk embeddings as a contiguous little-endian float32/float16
+.npy matrix plus a JSON metadata sidecar in the same row order:
+
+  <base>.npy        (N, dims) matrix, memory-mappable without a copy
+  <base>.meta.json  model, dims, dtype and per-row chunk metadata
+"""
+
+import sys
+import json
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+
+DTYPES = {'float32': '<f4', 'float16': '<f2'}
+
+# Chunk fields copied into the sidecar (everything except the vector)
+META_FIELDS = ('id', 'type', 'code', 'clause', 'title', 'level', 'pages', 'part', 'table',
+               'parent', 'token_count', 'duplicate_clauses', 'duplicate_tables', 'content')
+
+
+def artifact_paths(base_path: str) -> Tuple[Path, Path]:
+    """Return (matrix_path, meta_path) for an artifact base path"""
+    base = Path(base_path)
+    if base.suffix == '.npy':
+        base = base.with_suffix('')
+    return base.with_name(base.name + '.npy'), base.with_name(base.name + '.meta.json')
+
+
+def save_artifact(chunks: List[Dict], base_path: str, dtype: str = 'float32',
+                  model: str = 'text-embedding-3-small') -> Tuple[Path, Path]:
+    """Write embedded chunks as matrix + sidecar. Chunks without a vector are skipped."""
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {list(DTYPES)}, got {dtype!r}")
+
+    embedded = [chunk for chunk in chunks if chunk.get('embedding')]
+    dims = len(embedded[0]['embedding']) if embedded else 0
+
+    matrix = np.empty((len(embedded), dims), dtype=DTYPES[dtype])
+    for row, chunk in enumerate(embedded):
+        matrix[row] = chunk['embedding']
+
+    meta = {
+        'format': 1,
+        'model': model,
+        'dims': dims,
+        'dtype': dtype,
+        'count': len(embedded),
+        'chunks': [
+            {field: chunk[field] for field in META_FIELDS if field in chunk}
+            for chunk in embedded
+        ],
+    }
+
+    matrix_path, meta_path = artifact_paths(base_path)
+    np.save(matrix_path, np.ascontiguousarray(matrix))
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, separators=(',', ':'))
+    return matrix_path, meta_path
+
+
+def load_artifact(base_path: str, mmap: bool = True) -> Tuple['np.ndarray', Dict]:
+    """Load (matrix, meta). With mmap=True the matrix is a read-only memory map."""
+    matrix_path, meta_path = artifact_paths(base_path)
+    matrix = np.load(matrix_path, mmap_mode='r' if mmap else None)
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if matrix.shape != (meta['count'], meta['dims']):
+        raise ValueError(f"Artifact mismatch: matrix {matrix.shape} vs "
+                         f"meta ({meta['count']}, {meta['dims']})")
+    return matrix, meta
@@ -0,0 +1,61 @@
+"""
+Interface shared by the embedding backends
+EmbeddingEngine (OpenAI API, embedding_engine.py) and LocalEmbeddingEngine
+(CPU model, local_embedding.py) both subclass BaseEmbeddingEngine, so
+precompute, ingest and the search scripts can drive either one.
+Kept free of openai and onnxruntime imports so each backend can load
+without the other's dependencies.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+
+class BaseEmbeddingEngine(ABC):
+    """
+    model        model name, as recorded in embedding artifacts
+    dimensions   reduced output size, None for the model's full size
+    cache        optional EmbeddingCache, namespaced by cache_model
+    stats        counters (requests, inputs, tokens, retries, failed,
+                 cache_hits, cache_misses)
+    latencies    seconds per request or forward pass
+    """
+
+    model: str
+    dimensions: Optional[int]
+    cache = None
+    stats: Dict[str, int]
+    latencies: List[float]
+
+    @classmethod
+    @abstractmethod
+    def for_index(cls, model: Optional[str], dims: int, **kwargs) -> 'BaseEmbeddingEngine':
+        """Engine whose query vectors match an index built with model at dims"""
+
+    @property
+    @abstractmethod
+    def output_dims(self) -> Optional[int]:
+        """Length of the vectors embed() returns"""
+
+    @property
+    @abstractmethod
+    def cache_model(self) -> str:
+        """Cache namespace: must differ whenever cached vectors would differ"""
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts, preserving order. Failed inputs come back as None."""
+
+    @abstractmethod
+    async def embed_async(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """embed() for callers already inside an event loop"""
+
+    def _lookup(self, inputs: List[str]) -> Tuple[list, List[int]]:
+        """Cached vectors (None where missing) and the positions still to embed"""
+        if self.cache is None:
+            return [None] * len(inputs), list(range(len(inputs)))
+        results = self.cache.get_many(self.cache_model, inputs)
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        self.stats['cache_hits'] += len(results) - len(missing)
+        self.stats['cache_misses'] += len(missing)
+        return results, missing
@@ -0,0 +1,131 @@
+"""
+Persistent embedding cache
+SQLite store keyed by (model, hash of normalized content), so re-chunking
+only pays for chunks whose text actually changed.
+"""
+
+import re
+import sys
+import time
+import sqlite3
+import hashlib
+from array import array
+from pathlib import Path
+from typing import List, Optional
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / 'documents' / 'embedding_cache.sqlite'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so reflowed but otherwise identical chunks hit"""
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def content_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    packed = array('f', vector)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    unpacked = array('f')
+    unpacked.frombytes(blob)
+    if sys.byteorder != 'little':
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+class EmbeddingCache:
+    """
+    On-disk vector cache with least-recently-used eviction once the stored
+    vectors exceed max_bytes. Vectors are kept as little-endian float32.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dims INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)')
+        self.db.commit()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up texts in order; misses are None"""
+        keys = [content_key(model, text) for text in texts]
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.db.execute(
+                f'SELECT key, vector FROM embeddings WHERE key IN ({placeholders})', batch
+            )
+            found.update((key, _unpack(blob)) for key, blob in rows)
+
+        if found:
+            now = time.time()
+            self.db.executemany('UPDATE embeddings SET last_used = ? WHERE key = ?',
+                                [(now, key) for key in found])
+            self.db.commit()
+
+        results = [found.get(key) for key in keys]
+        hits = sum(1 for vector in results if vector is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, model: str, texts: List[str], vectors: List[Optional[List[float]]]):
+        """Store vectors (None entries are skipped), then evict if over budget"""
+        now = time.time()
+        rows = [
+            (content_key(model, text), model, len(vector), _pack(vector), now)
+            for text, vector in zip(texts, vectors) if vector is not None
+        ]
+        if not rows:
+            return
+        self.db.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)', rows)
+        self.db.commit()
+        self.evict()
+
+    def size_bytes(self) -> int:
+        row = self.db.execute('SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings').fetchone()
+        return row[0]
+
+    def evict(self):
+        """Drop least recently used vectors until the cache is under max_bytes"""
+        excess = self.size_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        freed = 0
+        for key, size in self.db.execute(
+                'SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used'):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.db.executemany('DELETE FROM embeddings WHERE key = ?', doomed)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
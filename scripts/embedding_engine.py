@@ -0,0 +1,271 @@
+"""
+Batched, concurrent embedding client
+Sends many inputs per request, keeps a bounded number of requests in
+flight and backs off on rate limits (429) and server errors (5xx).
+
+Requests are formed by token count: inputs are sorted longest first and
+packed up to max_batch_tokens (and batch_size inputs), so requests carry
+similar amounts of work and the long ones start first; results are put
+back in input order.
+"""
+
+import sys
+import time
+import random
+import math
+import asyncio
+from typing import List, Optional
+
+try:
+    import openai
+    from openai import AsyncOpenAI
+except ImportError:
+    print("Installing OpenAI...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "openai"])
+    import openai
+    from openai import AsyncOpenAI
+
+from embedding_base import BaseEmbeddingEngine
+from token_splitter import MAX_INPUT_TOKENS, MAX_REQUEST_TOKENS, count_tokens, token_batches, truncate_tokens
+
+
+DEFAULT_MODEL = 'text-embedding-3-small'
+
+# Tokens per request; the API accepts up to MAX_REQUEST_TOKENS
+DEFAULT_BATCH_TOKENS = 32_000
+
+# Full output size per model. The text-embedding-3 models accept a smaller
+# `dimensions`, which equals their full vector cut to that length and
+# renormalized, so reduced vectors can also be derived locally.
+MODEL_DIMENSIONS = {
+    'text-embedding-3-small': 1536,
+    'text-embedding-3-large': 3072,
+    'text-embedding-ada-002': 1536,
+}
+
+# Errors worth retrying: rate limits, 5xx, dropped connections and timeouts
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,
+)
+
+
+def reduce_dimensions(vector: List[float], dims: int) -> List[float]:
+    """First dims components, rescaled to unit length"""
+    head = vector[:dims]
+    norm = math.sqrt(sum(v * v for v in head)) or 1.0
+    return [v / norm for v in head]
+
+
+class EmbeddingEngine(BaseEmbeddingEngine):
+    """
+    Embed a list of texts with batched requests.
+
+    batch_size   inputs per request at most (the API accepts up to 2048)
+    max_batch_tokens
+                 tokens per request at most (0: only the API's MAX_REQUEST_TOKENS)
+    sort_by_length
+                 pack inputs of similar length together, longest first
+    concurrency  requests in flight at once
+    max_retries  attempts per batch after the first one
+    max_tokens   inputs longer than this are cut to it (in model tokens)
+    cache        optional EmbeddingCache consulted before calling the API
+    dimensions   output size below the model's full size (text-embedding-3)
+    truncate     derive reduced vectors locally from full ones instead of
+                 requesting `dimensions`; full vectors stay in the cache, so
+                 trying another size costs no API calls
+    """
+
+    def __init__(self, api_key: str = None, model: str = DEFAULT_MODEL,
+                 batch_size: int = 64, concurrency: int = 4, max_retries: int = 6,
+                 base_url: str = None, max_tokens: int = MAX_INPUT_TOKENS, timeout: float = 60.0,
+                 cache=None, dimensions: int = None, truncate: bool = False,
+                 max_batch_tokens: int = None, sort_by_length: bool = True):
+        self.api_key = api_key
+        self.model = model
+        self.batch_size = batch_size
+        if max_batch_tokens is None:
+            max_batch_tokens = DEFAULT_BATCH_TOKENS
+        self.max_batch_tokens = min(max_batch_tokens or MAX_REQUEST_TOKENS, MAX_REQUEST_TOKENS)
+        self.sort_by_length = sort_by_length
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_url = base_url
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.cache = cache
+        if dimensions is not None and dimensions == MODEL_DIMENSIONS.get(model):
+            dimensions = None
+        if dimensions is not None and not 0 < dimensions <= MODEL_DIMENSIONS.get(model, dimensions):
+            raise ValueError(f"{model} cannot produce {dimensions} dimensions")
+        self.dimensions = dimensions
+        self.truncate = truncate
+        self._cooldown_until = 0.0
+        self.latencies = []
+        self.stats = {'requests': 0, 'inputs': 0, 'tokens': 0, 'retries': 0, 'failed': 0,
+                      'cache_hits': 0, 'cache_misses': 0}
+
+    @classmethod
+    def for_index(cls, model: Optional[str], dims: int, **kwargs) -> 'EmbeddingEngine':
+        """Engine whose query vectors match an index built with model at dims"""
+        return cls(model=model or DEFAULT_MODEL, dimensions=dims, **kwargs)
+
+    @property
+    def output_dims(self) -> Optional[int]:
+        return self.dimensions or MODEL_DIMENSIONS.get(self.model)
+
+    @property
+    def cache_model(self) -> str:
+        """Cache namespace: vectors requested at a reduced size are not full vectors"""
+        if self.dimensions is None or self.truncate:
+            return self.model
+        return f"{self.model}:{self.dimensions}"
+
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts, preserving order. Failed inputs come back as None."""
+        return asyncio.run(self.embed_async(texts))
+
+    async def embed_async(self, texts: List[str]) -> List[Optional[List[float]]]:
+        # The API rejects empty strings and inputs over the model's token limit
+        inputs = [truncate_tokens(text, self.max_tokens) or ' ' for text in texts]
+        results, missing = self._lookup(inputs)
+        fresh = await self._embed_all([inputs[i] for i in missing])
+        for i, vector in zip(missing, fresh):
+            results[i] = vector
+        if self.cache is not None:
+            self.cache.put_many(self.cache_model, [inputs[i] for i in missing], fresh)
+
+        if self.dimensions is not None and self.truncate:
+            results = [None if vector is None else reduce_dimensions(vector, self.dimensions)
+                       for vector in results]
+        return results
+
+    async def _embed_all(self, inputs: List[str]) -> List[Optional[List[float]]]:
+        results: List[Optional[List[float]]] = [None] * len(inputs)
+        if not inputs:
+            return results
+
+        lengths = [count_tokens(text) for text in inputs]
+        batches = token_batches(lengths, self.batch_size, self.max_batch_tokens, sort=self.sort_by_length)
+        total_batches = len(batches)
+        done = 0
+
+        client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                             max_retries=0, timeout=self.timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch: List[int]):
+            nonlocal done
+            async with semaphore:
+                vectors = await self._embed_batch(client, [inputs[i] for i in batch])
+            for i, vector in zip(batch, vectors):
+                results[i] = vector
+            if vectors[0] is not None:
+                self.stats['tokens'] += sum(lengths[i] for i in batch)
+            done += 1
+            if done % 10 == 0 or done == total_batches:
+                print(f"  Batch {done}/{total_batches}...")
+
+        try:
+            await asyncio.gather(*(run(batch) for batch in batches))
+        finally:
+            await client.close()
+
+        return results
+
+    async def _embed_batch(self, client: AsyncOpenAI, batch: List[str]) -> List[Optional[List[float]]]:
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_cooldown()
+            started = time.perf_counter()
+            try:
+                response = await client.embeddings.create(model=self.model, input=batch,
+                                                          **self._request_options())
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    print(f"    ⚠️  Giving up on batch of {len(batch)}: {e}")
+                    break
+                delay = self._backoff_delay(attempt, e)
+                if isinstance(e, openai.RateLimitError):
+                    # Pause every worker, not just this one
+                    loop_time = asyncio.get_running_loop().time()
+                    self._cooldown_until = max(self._cooldown_until, loop_time + delay)
+                self.stats['retries'] += 1
+                await asyncio.sleep(delay)
+                continue
+            except openai.APIError as e:
+                print(f"    ⚠️  Error on batch of {len(batch)}: {e}")
+                break
+
+            self.latencies.append(time.perf_counter() - started)
+            self.stats['requests'] += 1
+            self.stats['inputs'] += len(batch)
+            ordered = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in ordered]
+
+        self.stats['failed'] += len(batch)
+        return [None] * len(batch)
+
+    def _request_options(self) -> dict:
+        if self.dimensions is None or self.truncate:
+            return {}
+        return {'dimensions': self.dimensions}
+
+    async def _wait_for_cooldown(self):
+        delay = self._cooldown_until - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Honour Retry-After when present, otherwise exponential backoff with jitter"""
+        response = getattr(error, 'response', None)
+        if response is not None:
+            retry_after = response.headers.get('retry-after')
+            try:
+                if retry_after is not None:
+                    return float(retry_after)
+            except ValueError:
+                pass
+        return min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random() / 2)
+
+
+BACKENDS = ('openai', 'local')
+
+
+def create_engine(backend: str = 'openai', model: str = None, threads: int = None,
+                  runtime: str = 'onnx', api_key: str = None, concurrency: int = 4,
+                  truncate: bool = False, **kwargs) -> BaseEmbeddingEngine:
+    """
+    EmbeddingEngine ('openai') or LocalEmbeddingEngine ('local', see
+    local_embedding.py). batch_size, cache and dimensions go to either;
+    threads and runtime only matter locally, api_key, concurrency and
+    truncate only for the API (local reductions are always truncations).
+    """
+    if backend == 'local':
+        from local_embedding import LocalEmbeddingEngine, DEFAULT_LOCAL_MODEL
+        return LocalEmbeddingEngine(model=model or DEFAULT_LOCAL_MODEL, runtime=runtime,
+                                    threads=threads, **kwargs)
+    if backend != 'openai':
+        raise ValueError(f"Unknown embedding backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+    return EmbeddingEngine(api_key=api_key, model=model or DEFAULT_MODEL, concurrency=concurrency,
+                           truncate=truncate, **kwargs)
+
+
+def engine_for_index(model: Optional[str], dims: int, **kwargs) -> BaseEmbeddingEngine:
+    """Query engine for an index: models the API does not serve are local ones"""
+    if model is None or model in MODEL_DIMENSIONS:
+        return EmbeddingEngine.for_index(model, dims, **kwargs)
+    from local_embedding import LocalEmbeddingEngine
+    return LocalEmbeddingEngine.for_index(model, dims, **kwargs)
+
+
+def add_backend_arguments(parser):
+    """--backend / --model / --threads / --runtime for scripts that embed"""
+    parser.add_argument('--backend', choices=BACKENDS, default='openai',
+                        help="openai: embeddings API; local: CPU model, no key or network needed")
+    parser.add_argument('--model', help=f"Embedding model (default {DEFAULT_MODEL}, "
+                                        f"or BAAI/bge-small-en-v1.5 with --backend local)")
+    parser.add_argument('--threads', type=int, help="CPU threads for --backend local (default: all cores)")
+    parser.add_argument('--runtime', choices=('onnx', 'sentence-transformers'), default='onnx',
+                        help="Inference runtime for --backend local")
@@ -0,0 +1,134 @@
+"""
+Evaluate reduced embedding sizes on the held-out IS 456 question set
+text-embedding-3 vectors requested with `dimensions=d` equal the full
+vector cut to d and renormalized, so one full-size artifact and one
+full-size embedding per question cover the whole sweep. For each size:
+
+  recall@k     questions with an expected clause (or a sub-clause of it)
+               among the top k results
+  overlap@k    share of the full-size top k that the reduced search keeps
+  size         .npy matrix and JSON embedding bytes for the artifact
+  latency      ms per query over the artifact and over --latency-rows
+               random vectors of that size
+
+The smallest size whose recall@k is within --tolerance of the full size
+is suggested; rebuild with precompute --dimensions <d> (add --truncate to
+reuse cached full vectors).
+
+  python eval_dimensions.py --artifact ../documents/IS_456_2000_v2_with_embeddings
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from embedding_artifact import load_artifact
+from vector_search import normalize_rows, select_top_k
+
+DEFAULT_QUESTIONS = Path(__file__).resolve().parent.parent / 'documents' / 'IS_456_eval_questions.jsonl'
+MB = 1024 * 1024
+
+
+def load_questions(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def clause_hit(clause: str, expected) -> bool:
+    return bool(clause) and any(clause == e or clause.startswith(e + '.') for e in expected)
+
+
+def per_query_ms(matrix: 'np.ndarray', queries: 'np.ndarray', top_k: int, repeats: int = 3) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for q in queries:
+            select_top_k(matrix @ q, top_k)
+        elapsed = (time.perf_counter() - start) / len(queries) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep reduced embedding sizes on held-out questions")
+    parser.add_argument('--artifact', required=True, help="Full-size artifact base path (without .npy)")
+    parser.add_argument('--questions', default=str(DEFAULT_QUESTIONS),
+                        help="JSON Lines of {question, clauses}")
+    parser.add_argument('--dims', type=int, nargs='+', default=[256, 512, 1024, 1536])
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.02,
+                        help="Recall@k a smaller size may lose and still be suggested")
+    parser.add_argument('--latency-rows', type=int, default=100_000,
+                        help="Rows of the synthetic matrix for latency at scale (0 to skip)")
+    args = parser.parse_args()
+
+    from embedding_engine import engine_for_index
+    from embedding_cache import EmbeddingCache, DEFAULT_CACHE_PATH
+
+    matrix, meta = load_artifact(args.artifact)
+    chunks = meta['chunks']
+    full = matrix.shape[1]
+    sizes = sorted(d for d in set(args.dims) if d <= full)
+    if full not in sizes:
+        sizes.append(full)
+    questions = load_questions(args.questions)
+
+    # One full-size embedding per question (cached across runs)
+    cache = EmbeddingCache(DEFAULT_CACHE_PATH)
+    engine = engine_for_index(meta.get('model'), full, cache=cache)
+    vectors = engine.embed([q['question'] for q in questions])
+    cache.close()
+    if any(v is None for v in vectors):
+        print("❌ Question embedding failed")
+        sys.exit(1)
+    query_full = np.asarray(vectors, dtype=np.float32)
+
+    print(f"\n{'='*60}")
+    print("Embedding Size Sweep")
+    print(f"{meta.get('model')}: {len(chunks)} chunks x {full} dims, {len(questions)} questions, "
+          f"top_k={args.top_k}")
+    print(f"{'='*60}\n")
+    print(f"  {'dims':>6}{'recall@k':>10}{'overlap@k':>11}{'npy MB':>9}{'JSON MB':>9}"
+          f"{'ms/query':>10}{f'ms @{args.latency_rows // 1000}k':>11}")
+
+    rng = np.random.default_rng(0)
+    full_top = None
+    rows = []
+    for dims in sorted(sizes, reverse=True):
+        reduced = normalize_rows(np.asarray(matrix[:, :dims], dtype=np.float32))
+        queries = normalize_rows(query_full[:, :dims])
+        top, _ = select_top_k(queries @ reduced.T, args.top_k)
+        if full_top is None:
+            full_top = top
+        recall = np.mean([
+            any(clause_hit(chunks[row].get('clause'), q['clauses']) for row in found.tolist())
+            for q, found in zip(questions, top)
+        ])
+        overlap = np.mean([len(set(a.tolist()) & set(b.tolist())) / args.top_k for a, b in zip(top, full_top)])
+
+        npy_bytes = reduced.nbytes
+        json_bytes = len(json.dumps([[round(float(v), 8) for v in row] for row in reduced[:50].tolist()],
+                                    separators=(',', ':'))) * len(reduced) / min(50, len(reduced))
+        ms = per_query_ms(reduced, queries, args.top_k)
+        scale_ms = '-'
+        if args.latency_rows:
+            synthetic = normalize_rows(rng.standard_normal((args.latency_rows, dims), dtype=np.float32))
+            scale_ms = f"{per_query_ms(synthetic, queries[:20], args.top_k, repeats=1):.2f}"
+            del synthetic
+        rows.append((dims, recall))
+        print(f"  {dims:>6}{recall:>10.3f}{overlap:>11.3f}{npy_bytes / MB:>9.2f}{json_bytes / MB:>9.2f}"
+              f"{ms:>10.3f}{scale_ms:>11}")
+
+    full_recall = rows[0][1]
+    suggested = min(dims for dims, recall in rows if recall >= full_recall - args.tolerance)
+    print(f"\n  Suggested: {suggested} dims (recall@{args.top_k} within {args.tolerance:.2f} of {full})")
+    print(f"  Rebuild:   python precompute_embeddings.py --dimensions {suggested} --truncate ...")
+    print(f"\n{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
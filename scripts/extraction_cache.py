@@ -0,0 +1,167 @@
+"""
+Persistent pdfplumber extraction cache
+Per-page text, tables and word boxes are stored in SQLite as
+zlib-compressed compact JSON, keyed by (PDF sha256, page index, kind).
+The PDF is only opened with pdfplumber when something is missing, so
+re-running analysis or chunking on an unchanged PDF skips parsing.
+
+  with ExtractionCache(pdf_path) as doc:
+      for i in range(doc.page_count):
+          text = doc.extract_text(i)
+"""
+
+import sys
+import json
+import zlib
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import pdfplumber
+except ImportError:
+    print("Installing pdfplumber...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "pdfplumber"])
+    import pdfplumber
+
+
+DEFAULT_EXTRACTION_CACHE = Path(__file__).parent.parent / 'documents' / 'extraction_cache.sqlite'
+
+# Page index used for document-level entries (page count, metadata)
+DOCUMENT = -1
+
+COMMIT_EVERY = 50
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':'),
+                                    default=str).encode('utf-8'))
+
+
+def _decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+class ExtractionCache:
+    """
+    Read-through cache in front of pdfplumber for one PDF.
+    cache_path=None disables persistence (every call goes to pdfplumber).
+    pdf_hash skips hashing the file when the caller already has its sha256
+    (worker processes opening the same PDF).
+    """
+
+    def __init__(self, pdf_path: str, cache_path: Optional[str] = DEFAULT_EXTRACTION_CACHE,
+                 pdf_hash: str = None):
+        self.pdf_path = str(pdf_path)
+        self.hits = 0
+        self.misses = 0
+        self._pdf = None
+        self._last_page = None
+        self._pending_writes = 0
+        self.db = None
+        self.pdf_hash = pdf_hash
+        if cache_path is not None:
+            self.pdf_hash = pdf_hash or file_sha256(self.pdf_path)
+            self.db = sqlite3.connect(str(cache_path), timeout=30)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('''
+                CREATE TABLE IF NOT EXISTS extraction (
+                    pdf_hash TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (pdf_hash, page, kind)
+                )
+            ''')
+            self.db.commit()
+
+    def __enter__(self) -> 'ExtractionCache':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def commit(self):
+        """Write pending entries so other processes sharing the cache are not blocked"""
+        if self.db is not None:
+            self.db.commit()
+            self._pending_writes = 0
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self.db is not None:
+            self.commit()
+            self.db.close()
+            self.db = None
+
+    @property
+    def pdf(self):
+        """The underlying pdfplumber document, opened on first miss"""
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.pdf_path)
+        return self._pdf
+
+    def _page(self, index: int):
+        # Drop pdfplumber's parsed objects for the previous page once we move on
+        if self._last_page is not None and self._last_page != index:
+            self.pdf.pages[self._last_page].flush_cache()
+        self._last_page = index
+        return self.pdf.pages[index]
+
+    def _cached(self, page: int, kind: str, compute):
+        if self.db is not None:
+            row = self.db.execute(
+                'SELECT data FROM extraction WHERE pdf_hash = ? AND page = ? AND kind = ?',
+                (self.pdf_hash, page, kind)
+            ).fetchone()
+            if row is not None:
+                self.hits += 1
+                return _decode(row[0])
+
+        self.misses += 1
+        value = compute()
+        if self.db is not None:
+            self.db.execute('INSERT OR REPLACE INTO extraction VALUES (?, ?, ?, ?)',
+                            (self.pdf_hash, page, kind, _encode(value)))
+            self._pending_writes += 1
+            if self._pending_writes >= COMMIT_EVERY:
+                self.commit()
+        return value
+
+    @property
+    def page_count(self) -> int:
+        return self._cached(DOCUMENT, 'page_count', lambda: len(self.pdf.pages))
+
+    @property
+    def metadata(self) -> Dict:
+        # Round-trip so a miss returns the same JSON-safe values as a hit
+        return self._cached(DOCUMENT, 'metadata', lambda: _decode(_encode(self.pdf.metadata)))
+
+    def extract_text(self, index: int) -> Optional[str]:
+        return self._cached(index, 'text', lambda: self._page(index).extract_text())
+
+    def extract_tables(self, index: int) -> List[List[List[Optional[str]]]]:
+        return self._cached(index, 'tables', lambda: self._page(index).extract_tables())
+
+    def extract_words(self, index: int) -> List[Dict]:
+        return self._cached(index, 'words', lambda: self._page(index).extract_words())
+
+    def extract(self, index: int, kind: str, compute: Callable) -> Any:
+        """
+        Cache compute(pdfplumber_page) under kind, for derived extractions
+        defined elsewhere. Version the kind (e.g. 'table_regions/1') when compute changes.
+        """
+        # Round-trip so a miss returns the same JSON-safe values as a hit
+        return self._cached(index, kind, lambda: _decode(_encode(compute(self._page(index)))))
@@ -0,0 +1,164 @@
+"""
+Local stand-in for the OpenAI embeddings endpoint
+Serves POST /v1/embeddings with deterministic vectors so the precompute
+pipeline can be exercised and benchmarked offline.
+
+Latency and failures can be injected:
+  --latency-ms       fixed delay per request
+  --per-input-ms     extra delay per input in the request
+  --per-1k-tokens-ms extra delay per 1000 input tokens (words), so long
+                     requests take longer, as on the real endpoint
+  --error-rate       fraction of requests answered with 429 / 500
+"""
+
+import sys
+import json
+import time
+import math
+import random
+import struct
+import base64
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+def fake_embedding(text: str, dimensions: int = 1536) -> List[float]:
+    """Deterministic unit vector derived from the text's hash"""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    """HTTP server holding the injection settings and request counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms: float = 0.0, per_input_ms: float = 0.0,
+                 error_rate: float = 0.0, dimensions: int = 1536, seed: int = 0,
+                 per_1k_tokens_ms: float = 0.0):
+        super().__init__(address, _EmbeddingHandler)
+        self.latency_ms = latency_ms
+        self.per_input_ms = per_input_ms
+        self.per_1k_tokens_ms = per_1k_tokens_ms
+        self.error_rate = error_rate
+        self.dimensions = dimensions
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'inputs': 0, 'errors_429': 0, 'errors_500': 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'FakeEmbeddingServer':
+        """Serve in a background thread (for tests and benchmarks)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _EmbeddingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server: FakeEmbeddingServer = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        if not self.path.rstrip('/').endswith('/embeddings'):
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+
+        inputs = request.get('input', [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        tokens = sum(len(text.split()) for text in inputs)
+        with server.lock:
+            server.stats['requests'] += 1
+            roll = server.rng.random()
+
+        time.sleep((server.latency_ms + server.per_input_ms * len(inputs)
+                    + server.per_1k_tokens_ms * tokens / 1000) / 1000)
+
+        # Inject failures: half rate limits, half server errors
+        if roll < server.error_rate / 2:
+            with server.lock:
+                server.stats['errors_429'] += 1
+            self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                            headers={'Retry-After': '0.05'})
+            return
+        if roll < server.error_rate:
+            with server.lock:
+                server.stats['errors_500'] += 1
+            self._send_json(500, {'error': {'message': 'Injected server error', 'type': 'server_error'}})
+            return
+
+        # Like text-embedding-3: a reduced size is the full vector cut and renormalized
+        dimensions = request.get('dimensions') or server.dimensions
+        encoding = request.get('encoding_format', 'float')
+        data = []
+        for index, text in enumerate(inputs):
+            vector = fake_embedding(text, server.dimensions)
+            if dimensions < len(vector):
+                norm = math.sqrt(sum(v * v for v in vector[:dimensions])) or 1.0
+                vector = [v / norm for v in vector[:dimensions]]
+            if encoding == 'base64':
+                vector = base64.b64encode(struct.pack(f'<{len(vector)}f', *vector)).decode('ascii')
+            data.append({'object': 'embedding', 'index': index, 'embedding': vector})
+
+        with server.lock:
+            server.stats['inputs'] += len(inputs)
+
+        self._send_json(200, {
+            'object': 'list',
+            'data': data,
+            'model': request.get('model', 'text-embedding-3-small'),
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+        })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI embeddings server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=200.0)
+    parser.add_argument('--per-input-ms', type=float, default=2.0)
+    parser.add_argument('--per-1k-tokens-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--dimensions', type=int, default=1536)
+    args = parser.parse_args()
+
+    server = FakeEmbeddingServer((args.host, args.port), args.latency_ms, args.per_input_ms,
+                                 args.error_rate, args.dimensions, per_1k_tokens_ms=args.per_1k_tokens_ms)
+    print(f"🧪 Fake embeddings server on {server.base_url}")
+    print(f"   Use: OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=test")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        sys.exit(0)
@@ -0,0 +1,189 @@
+"""
+Hybrid retrieval: exact references, BM25 and vectors
+  1. Explicit clause / table / annex references ("clause 26.4.2",
+     "Table 16 nominal cover", "Annex B"), or a query that is nothing but
+     clause numbers ("26.4.2"), are looked up in the artifact's reference
+     map and answered directly, without embedding the query. A clause
+     reference also returns its sub-clauses, in order.
+  2. Anything else is embedded once, and the cosine similarities are fused
+     with BM25 over all rows:  alpha * cosine + (1 - alpha) * bm25 / max(bm25)
+     A bare dotted number that is a clause in the map ("requirements of
+     5.2") counts as a full lexical match for that clause's rows, so they
+     are ranked rather than forced to the top. Other numbers ("0.45 fck",
+     "2.5 m") are ordinary query text.
+
+Needs the lexical artifacts beside the embedding artifact (built by the
+precompute scripts and ingest.py, or here with --build).
+
+  python hybrid_search.py --artifact ../documents/IS_456_2000_v2_with_embeddings "clause 26.4.2" "cover to slabs"
+"""
+
+import re
+import argparse
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from lexical_index import BM25Index, build_lexical_index, lexical_paths, load_lexical_index, table_key
+from vector_search import VectorIndex, format_citation, normalize_rows, select_top_k
+
+
+REFERENCE_PATTERN = re.compile(
+    r'\b(?P<table>table\s*\d+[a-z]?)\b'
+    r'|\b(?P<annex>annex\s+[a-z](?:-\d+)?)\b'
+    r'|(?:\b(?:clause|cl\.?|sub-clause|section)\s*)(?P<clause>\d+(?:\.\d+)*)'
+    r'|(?<![\d.])(?P<number>\d+(?:\.\d+)+)(?![\d.])',
+    re.I,
+)
+
+DEFAULT_ALPHA = 0.6
+
+
+def parse_references(query: str, clauses: Dict = None) -> List[tuple]:
+    """
+    [('table', 'table 16', True), ('clause', '26.4.2', False), ...] in query
+    order; the flag marks explicit references (table / annex / clause
+    keyword). A bare dotted number is only a reference when it is a key of
+    clauses (none without it).
+    """
+    references = []
+    for match in REFERENCE_PATTERN.finditer(query):
+        if match.group('table'):
+            references.append(('table', table_key(match.group('table')), True))
+        elif match.group('annex'):
+            references.append(('clause', ' '.join(match.group('annex').upper().split()), True))
+        elif match.group('clause'):
+            references.append(('clause', match.group('clause'), True))
+        elif clauses is not None and match.group('number') in clauses:
+            references.append(('clause', match.group('number'), False))
+    return references
+
+
+def only_references(query: str) -> bool:
+    """Nothing but references and punctuation ("26.4.2", "clause 5.2?")"""
+    return not re.search(r'\w', REFERENCE_PATTERN.sub(' ', query))
+
+
+class HybridRetriever:
+    """
+    vector_index  VectorIndex over the artifact
+    bm25          BM25Index with the same rows
+    references    {'clauses': {...}, 'tables': {...}} from lexical_index.reference_map
+    embed         query -> vector; only called when no reference resolves
+    alpha         weight of the cosine score in the fusion
+    """
+
+    def __init__(self, vector_index: VectorIndex, bm25: BM25Index, references: Dict,
+                 embed: Callable[[str], Optional[List[float]]] = None, alpha: float = DEFAULT_ALPHA):
+        if len(bm25) != len(vector_index):
+            raise ValueError(f"BM25 index has {len(bm25)} rows, vector index {len(vector_index)}")
+        self.vector_index = vector_index
+        self.bm25 = bm25
+        self.clauses = references['clauses']
+        self.tables = references['tables']
+        self.embed = embed or self._embed_with_engine
+        self.alpha = alpha
+        self._engine = None
+        self.stats = {'direct': 0, 'fused': 0, 'embedding_calls': 0}
+
+    @classmethod
+    def from_artifact(cls, base_path: str, **kwargs) -> 'HybridRetriever':
+        vector_index = VectorIndex.from_artifact(base_path)
+        bm25, references = load_lexical_index(base_path)
+        return cls(vector_index, bm25, references, **kwargs)
+
+    def _embed_with_engine(self, query: str):
+        if self._engine is None:
+            from embedding_engine import engine_for_index
+            self._engine = engine_for_index(self.vector_index.model, self.vector_index.dims)
+        return self._engine.embed([query])[0]
+
+    def resolve(self, query: str, references: List[tuple] = None) -> List[int]:
+        """Rows for the references in query: exact matches first, then sub-clauses"""
+        if references is None:
+            references = parse_references(query, self.clauses)
+        rows = []
+        for kind, key, _ in references:
+            if kind == 'table':
+                rows += self.tables.get(key, [])
+                continue
+            rows += self.clauses.get(key, [])
+            prefix = key + '.'
+            children = sorted((clause for clause in self.clauses if clause.startswith(prefix)),
+                              key=lambda clause: [int(part) for part in clause.split('.') if part.isdigit()])
+            for clause in children:
+                rows += self.clauses[clause]
+        seen = set()
+        return [row for row in rows if not (row in seen or seen.add(row))]
+
+    def fused_scores(self, query: str, vector, matched: List[int] = ()) -> 'np.ndarray':
+        """Fusion score per row; matched rows (bare clause numbers) get the full lexical score"""
+        cosine = self.vector_index.matrix @ normalize_rows(np.asarray(vector, dtype=np.float32))
+        lexical = self.bm25.scores(query)
+        top = lexical.max() if len(lexical) else 0.0
+        lexical = lexical / top if top > 0 else np.zeros_like(cosine)
+        if len(matched):
+            lexical[list(matched)] = 1.0
+        elif top <= 0:
+            return cosine
+        return self.alpha * cosine + (1.0 - self.alpha) * lexical
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+        """Results shaped like VectorIndex.search, plus 'match' ('reference' or 'hybrid')"""
+        chunks = self.vector_index.chunks
+        references = parse_references(query, self.clauses)
+        # A bare clause number answers directly only when it is the whole query
+        direct = references if only_references(query) else [ref for ref in references if ref[2]]
+        rows = self.resolve(query, direct)
+        if rows:
+            self.stats['direct'] += 1
+            return [
+                {'chunk': chunks[row], 'similarity': 1.0, 'citation': format_citation(chunks[row]),
+                 'match': 'reference'}
+                for row in rows[:top_k]
+            ]
+
+        # Bare clause numbers inside other text: ranked with the rest
+        matched = [row for kind, key, explicit in references if not explicit
+                   for row in self.clauses[key]]
+        self.stats['fused'] += 1
+        self.stats['embedding_calls'] += 1
+        vector = self.embed(query)
+        if vector is None:
+            # Embedding failed: lexical scores alone
+            scores = self.bm25.scores(query)
+            if matched:
+                scores[matched] = max(scores.max(), 1.0)
+        else:
+            scores = self.fused_scores(query, vector, matched)
+        best, best_scores = select_top_k(scores, top_k)
+        return [
+            {'chunk': chunks[row], 'similarity': float(score), 'citation': format_citation(chunks[row]),
+             'match': 'reference' if row in matched else 'hybrid'}
+            for row, score in zip(best.tolist(), best_scores.tolist())
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hybrid (reference + BM25 + vector) search over an artifact")
+    parser.add_argument('--artifact', required=True, help="Artifact base path (without .npy)")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help="Cosine weight in the fusion")
+    parser.add_argument('--build', action='store_true', help="(Re)build the lexical artifacts first")
+    parser.add_argument('queries', nargs='+')
+    args = parser.parse_args()
+
+    if args.build or not all(path.exists() for path in lexical_paths(args.artifact)):
+        bm25_path, refs_path = build_lexical_index(args.artifact)
+        print(f"💾 Built {bm25_path.name} and {refs_path.name}")
+
+    retriever = HybridRetriever.from_artifact(args.artifact, alpha=args.alpha)
+    print(f"✅ Loaded {len(retriever.vector_index)} chunks, {len(retriever.bm25.vocabulary):,} terms, "
+          f"{len(retriever.clauses)} clauses, {len(retriever.tables)} tables\n")
+
+    for query in args.queries:
+        print(f"🔍 {query}")
+        for result in retriever.search(query, args.top_k):
+            print(f"  {result['similarity']:.3f}  [{result['match']}]  {result['citation']}")
+        print()
+    print(f"  Direct answers: {retriever.stats['direct']}, embedding calls: {retriever.stats['embedding_calls']}")
@@ -0,0 +1,235 @@
+"""
+Incremental re-ingestion for ISCodeProcessorV2
+Keeps a page-level manifest next to the chunks output:
+
+  pages   per page: sha256 of the raw content streams (plus XObject
+          streams), the page_triage class, sha256 of the extracted
+          text, the text itself and the table regions found on it
+  chunks  per chunk key: sha256 of the chunk record
+
+On re-run only pages whose content hash changed are re-extracted, through
+the processor's own per-page path (extraction cache and worker pool); the
+rest reuse the stored text and table regions. Chunks, table chunks
+included, are rebuilt from them exactly as a full run builds them (no PDF
+work) and diffed against the previous run, producing a delta of added,
+removed and changed chunks (<output>.delta.json) that downstream loaders
+(and the embedding cache) can apply instead of reprocessing the whole code.
+"""
+
+import json
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from pdfminer.pdftypes import resolve1, PDFStream
+
+from extraction_cache import ExtractionCache
+from page_triage import EXTRACT_TEXT, TriageReport
+
+
+# 2: pages are selected by page_triage instead of skipping the first 3
+# 3: table regions are kept per page
+# 4: cover pages with clause headings are kept (page classes may differ)
+MANIFEST_VERSION = 4
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def page_content_hash(page) -> str:
+    """Hash a pdfplumber page's raw content streams without any layout analysis"""
+    digest = hashlib.sha256()
+    page_obj = page.page_obj
+    for stream in page_obj.contents:
+        stream = resolve1(stream)
+        if isinstance(stream, PDFStream):
+            digest.update(stream.get_data())
+
+    # Text can also live in form XObjects referenced from the page
+    xobjects = resolve1((page_obj.resources or {}).get('XObject')) or {}
+    for name in sorted(xobjects):
+        xobject = resolve1(xobjects[name])
+        if isinstance(xobject, PDFStream):
+            digest.update(name.encode('utf-8'))
+            digest.update(xobject.get_data())
+    return digest.hexdigest()
+
+
+def chunk_keys(chunks: List[Dict]) -> List[str]:
+    """
+    Unique key per chunk. Ids repeat (e.g. several 'intro' or clause '1'
+    chunks), so the n-th repeat of an id gets a '~n' suffix.
+    """
+    seen = {}
+    keys = []
+    for chunk in chunks:
+        count = seen.get(chunk['id'], 0) + 1
+        seen[chunk['id']] = count
+        keys.append(chunk['id'] if count == 1 else f"{chunk['id']}~{count}")
+    return keys
+
+
+def chunk_hash(chunk: Dict) -> str:
+    return _sha256(json.dumps(chunk, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+
+def manifest_path_for(output_path: str) -> Path:
+    return Path(output_path).with_suffix('.manifest.json')
+
+
+def delta_path_for(output_path: str) -> Path:
+    return Path(output_path).with_suffix('.delta.json')
+
+
+def load_manifest(path: Path) -> Dict:
+    if not path.exists():
+        return {'version': MANIFEST_VERSION, 'pages': {}, 'chunks': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        print(f"⚠️  Manifest version mismatch, rebuilding: {path}")
+        return {'version': MANIFEST_VERSION, 'pages': {}, 'chunks': {}}
+    return manifest
+
+
+def collect_pages(processor, manifest: Dict) -> Tuple[List[Tuple[int, str]], Dict, List[int]]:
+    """
+    Return (pages, page_manifest, extracted_page_numbers). pages holds the
+    text and table pages; unchanged pages reuse the manifest class, text and
+    table regions, only changed or new pages go through
+    processor.extract_pages (triage, text and table regions, cached and
+    parallel like a full run). Regions are handed to
+    processor.table_regions for iter_tables().
+    """
+    previous = manifest.get('pages', {})
+    pages = []
+    page_manifest = {}
+    processor.triage = TriageReport()
+
+    with ExtractionCache(processor.pdf_path, processor.extraction_cache) as doc:
+        total_pages = doc.page_count
+        print(f"📄 Fingerprinting {total_pages} pages...\n")
+        hashes = []
+        for page in doc.pdf.pages:
+            hashes.append(page_content_hash(page))
+            page.flush_cache()
+
+        changed = [index for index, content_hash in enumerate(hashes)
+                   if previous.get(str(index + 1), {}).get('content_hash') != content_hash]
+        results = {result[0]: result for result in processor.extract_pages(doc, changed)}
+
+        for i, content_hash in enumerate(hashes, start=1):
+            if i in results:
+                _, page_class, text, regions, triage_seconds, extract_seconds = results[i]
+                processor.triage.add(page_class, triage_seconds, extract_seconds)
+            else:
+                entry = previous[str(i)]
+                page_class, text, regions = entry['class'], entry['text'], entry['regions']
+                processor.triage.add(page_class, 0.0)
+
+            if page_class in EXTRACT_TEXT:
+                pages.append((i, text))
+            if regions:
+                processor.table_regions[i] = regions
+            page_manifest[str(i)] = {
+                'content_hash': content_hash,
+                'class': page_class,
+                'text_hash': _sha256((text or '').encode('utf-8')),
+                'text': text,
+                'regions': regions,
+            }
+
+    return pages, page_manifest, [index + 1 for index in changed]
+
+
+def diff_chunks(previous: Dict[str, str], chunks: List[Dict]) -> Dict:
+    """Compare keyed chunk hashes against the previous run"""
+    keys = chunk_keys(chunks)
+    current = {}
+    added, changed = [], []
+    for key, chunk in zip(keys, chunks):
+        digest = chunk_hash(chunk)
+        current[key] = digest
+        if key not in previous:
+            added.append(dict(chunk, key=key))
+        elif previous[key] != digest:
+            changed.append(dict(chunk, key=key))
+
+    removed = [key for key in previous if key not in current]
+    return {
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'unchanged': len(chunks) - len(added) - len(changed),
+        'hashes': current,
+    }
+
+
+def process_incremental(processor, output_path: str) -> Dict:
+    """
+    Re-ingest processor.pdf_path against the manifest beside output_path.
+    Writes the full chunks JSON, <output>.delta.json and the new manifest.
+    """
+    manifest_path = manifest_path_for(output_path)
+    manifest = load_manifest(manifest_path)
+
+    print(f"\n{'='*60}")
+    print(f"Processing IS Code (V2 - Incremental)")
+    print(f"Code: {processor.code_number}")
+    print(f"File: {processor.pdf_path}")
+    print(f"{'='*60}\n")
+
+    metrics = processor.metrics
+    with metrics.stage('extract') as stage:
+        pages, page_manifest, extracted = collect_pages(processor, manifest)
+        stage.items = len(page_manifest)
+    metrics.count('pages_reused', len(page_manifest) - len(extracted))
+    print(f"  Re-read {len(extracted)} of {len(page_manifest)} pages "
+          f"({len(page_manifest) - len(extracted)} reused from manifest, "
+          f"{len(page_manifest) - len(pages)} skipped by triage)")
+
+    with metrics.stage('chunk') as stage:
+        lines = processor.iter_lines(processor.iter_tables(pages))
+        chunks = list(processor.iter_split(processor.iter_chunks(lines)))
+        # Table chunks after the text, as in the full run
+        chunks += processor.table_chunks
+        stage.items = len(chunks)
+    delta = diff_chunks(manifest.get('chunks', {}), chunks)
+
+    processor.chunks = chunks
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(chunks, f, indent=2, ensure_ascii=False)
+
+    delta_path = delta_path_for(output_path)
+    with open(delta_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'code': processor.code_number,
+            'pdf': str(processor.pdf_path),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'extracted_pages': extracted,
+            'added': delta['added'],
+            'changed': delta['changed'],
+            'removed': delta['removed'],
+            'unchanged': delta['unchanged'],
+        }, f, indent=2, ensure_ascii=False)
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': MANIFEST_VERSION,
+            'code': processor.code_number,
+            'pdf': str(processor.pdf_path),
+            'pages': page_manifest,
+            'chunks': delta['hashes'],
+        }, f, ensure_ascii=False)
+
+    print(f"\n📊 Delta:")
+    print(f"  Added: {len(delta['added'])}")
+    print(f"  Changed: {len(delta['changed'])}")
+    print(f"  Removed: {len(delta['removed'])}")
+    print(f"  Unchanged: {delta['unchanged']}")
+    print(f"✅ Saved {len(chunks)} chunks to: {output_path}")
+    print(f"✅ Saved delta to: {delta_path}")
+    print(f"{'='*60}\n")
+    return delta
@@ -0,0 +1,485 @@
+"""
+Batch ingestion of many IS code PDFs
+One entry point for a directory of PDFs or a manifest, running
+
+  extract + chunk   process pool (CPU bound), ISCodeProcessorV2 streaming path,
+                    then chunk_dedup (duplicates, contents pages, page headers)
+  embed             async workers sharing one embedding engine (the OpenAI
+                    API, or a local CPU model with --backend local) and cache,
+                    writing the artifact, its lexical index and quantized variants
+  upload            async workers, each with its own bulk loader connection;
+                    with --pgvector the HNSW index is built once after the
+                    last upload (pgvector_search.py needs it)
+
+as a pipeline with bounded queues between the stages, so a slow stage
+holds back the ones before it instead of piling up documents in memory.
+
+Progress is kept per document in <work-dir>/ingest_state.json (stage,
+PDF sha256, chunk and artifact paths, uploaded document id). Re-running
+skips uploaded documents and resumes the rest from their last finished
+stage; a changed PDF, token budget or --no-dedup starts over, and a
+changed model or --dimensions re-embeds from the saved chunks. An upload
+replaces the document's previous upload (deleted with its chunks in the
+same transaction). A failing document is marked and the others carry on.
+
+Manifest: JSON array or JSON Lines of objects with 'pdf' (relative to the
+manifest) and optional 'code', 'title', 'codeNumber', 'version', 'year',
+'jurisdiction'. Without a manifest the code is read from the file name
+(IS_456_2000.pdf -> IS 456:2000).
+
+  python ingest.py documents/codes --sqlite documents/ingest.db
+  python ingest.py codes.jsonl --extract-workers 4 --pgvector
+  python ingest.py documents/codes --backend local --no-upload
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from chunk_io import load_chunks, write_jsonl
+from embedding_artifact import artifact_paths, load_artifact, save_artifact
+from lexical_index import build_lexical_index
+from quantized_index import build_quantized_indexes
+from embedding_cache import EmbeddingCache, DEFAULT_CACHE_PATH
+from extraction_cache import DEFAULT_EXTRACTION_CACHE, file_sha256
+from instrumentation import Metrics, add_arguments
+from token_splitter import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS
+
+
+DEFAULT_WORK_DIR = Path(__file__).parent.parent / 'documents' / 'ingest'
+STATE_FILE = 'ingest_state.json'
+
+# Stages in order; a document's state is the last one it finished
+CHUNKED, EMBEDDED, UPLOADED = 'chunked', 'embedded', 'uploaded'
+
+FILENAME_PATTERN = re.compile(r'^(IS)[\s_-]*(\d+(?:[\s_-]*\(?Part[\s_-]*\d+\)?)?)[\s_:-]+(\d{4})', re.I)
+
+DOCUMENT_DEFAULTS = {'jurisdiction': 'National', 'mimeType': 'application/pdf'}
+
+
+def document_from_filename(pdf_path: Path) -> Dict:
+    """Document fields from a file name like IS_456_2000.pdf or IS 800-2007.pdf"""
+    match = FILENAME_PATTERN.match(pdf_path.stem)
+    if not match:
+        return {'code': pdf_path.stem, 'codeNumber': pdf_path.stem, 'title': pdf_path.stem}
+    number = ' '.join(re.split(r'[\s_-]+', match.group(2)))
+    code_number = f"{match.group(1).upper()} {number}"
+    year = match.group(3)
+    return {'code': f"{code_number}:{year}", 'codeNumber': code_number, 'version': year,
+            'year': int(year), 'title': f"{code_number}:{year}"}
+
+
+def load_documents(source: str) -> List[Dict]:
+    """Document entries (with absolute 'pdf' paths) from a directory or a manifest"""
+    path = Path(source)
+    if path.is_dir():
+        entries = [{'pdf': str(pdf)} for pdf in sorted(path.glob('*.pdf'))]
+        base = path
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.suffix == '.jsonl':
+                entries = [json.loads(line) for line in f if line.strip()]
+            else:
+                entries = json.load(f)
+        base = path.parent
+
+    documents = []
+    for entry in entries:
+        pdf = Path(entry['pdf'])
+        pdf = pdf if pdf.is_absolute() else base / pdf
+        document = dict(DOCUMENT_DEFAULTS, **document_from_filename(pdf), filename=pdf.name)
+        document.update({key: value for key, value in entry.items() if key != 'pdf'})
+        document['pdf'] = str(pdf.resolve())
+        documents.append(document)
+    return documents
+
+
+def slug(code: str) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '_', code).strip('_')
+
+
+def _chunk_document(task) -> Dict:
+    """Worker: extract and chunk one PDF to JSON Lines (runs in the process pool, output silenced)"""
+    from process_is_code_v2 import ISCodeProcessorV2
+
+    pdf_path, code, chunks_path, extraction_cache, tables, max_tokens, overlap_tokens, dedup = task
+    started = time.perf_counter()
+    processor = ISCodeProcessorV2(pdf_path, code, workers=1, extraction_cache=extraction_cache,
+                                  tables=tables, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    with redirect_stdout(io.StringIO()):
+        stats = processor.process_to_jsonl(chunks_path)
+    if dedup:
+        from chunk_dedup import dedup_chunks
+        chunks, report = dedup_chunks(load_chunks(chunks_path), page_lines=processor.page_edges)
+        write_jsonl(chunks, chunks_path)
+        stats.update(chunks=report['output_chunks'], removed=report['saved_chunks'],
+                     saved_tokens=report['saved_tokens'])
+    return dict(stats, pages=sum(processor.triage.pages.values()),
+                seconds=time.perf_counter() - started)
+
+
+class IngestState:
+    """Per-document progress in a JSON file, rewritten atomically on every change"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.documents = {}
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                self.documents = json.load(f).get('documents', {})
+
+    def get(self, pdf: str) -> Dict:
+        return self.documents.get(pdf, {})
+
+    def update(self, pdf: str, **fields):
+        self.documents.setdefault(pdf, {}).update(fields, updated=time.time())
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'documents': self.documents}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class IngestPipeline:
+    """extract -> embed -> upload over bounded asyncio queues"""
+
+    def __init__(self, work_dir: str, extract_workers: int = 2, embed_workers: int = 2,
+                 upload_workers: int = 1, queue_size: int = 2, database_url: str = None,
+                 sqlite_path: str = None, pgvector: bool = False, tables: bool = True,
+                 extraction_cache: Optional[str] = DEFAULT_EXTRACTION_CACHE,
+                 embedding_cache: Optional[str] = DEFAULT_CACHE_PATH, batch_size: int = 64,
+                 concurrency: int = 4, force: bool = False, metrics: Metrics = None,
+                 max_tokens: int = DEFAULT_MAX_TOKENS, overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+                 dimensions: int = None, truncate: bool = False, backend: str = 'openai',
+                 model: str = None, threads: int = None, runtime: str = 'onnx',
+                 max_batch_tokens: int = None, dedup: bool = True):
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.extract_workers = extract_workers
+        self.embed_workers = embed_workers
+        self.upload = bool(database_url or sqlite_path)
+        self.upload_workers = upload_workers if self.upload else 0
+        self.queue_size = queue_size
+        self.database_url = database_url
+        self.sqlite_path = sqlite_path
+        self.pgvector = pgvector
+        self.tables = tables
+        self.extraction_cache = extraction_cache
+        self.embedding_cache = embedding_cache
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.force = force
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.dedup = dedup
+        from embedding_engine import DEFAULT_MODEL, MODEL_DIMENSIONS, create_engine
+        # Progress saved before the model and size were recorded used these
+        self.default_model = DEFAULT_MODEL
+        self.default_dimensions = MODEL_DIMENSIONS[DEFAULT_MODEL]
+        self.engine = create_engine(backend, model, threads=threads, runtime=runtime,
+                                    api_key=os.getenv('OPENAI_API_KEY'), batch_size=batch_size,
+                                    max_batch_tokens=max_batch_tokens, concurrency=concurrency, dimensions=dimensions, truncate=truncate)
+        self.dimensions = self.engine.output_dims
+        self.metrics = metrics or Metrics('ingest')
+        self.state = IngestState(self.work_dir / STATE_FILE)
+        self.results = {'skipped': 0, 'done': 0, 'failed': []}
+
+    def paths(self, document: Dict) -> Dict[str, str]:
+        base = self.work_dir / slug(document['code'])
+        return {'chunks': str(base) + '.chunks.jsonl', 'artifact': str(base)}
+
+    def resume_stage(self, document: Dict, sha256: str) -> Optional[str]:
+        """Last finished stage whose outputs are still there, or None to start over"""
+        state = self.state.get(document['pdf'])
+        if self.force or state.get('sha256') != sha256 or state.get('code') != document['code']:
+            return None
+        if state.get('split') != [self.max_tokens, self.overlap_tokens]:
+            return None
+        if state.get('dedup', False) != self.dedup:
+            return None
+        stage = state.get('stage')
+        if stage in (EMBEDDED, UPLOADED) and (
+                state.get('model', self.default_model) != self.engine.model
+                or state.get('dims', self.default_dimensions) != self.dimensions):
+            stage = CHUNKED  # re-embed with the requested model and size
+        paths = self.paths(document)
+        if stage == UPLOADED:
+            return UPLOADED if self.upload else EMBEDDED
+        if stage == EMBEDDED and all(p.exists() for p in artifact_paths(paths['artifact'])):
+            return EMBEDDED
+        if stage in (CHUNKED, EMBEDDED) and Path(paths['chunks']).exists():
+            return CHUNKED
+        return None
+
+    def fail(self, document: Dict, stage: str, error: Exception):
+        print(f"  ❌ [{document['code']}] {stage} failed: {error}")
+        self.state.update(document['pdf'], error=f"{stage}: {error}")
+        self.results['failed'].append(document['code'])
+
+    def finish(self, document: Dict, stage: str):
+        self.state.update(document['pdf'], stage=stage, error=None)
+        self.results['done'] += 1
+
+    async def run(self, documents: List[Dict]) -> Dict:
+        extract_q = asyncio.Queue(self.queue_size)
+        embed_q = asyncio.Queue(self.queue_size)
+        upload_q = asyncio.Queue(self.queue_size)
+
+        cache = EmbeddingCache(self.embedding_cache) if self.embedding_cache else None
+        engine = self.engine
+        engine.cache = cache
+
+        with ProcessPoolExecutor(max_workers=self.extract_workers) as pool:
+            source = asyncio.create_task(self._source(documents, extract_q, embed_q, upload_q))
+            extractors = [asyncio.create_task(self._extract_worker(pool, extract_q, embed_q))
+                          for _ in range(self.extract_workers)]
+            embedders = [asyncio.create_task(self._embed_worker(engine, embed_q, upload_q))
+                         for _ in range(self.embed_workers)]
+            uploaders = [asyncio.create_task(self._upload_worker(upload_q))
+                         for _ in range(self.upload_workers)]
+
+            # Each stage is told to stop once everything that feeds it has finished
+            await source
+            for _ in extractors:
+                await extract_q.put(None)
+            await asyncio.gather(*extractors)
+            for _ in embedders:
+                await embed_q.put(None)
+            await asyncio.gather(*embedders)
+            for _ in uploaders:
+                await upload_q.put(None)
+            uploaded = sum(await asyncio.gather(*uploaders))
+
+        if self.pgvector and uploaded:
+            index = await asyncio.get_running_loop().run_in_executor(None, self._build_vector_index)
+            action = "built" if index['created'] else "already present"
+            print(f"  🧭 Vector index {index['name']} {action} ({index['seconds']:.1f}s)")
+
+        self.metrics.record('embed', latencies=engine.latencies)
+        for name, value in engine.stats.items():
+            self.metrics.count(name, value)
+        if cache:
+            cache.close()
+        return self.results
+
+    async def _source(self, documents, extract_q, embed_q, upload_q):
+        """Hand every document to the stage after its last finished one"""
+        loop = asyncio.get_running_loop()
+        for document in documents:
+            if not Path(document['pdf']).exists():
+                self.fail(document, 'open', FileNotFoundError(document['pdf']))
+                continue
+            document['sha256'] = await loop.run_in_executor(None, file_sha256, document['pdf'])
+            stage = self.resume_stage(document, document['sha256'])
+            if stage == UPLOADED or (stage == EMBEDDED and not self.upload):
+                print(f"  ⏭️  [{document['code']}] already {stage}")
+                self.results['skipped'] += 1
+            elif stage == EMBEDDED:
+                print(f"  ↪️  [{document['code']}] resuming at upload")
+                await upload_q.put(document)
+            elif stage == CHUNKED:
+                print(f"  ↪️  [{document['code']}] resuming at embed")
+                await embed_q.put(document)
+            else:
+                await extract_q.put(document)
+
+    async def _extract_worker(self, pool, extract_q, embed_q):
+        loop = asyncio.get_running_loop()
+        while (document := await extract_q.get()) is not None:
+            paths = self.paths(document)
+            task = (document['pdf'], document['code'], paths['chunks'], self.extraction_cache,
+                    self.tables, self.max_tokens, self.overlap_tokens, self.dedup)
+            try:
+                stats = await loop.run_in_executor(pool, _chunk_document, task)
+            except Exception as error:
+                self.fail(document, 'extract', error)
+                continue
+            self.metrics.record('extract', seconds=stats['seconds'], items=stats['pages'])
+            self.state.update(document['pdf'], stage=CHUNKED, sha256=document['sha256'],
+                              code=document['code'], split=[self.max_tokens, self.overlap_tokens],
+                              dedup=self.dedup, chunks=paths['chunks'], chunk_count=stats['chunks'])
+            deduped = (f", {stats['removed']} duplicate/contents chunks and "
+                       f"{stats['saved_tokens']:,} tokens dropped" if self.dedup else "")
+            print(f"  📄 [{document['code']}] {stats['pages']} pages -> {stats['chunks']} chunks"
+                  f"{deduped} ({stats['seconds']:.1f}s)")
+            await embed_q.put(document)
+
+    async def _embed_worker(self, engine, embed_q, upload_q):
+        loop = asyncio.get_running_loop()
+        while (document := await embed_q.get()) is not None:
+            paths = self.paths(document)
+            started = time.perf_counter()
+            try:
+                chunks = await loop.run_in_executor(None, load_chunks, paths['chunks'])
+                vectors = await engine.embed_async([chunk['content'] for chunk in chunks])
+                failed = sum(1 for vector in vectors if vector is None)
+                if failed:
+                    # Embedded vectors are cached, so a re-run only retries these
+                    raise RuntimeError(f"{failed} of {len(chunks)} chunks failed to embed")
+                for chunk, vector in zip(chunks, vectors):
+                    chunk['embedding'] = vector
+                await loop.run_in_executor(None, save_artifact, chunks, paths['artifact'],
+                                           'float32', engine.model)
+                await loop.run_in_executor(None, build_lexical_index, paths['artifact'], chunks)
+                await loop.run_in_executor(None, build_quantized_indexes, paths['artifact'])
+            except Exception as error:
+                self.fail(document, 'embed', error)
+                continue
+            seconds = time.perf_counter() - started
+            self.metrics.record('embed', seconds=seconds, items=len(chunks))
+            self.state.update(document['pdf'], stage=EMBEDDED, artifact=paths['artifact'],
+                              model=engine.model, dims=self.dimensions)
+            print(f"  🔢 [{document['code']}] embedded {len(chunks)} chunks ({seconds:.1f}s)")
+            if self.upload:
+                await upload_q.put(document)
+            else:
+                self.finish(document, EMBEDDED)
+
+    def _make_loader(self):
+        from bulk_loader import PostgresBulkLoader, SQLiteBulkLoader
+        if self.sqlite_path:
+            return SQLiteBulkLoader(self.sqlite_path)
+        return PostgresBulkLoader(self.database_url, pgvector=self.pgvector)
+
+    def _build_vector_index(self) -> Dict:
+        loader = self._make_loader()
+        try:
+            return loader.build_vector_index()
+        finally:
+            loader.close()
+
+    def _load(self, loader, document: Dict, vector_table: bool = False) -> Dict:
+        """Load one document; vector_table first creates the pgvector table for its dims"""
+        from upload_to_rcc_bot import RCC_DOMAIN
+        from bulk_loader import DOCUMENT_COLUMNS
+
+        vectors, meta = load_artifact(self.paths(document)['artifact'])
+        if vector_table:
+            loader.ensure_vector_table(meta['dims'])
+        row = {key: value for key, value in document.items() if key in DOCUMENT_COLUMNS}
+        # A re-ingested PDF replaces its previous upload in the same transaction
+        return loader.load_document(row, meta['chunks'], vectors,
+                                    domain=document.get('domain', RCC_DOMAIN),
+                                    replace_id=self.state.get(document['pdf']).get('document_id'))
+
+    async def _upload_worker(self, upload_q) -> int:
+        """Upload documents until the stop marker; returns how many were loaded"""
+        loop = asyncio.get_running_loop()
+        loaded = 0
+        # The pgvector table is checked once per connection
+        vector_ready = not self.pgvector
+        # One thread per worker: the loader's connection stays on the thread that opened it
+        with ThreadPoolExecutor(max_workers=1) as thread:
+            loader = None
+            try:
+                while (document := await upload_q.get()) is not None:
+                    try:
+                        if loader is None:
+                            loader = await loop.run_in_executor(thread, self._make_loader)
+                        result = await loop.run_in_executor(thread, self._load, loader, document,
+                                                            not vector_ready)
+                    except Exception as error:
+                        self.fail(document, 'upload', error)
+                        continue
+                    vector_ready = True
+                    loaded += 1
+                    self.metrics.record('upload', seconds=result['seconds'], items=result['rows'])
+                    self.state.update(document['pdf'], document_id=result['document_id'])
+                    self.finish(document, UPLOADED)
+                    replaced = " (replaced the previous upload)" if result['replaced'] else ""
+                    print(f"  ⬆️  [{document['code']}] uploaded {result['rows']} chunks "
+                          f"({result['rows_per_second']:,.0f} rows/s){replaced}")
+            finally:
+                if loader is not None:
+                    await loop.run_in_executor(thread, loader.close)
+        return loaded
+
+
+def main():
+    from embedding_engine import add_backend_arguments
+
+    parser = argparse.ArgumentParser(description="Ingest a directory or manifest of IS code PDFs")
+    parser.add_argument('source', help="Directory of PDFs, or a .json/.jsonl manifest")
+    parser.add_argument('--work-dir', default=str(DEFAULT_WORK_DIR),
+                        help="Chunks, artifacts and resume state")
+    parser.add_argument('--extract-workers', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="Processes extracting and chunking PDFs")
+    parser.add_argument('--embed-workers', type=int, default=2, help="Documents embedding at once")
+    parser.add_argument('--upload-workers', type=int, default=1, help="Database connections")
+    parser.add_argument('--queue-size', type=int, default=2, help="Documents waiting between stages")
+    parser.add_argument('--batch-size', type=int, default=64, help="Inputs per embedding request at most")
+    parser.add_argument('--max-batch-tokens', type=int,
+                        help="Tokens per embedding request or local batch at most")
+    parser.add_argument('--concurrency', type=int, default=4, help="Embedding requests in flight per document")
+    parser.add_argument('--sqlite', help="Upload into this SQLite stand-in instead of DATABASE_URL")
+    parser.add_argument('--no-upload', action='store_true', help="Stop after writing embedding artifacts")
+    parser.add_argument('--pgvector', action='store_true', help="Store vectors in a pgvector column")
+    parser.add_argument('--no-tables', action='store_true', help="Skip separate table chunks")
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS, help="Split chunks above this")
+    parser.add_argument('--overlap-tokens', type=int, default=DEFAULT_OVERLAP_TOKENS)
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Embed duplicate, contents-page and header lines as extracted")
+    parser.add_argument('--dimensions', type=int, help="Reduced embedding size (e.g. 512)")
+    parser.add_argument('--truncate', action='store_true',
+                        help="Cut full (cached) vectors to --dimensions locally instead of requesting them")
+    add_backend_arguments(parser)
+    parser.add_argument('--no-extract-cache', action='store_true')
+    parser.add_argument('--no-embedding-cache', action='store_true')
+    parser.add_argument('--force', action='store_true', help="Ignore saved progress and redo every document")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.backend == 'openai' and not os.getenv('OPENAI_API_KEY'):
+        print("❌ OPENAI_API_KEY not set! (or use --backend local)")
+        sys.exit(1)
+    database_url = None if args.no_upload or args.sqlite else os.getenv('DATABASE_URL')
+    if not args.no_upload and not args.sqlite and not database_url:
+        print("❌ DATABASE_URL not set (use --sqlite or --no-upload)")
+        sys.exit(1)
+
+    documents = load_documents(args.source)
+    metrics = Metrics.from_args('ingest', args)
+    pipeline = IngestPipeline(
+        args.work_dir, extract_workers=args.extract_workers, embed_workers=args.embed_workers,
+        upload_workers=args.upload_workers, queue_size=args.queue_size, database_url=database_url,
+        sqlite_path=None if args.no_upload else args.sqlite, pgvector=args.pgvector,
+        tables=not args.no_tables,
+        extraction_cache=None if args.no_extract_cache else DEFAULT_EXTRACTION_CACHE,
+        embedding_cache=None if args.no_embedding_cache else DEFAULT_CACHE_PATH,
+        batch_size=args.batch_size, concurrency=args.concurrency, force=args.force, metrics=metrics,
+        max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens,
+        dimensions=args.dimensions, truncate=args.truncate, backend=args.backend,
+        model=args.model, threads=args.threads, runtime=args.runtime,
+        max_batch_tokens=args.max_batch_tokens, dedup=not args.no_dedup)
+
+    print(f"\n{'='*60}")
+    print(f"Ingesting {len(documents)} documents")
+    print(f"  Extract: {args.extract_workers} processes, embed: {args.embed_workers} workers, "
+          f"upload: {pipeline.upload_workers} workers, queues: {args.queue_size}")
+    print(f"  Embeddings: {pipeline.engine.model}, {pipeline.dimensions} dimensions")
+    print(f"  Work dir: {args.work_dir}")
+    print(f"{'='*60}\n")
+
+    with metrics.session():
+        results = asyncio.run(pipeline.run(documents))
+
+    print(f"\n{'='*60}")
+    print("📊 Ingestion Summary:")
+    print(f"  Finished: {results['done']}")
+    print(f"  Already done: {results['skipped']}")
+    print(f"  Failed: {len(results['failed'])} {', '.join(results['failed'])}")
+    print(f"{'='*60}\n")
+    if results['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
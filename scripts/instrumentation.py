@@ -0,0 +1,334 @@
+"""
+Per-stage metrics and profiling shared by the ingestion scripts
+(process_is_code_v2.py, precompute_v2.py, upload_to_rcc_bot.py)
+
+  metrics = Metrics.from_args('precompute_v2', args)
+  with metrics.session():
+      with metrics.stage('embed') as stage:
+          vectors = engine.embed(texts)
+          stage.items = len(texts)
+          stage.latencies = engine.latencies
+
+Each stage records wall and CPU seconds, items, items/s, the process peak
+RSS after it (and how much the stage raised it; on Windows only with
+psutil installed, otherwise left out), and API latency
+percentiles when latencies are given. Entering a stage name again adds to
+it. With trace_memory, tracemalloc also reports each stage's peak Python
+heap (slower).
+
+Output (--metrics PATH): JSON, or Prometheus text format for a .prom path.
+
+Profiling (--profile):
+  cprofile  deterministic; writes <out>.pstats (flameprof / snakeviz read it)
+  sample    a thread samples the main thread's stack every --sample-interval
+            seconds and writes <out>.folded, one "stage;file:func;... count"
+            line per stack, for flamegraph.pl or speedscope
+
+Both see this process only; extraction workers (--workers > 1) report
+their per-page seconds back as extract.triage / extract.pdfplumber instead.
+"""
+
+import sys
+import json
+import time
+import threading
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: peak RSS comes from psutil if installed
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+PROMETHEUS_PREFIX = 'civilllm'
+PROFILERS = ('cprofile', 'sample')
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of this process and any finished children
+    (ru_maxrss is KB on Linux). Without the resource module: this process's
+    peak working set via psutil, or None when psutil is not installed.
+    """
+    if resource is not None:
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank QUANTILES of values, keyed 'p50', 'p90', ..."""
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    return {
+        f"p{round(q * 100)}": ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+        for q in QUANTILES
+    }
+
+
+class Stage:
+    """Accumulated measurements for one named stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.cpu_seconds = None
+        self.items = 0
+        self.latencies = []
+        # Left None for stages only ever record()ed (measured in another process)
+        self.peak_rss_mb = None
+        self.rss_growth_mb = None
+        self.heap_peak_mb = None
+
+    def to_dict(self) -> Dict:
+        result = {
+            'seconds': round(self.seconds, 4),
+            'items': self.items,
+            'items_per_second': round(self.items / self.seconds, 2) if self.seconds else None,
+        }
+        for key, digits in (('cpu_seconds', 4), ('peak_rss_mb', 1), ('rss_growth_mb', 1),
+                            ('heap_peak_mb', 2)):
+            value = getattr(self, key)
+            if value is not None:
+                result[key] = round(value, digits)
+        if self.latencies:
+            result['latency'] = {
+                'count': len(self.latencies),
+                'sum': round(sum(self.latencies), 4),
+                **{name: round(value, 4) for name, value in percentiles(self.latencies).items()},
+            }
+        return result
+
+
+class _Sampler:
+    """Folded-stack sampling profiler for the thread that created it"""
+
+    def __init__(self, metrics: 'Metrics', interval: float):
+        self.metrics = metrics
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            # Root the stack at the current stage so the flamegraph splits by stage
+            stack.append(self.metrics.current or 'other')
+            key = ';'.join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class Metrics:
+    """Stage timings for one script run, with optional profiling"""
+
+    def __init__(self, script: str, output: str = None, profile: str = None,
+                 profile_output: str = None, sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 trace_memory: bool = False):
+        self.script = script
+        self.output = output
+        self.profile = profile
+        self.profile_output = profile_output or f"{script}_profile"
+        self.sample_interval = sample_interval
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.counters = {}
+        self.current = None
+        self.started = time.time()
+
+    @classmethod
+    def from_args(cls, script: str, args) -> 'Metrics':
+        """Metrics configured from add_arguments() flags"""
+        return cls(script, output=args.metrics, profile=args.profile,
+                   profile_output=args.profile_output, sample_interval=args.sample_interval,
+                   trace_memory=args.trace_memory)
+
+    def _stage(self, name: str) -> Stage:
+        if name not in self.stages:
+            self.stages[name] = Stage(name)
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as stage name; set .items / extend .latencies on the yielded Stage"""
+        stage = self._stage(name)
+        outer, self.current = self.current, name
+        rss_before = peak_rss_mb()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            heap_before = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - wall
+            stage.cpu_seconds = (stage.cpu_seconds or 0.0) + time.process_time() - cpu
+            stage.peak_rss_mb = peak_rss_mb()
+            if stage.peak_rss_mb is not None:
+                stage.rss_growth_mb = (stage.rss_growth_mb or 0.0) + stage.peak_rss_mb - rss_before
+            if self.trace_memory:
+                heap_peak = (tracemalloc.get_traced_memory()[1] - heap_before) / (1024 * 1024)
+                stage.heap_peak_mb = max(stage.heap_peak_mb or 0.0, heap_peak)
+            self.current = outer
+
+    def record(self, name: str, seconds: float = 0.0, items: int = 0,
+               latencies: List[float] = None):
+        """Add a stage measured elsewhere (e.g. per-page times reported by worker processes)"""
+        stage = self._stage(name)
+        stage.seconds += seconds
+        stage.items += items
+        stage.latencies.extend(latencies or [])
+
+    def count(self, name: str, value: int = 1):
+        """Free-form counter (cache hits, retries, skipped pages, ...)"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> Dict:
+        peak = peak_rss_mb()
+        return {
+            'script': self.script,
+            'started': round(self.started, 3),
+            'seconds': round(time.time() - self.started, 4),
+            'peak_rss_mb': round(peak, 1) if peak is not None else None,
+            'stages': {name: stage.to_dict() for name, stage in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (gauges per stage, a summary for API latency)"""
+        data = self.to_dict()
+        labels = f'script="{self.script}"'
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+            for suffix, extra, value in samples:
+                lines.append(f"{PROMETHEUS_PREFIX}_{name}{suffix}{{{labels}{extra}}} {value}")
+
+        stages = data['stages']
+        for key, help_text in (('seconds', 'Wall time per stage'),
+                               ('cpu_seconds', 'CPU time per stage'),
+                               ('items', 'Items processed per stage'),
+                               ('peak_rss_mb', 'Process peak RSS after the stage (MB)'),
+                               ('rss_growth_mb', 'Peak RSS growth during the stage (MB)')):
+            metric(f"stage_{key}", 'gauge', help_text,
+                   [('', f',stage="{name}"', stage[key]) for name, stage in stages.items() if key in stage])
+
+        latency = [(name, stage['latency']) for name, stage in stages.items() if 'latency' in stage]
+        if latency:
+            samples = []
+            for name, values in latency:
+                for q in QUANTILES:
+                    samples.append(('', f',stage="{name}",quantile="{q}"', values[f"p{round(q * 100)}"]))
+                samples.append(('_sum', f',stage="{name}"', values['sum']))
+                samples.append(('_count', f',stage="{name}"', values['count']))
+            metric('api_latency_seconds', 'summary', 'API request latency per stage', samples)
+
+        if self.counters:
+            metric('counter', 'gauge', 'Script counters',
+                   [('', f',name="{name}"', value) for name, value in self.counters.items()])
+        metric('run_seconds', 'gauge', 'Wall time of the whole run', [('', '', data['seconds'])])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str = None) -> Optional[str]:
+        """Write to path (.prom = Prometheus text, otherwise JSON)"""
+        path = path or self.output
+        if not path:
+            return None
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def print_report(self):
+        print(f"\n⏱️  Stages ({self.script}):")
+        print(f"  {'stage':<20}{'wall':>9}{'cpu':>9}{'items':>9}{'items/s':>14}{'RSS MB':>9}{'p50':>9}{'p95':>9}")
+        for name, stage in self.stages.items():
+            values = stage.to_dict()
+            rate = f"{values['items_per_second']:,.1f}" if values['items_per_second'] else '-'
+            cpu = f"{stage.cpu_seconds:.2f}s" if stage.cpu_seconds is not None else '-'
+            rss = f"{stage.peak_rss_mb:.1f}" if stage.peak_rss_mb is not None else '-'
+            latency = values.get('latency', {})
+            p50 = f"{latency['p50'] * 1000:.0f}ms" if latency else ''
+            p95 = f"{latency['p95'] * 1000:.0f}ms" if latency else ''
+            print(f"  {name:<20}{stage.seconds:>8.2f}s{cpu:>9}{stage.items:>9}"
+                  f"{rate:>14}{rss:>9}{p50:>9}{p95:>9}")
+
+    @contextmanager
+    def session(self):
+        """Run the script body with profiling on; print the report and write outputs at the end"""
+        profiler = sampler = None
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elif self.profile == 'sample':
+            sampler = _Sampler(self, self.sample_interval)
+            sampler.start()
+        try:
+            yield self
+        finally:
+            if profiler:
+                profiler.disable()
+                path = f"{self.profile_output}.pstats"
+                profiler.dump_stats(path)
+                print(f"🔥 cProfile stats: {path} (flameprof {path} > flame.svg)")
+            if sampler:
+                sampler.stop()
+                path = f"{self.profile_output}.folded"
+                sampler.write(path)
+                print(f"🔥 Folded stacks: {path} (flamegraph.pl {path} > flame.svg)")
+            if self.trace_memory:
+                tracemalloc.stop()
+            self.print_report()
+            written = self.write()
+            if written:
+                print(f"📈 Metrics: {written}")
+
+
+def add_arguments(parser):
+    """--metrics / --profile flags shared by the ingestion scripts"""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--metrics', help="Write per-stage metrics here (.json, or .prom for Prometheus text)")
+    group.add_argument('--profile', choices=PROFILERS, help="Profile the run (cProfile or stack sampling)")
+    group.add_argument('--profile-output', help="Profile path without extension (default <script>_profile)")
+    group.add_argument('--sample-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                       help="Seconds between stack samples for --profile sample")
+    group.add_argument('--trace-memory', action='store_true',
+                       help="Per-stage Python heap peaks via tracemalloc (slower)")
+    return group
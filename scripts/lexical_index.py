@@ -0,0 +1,167 @@
+"""
+Lexical indexes over embedding artifact chunks
+Built next to the artifact at ingestion time and loaded by hybrid_search.py:
+
+  <artifact>.bm25.npz      BM25 inverted index: sorted vocabulary, CSR
+                           postings (row ids + term frequencies), row
+                           lengths and idf; rows match the artifact matrix
+  <artifact>.refs.json     exact reference map: clause number -> rows and
+                           table label ("table 16") -> rows
+
+Tokens are lowercase words and whole clause numbers ("26.4.2" stays one
+token), so clause references also score lexically.
+"""
+
+import re
+import sys
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+from embedding_artifact import artifact_paths
+
+
+TOKEN_PATTERN = re.compile(r'\d+(?:\.\d+)*[a-z]?|[a-z]+')
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or shall that the this to with".split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def lexical_paths(base_path: str) -> Tuple[Path, Path]:
+    """(bm25_path, refs_path) beside an artifact base path"""
+    matrix_path, _ = artifact_paths(base_path)
+    base = matrix_path.with_suffix('')
+    return base.with_name(base.name + '.bm25.npz'), base.with_name(base.name + '.refs.json')
+
+
+def table_key(label: str) -> str:
+    """'Table 16' / 'TABLE 16' / 'table16' -> 'table 16'"""
+    return 'table ' + re.sub(r'(?i)^table\s*', '', label.strip()).lower()
+
+
+class BM25Index:
+    """Okapi BM25 over chunk texts, postings stored as flat NumPy arrays"""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}   # term -> term id (ids follow sorted term order)
+        self.offsets = None    # (V + 1,) postings boundaries per term
+        self.rows = None       # (P,) int32 row of each posting
+        self.tfs = None        # (P,) uint16 term frequency of each posting
+        self.lengths = None    # (N,) int32 tokens per row
+        self.idf = None        # (V,) float32
+
+    def __len__(self) -> int:
+        return 0 if self.lengths is None else len(self.lengths)
+
+    def build(self, texts: List[str]) -> 'BM25Index':
+        postings = {}
+        lengths = np.zeros(len(texts), dtype=np.int32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append((row, tf))
+
+        terms = sorted(postings)
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        sizes = np.array([len(postings[term]) for term in terms], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        flat = [posting for term in terms for posting in postings[term]]
+        self.rows = np.array([row for row, _ in flat], dtype=np.int32)
+        self.tfs = np.minimum(np.array([tf for _, tf in flat], dtype=np.int64), 65535).astype(np.uint16)
+        self.lengths = lengths
+        n = len(texts)
+        self.idf = np.log(1.0 + (n - sizes + 0.5) / (sizes + 0.5)).astype(np.float32)
+        return self
+
+    def scores(self, query: str) -> 'np.ndarray':
+        """BM25 score of every row for the query (zeros where no term matches)"""
+        scores = np.zeros(len(self), dtype=np.float32)
+        if not len(self):
+            return scores
+        average = max(float(self.lengths.mean()), 1.0)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            rows = self.rows[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            norm = self.k1 * (1.0 - self.b + self.b * self.lengths[rows] / average)
+            scores[rows] += self.idf[term] * tf * (self.k1 + 1.0) / (tf + norm)
+        return scores
+
+    def save(self, path: str):
+        terms = np.array(sorted(self.vocabulary, key=self.vocabulary.get))
+        np.savez_compressed(path, terms=terms, offsets=self.offsets, rows=self.rows, tfs=self.tfs,
+                            lengths=self.lengths, idf=self.idf,
+                            params=np.array([self.k1, self.b], dtype=np.float64))
+
+    @classmethod
+    def load(cls, path: str) -> 'BM25Index':
+        with np.load(path) as data:
+            k1, b = data['params'].tolist()
+            index = cls(k1, b)
+            index.vocabulary = {term: i for i, term in enumerate(data['terms'].tolist())}
+            index.offsets = data['offsets']
+            index.rows = data['rows']
+            index.tfs = data['tfs']
+            index.lengths = data['lengths']
+            index.idf = data['idf']
+        return index
+
+
+def reference_map(chunks: List[Dict]) -> Dict[str, Dict[str, List[int]]]:
+    """Clause number and table label -> artifact rows (split parts stay in order)"""
+    clauses, tables = {}, {}
+    for row, chunk in enumerate(chunks):
+        if chunk.get('table'):
+            tables.setdefault(table_key(chunk['table']), []).append(row)
+        elif chunk.get('clause'):
+            clauses.setdefault(chunk['clause'], []).append(row)
+        # Clauses and tables whose text was deduplicated into this chunk
+        for clause in chunk.get('duplicate_clauses', []):
+            clauses.setdefault(clause, []).append(row)
+        for table in chunk.get('duplicate_tables', []):
+            tables.setdefault(table_key(table), []).append(row)
+    return {'clauses': clauses, 'tables': tables}
+
+
+def build_lexical_index(base_path: str, chunks: List[Dict] = None) -> Tuple[Path, Path]:
+    """Write the BM25 index and reference map for an artifact (chunks default to its sidecar)"""
+    if chunks is None:
+        with open(artifact_paths(base_path)[1], 'r', encoding='utf-8') as f:
+            chunks = json.load(f)['chunks']
+    bm25_path, refs_path = lexical_paths(base_path)
+    BM25Index().build([chunk['content'] for chunk in chunks]).save(str(bm25_path))
+    with open(refs_path, 'w', encoding='utf-8') as f:
+        json.dump(reference_map(chunks), f, separators=(',', ':'))
+    return bm25_path, refs_path
+
+
+def load_lexical_index(base_path: str) -> Tuple[BM25Index, Dict]:
+    bm25_path, refs_path = lexical_paths(base_path)
+    with open(refs_path, 'r', encoding='utf-8') as f:
+        refs = json.load(f)
+    return BM25Index.load(str(bm25_path)), refs
@@ -0,0 +1,315 @@
+"""
+Local CPU embedding backend
+A BaseEmbeddingEngine (see embedding_base.py), like EmbeddingEngine, that
+runs a sentence-embedding model on this machine instead of calling the
+OpenAI API, so precompute and ingest work offline and re-runs cost nothing.
+
+  onnx                   onnxruntime session + Hugging Face tokenizer. The
+                         model is a local directory holding model.onnx (or
+                         onnx/model.onnx) and tokenizer.json, or a Hub repo
+                         id downloaded once into the Hub cache
+  sentence-transformers  SentenceTransformer on the CPU (needs torch)
+
+Inputs are tokenized once, sorted by token count and packed into batches
+of at most max_batch_tokens padded tokens, each padded only to its own
+longest input: short definitions travel in large batches, 512-token
+tables in small ones, and none pays for the other's length. Vectors come
+back in input order, pooled (CLS or mean over real tokens) and unit length.
+
+threads sets the intra-op thread count (default: every core); inference
+is serialized, so concurrent embed_async callers queue rather than
+oversubscribe the cores.
+
+  engine = LocalEmbeddingEngine('BAAI/bge-small-en-v1.5', threads=4)
+  vectors = engine.embed(texts)
+"""
+
+import os
+import sys
+import time
+import hashlib
+import asyncio
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+from embedding_base import BaseEmbeddingEngine
+from token_splitter import token_batches
+
+
+DEFAULT_LOCAL_MODEL = 'BAAI/bge-small-en-v1.5'
+RUNTIMES = ('onnx', 'sentence-transformers')
+PADDINGS = ('dynamic', 'max')
+
+# Output size and pooling of models known to work well for retrieval;
+# others are read from the model and mean-pooled unless told otherwise
+LOCAL_MODELS = {
+    'BAAI/bge-small-en-v1.5': (384, 'cls'),
+    'BAAI/bge-base-en-v1.5': (768, 'cls'),
+    'sentence-transformers/all-MiniLM-L6-v2': (384, 'mean'),
+    'sentence-transformers/all-mpnet-base-v2': (768, 'mean'),
+}
+
+LOCAL_MAX_TOKENS = 512
+
+# Padded tokens (batch size x longest input) per forward pass
+DEFAULT_LOCAL_BATCH_TOKENS = 2048
+
+
+def _install(module: str, package: str):
+    import importlib
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        print(f"Installing {package}...")
+        import subprocess
+        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+        return importlib.import_module(module)
+
+
+def model_files(model: str, revision: str = None):
+    """(model.onnx, tokenizer.json) from a local directory or the Hugging Face Hub"""
+    directory = Path(model)
+    if directory.is_dir():
+        for candidate in (directory / 'model.onnx', directory / 'onnx' / 'model.onnx'):
+            if candidate.exists():
+                return candidate, directory / 'tokenizer.json'
+        raise FileNotFoundError(f"No model.onnx in {directory}")
+    hub = _install('huggingface_hub', 'huggingface_hub')
+    return (Path(hub.hf_hub_download(model, 'onnx/model.onnx', revision=revision)),
+            Path(hub.hf_hub_download(model, 'tokenizer.json', revision=revision)))
+
+
+def model_revision(model: str, revision: str = None) -> str:
+    """
+    Hub commit a model resolves to, or for a local directory a fingerprint
+    of its files (names, sizes, modification times), so re-exported
+    weights get fresh cache entries
+    """
+    directory = Path(model)
+    if directory.is_dir():
+        digest = hashlib.sha256()
+        for path in sorted(p for p in directory.rglob('*') if p.is_file()):
+            stat = path.stat()
+            digest.update(f"{path.relative_to(directory)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()[:12]
+    hub = _install('huggingface_hub', 'huggingface_hub')
+    try:
+        # Downloaded files live under snapshots/<commit>/
+        return Path(hub.hf_hub_download(model, 'config.json', revision=revision)).parent.name
+    except Exception:
+        # Not a Hub repo (e.g. a sentence-transformers short name): the name is all we have
+        return revision or 'main'
+
+
+class LocalEmbeddingEngine(BaseEmbeddingEngine):
+    """
+    Embed a list of texts with a local model.
+
+    model           Hub repo id or a directory with model.onnx + tokenizer.json
+                    (a sentence-transformers name or path for that runtime)
+    runtime         'onnx' or 'sentence-transformers'
+    threads         intra-op CPU threads (default: os.cpu_count())
+    batch_size      inputs per forward pass at most
+    max_batch_tokens
+                    padded tokens per forward pass at most (0: batch_size alone)
+    max_tokens      inputs are cut to this many model tokens
+    pooling         'cls' or 'mean' (default from LOCAL_MODELS, else 'mean')
+    padding         'dynamic' pads each batch to its longest input, 'max'
+                    pads every batch to max_tokens (static-shape baseline)
+    sort_by_length  batch inputs of similar length together
+    cache           optional EmbeddingCache consulted before running the model
+    dimensions      keep the first dimensions components, renormalized
+                    (only meaningful for Matryoshka-trained models)
+    revision        Hub branch, tag or commit (default: main)
+
+    The model loads on first use, or at construction when dimensions is
+    given for a model missing from LOCAL_MODELS (its size must be known to
+    check it). padding and sort_by_length apply to the onnx runtime;
+    sentence-transformers always sorts and pads per batch.
+    """
+
+    def __init__(self, model: str = DEFAULT_LOCAL_MODEL, runtime: str = 'onnx',
+                 threads: int = None, batch_size: int = 64, max_batch_tokens: int = None,
+                 max_tokens: int = LOCAL_MAX_TOKENS, pooling: str = None, padding: str = 'dynamic',
+                 sort_by_length: bool = True, cache=None, dimensions: int = None,
+                 revision: str = None):
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Unknown runtime {runtime!r} (expected one of {', '.join(RUNTIMES)})")
+        if padding not in PADDINGS:
+            raise ValueError(f"Unknown padding {padding!r} (expected one of {', '.join(PADDINGS)})")
+        self.model = model
+        self.runtime = runtime
+        self.threads = threads or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_batch_tokens = DEFAULT_LOCAL_BATCH_TOKENS if max_batch_tokens is None else max_batch_tokens
+        self.max_tokens = max_tokens
+        self.pooling = pooling or LOCAL_MODELS.get(model, (None, 'mean'))[1]
+        self.padding = padding
+        self.sort_by_length = sort_by_length
+        self.cache = cache
+        self.revision = revision
+        self._revision = None
+        self._full_dims = LOCAL_MODELS.get(model, (None,))[0]
+        self._session = None
+        self._tokenizer = None
+        self._sentence_model = None
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.stats = {'requests': 0, 'inputs': 0, 'retries': 0, 'failed': 0,
+                      'cache_hits': 0, 'cache_misses': 0, 'tokens': 0, 'padded_tokens': 0}
+        if dimensions is not None and dimensions == self.full_dims:
+            dimensions = None
+        if dimensions is not None and not 0 < dimensions <= self.full_dims:
+            raise ValueError(f"{model} cannot produce {dimensions} dimensions")
+        self.dimensions = dimensions
+
+    @classmethod
+    def for_index(cls, model: str, dims: int, **kwargs) -> 'LocalEmbeddingEngine':
+        """Engine whose query vectors match an index built with model at dims"""
+        return cls(model=model, dimensions=dims, **kwargs)
+
+    @property
+    def full_dims(self) -> int:
+        if self._full_dims is None:
+            self._load()
+        return self._full_dims
+
+    @property
+    def output_dims(self) -> int:
+        return self.dimensions or self.full_dims
+
+    @property
+    def cache_model(self) -> str:
+        """Full vectors are cached whatever dimensions is, keyed by model revision and size"""
+        if self._revision is None:
+            self._revision = model_revision(self.model, self.revision)
+        return f"{self.model}@{self._revision}:{self.full_dims}"
+
+    def _load(self):
+        if self._session is not None or self._sentence_model is not None:
+            return
+        if self.runtime == 'sentence-transformers':
+            torch = _install('torch', 'torch')
+            torch.set_num_threads(self.threads)
+            sentence_transformers = _install('sentence_transformers', 'sentence-transformers')
+            self._sentence_model = sentence_transformers.SentenceTransformer(
+                self.model, device='cpu', revision=self.revision)
+            self._sentence_model.max_seq_length = self.max_tokens
+            self._tokenizer = self._sentence_model.tokenizer
+            self._full_dims = self._sentence_model.get_sentence_embedding_dimension()
+        else:
+            ort = _install('onnxruntime', 'onnxruntime')
+            tokenizers = _install('tokenizers', 'tokenizers')
+            onnx_path, tokenizer_path = model_files(self.model, self.revision)
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+            options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self._session = ort.InferenceSession(str(onnx_path), options,
+                                                 providers=['CPUExecutionProvider'])
+            self._input_names = {i.name for i in self._session.get_inputs()}
+            self._tokenizer = tokenizers.Tokenizer.from_file(str(tokenizer_path))
+            self._tokenizer.no_padding()
+            self._tokenizer.enable_truncation(self.max_tokens)
+            self._pad_id = self._tokenizer.token_to_id('[PAD]') or self._tokenizer.token_to_id('<pad>') or 0
+            output = self._session.get_outputs()[0]
+            self._full_dims = output.shape[-1] if isinstance(output.shape[-1], int) else None
+            if self._full_dims is None:
+                self._full_dims = len(self._run_onnx([self._tokenizer.encode('probe').ids])[0])
+
+    def _run_onnx(self, ids: List[List[int]]) -> 'np.ndarray':
+        """One forward pass over a batch of token ids, padded per self.padding"""
+        width = self.max_tokens if self.padding == 'max' else max(len(row) for row in ids)
+        input_ids = np.full((len(ids), width), self._pad_id, dtype=np.int64)
+        mask = np.zeros((len(ids), width), dtype=np.int64)
+        for row, tokens in enumerate(ids):
+            input_ids[row, :len(tokens)] = tokens
+            mask[row, :len(tokens)] = 1
+        feed = {'input_ids': input_ids, 'attention_mask': mask}
+        if 'token_type_ids' in self._input_names:
+            feed['token_type_ids'] = np.zeros_like(input_ids)
+        output = self._session.run(None, feed)[0]
+        self.stats['padded_tokens'] += input_ids.size
+        if output.ndim == 2:
+            return output  # model already pools (sentence_embedding output)
+        if self.pooling == 'cls':
+            return output[:, 0]
+        weights = mask[:, :, None].astype(output.dtype)
+        return (output * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1)
+
+    def _encode(self, texts: List[str]) -> 'np.ndarray':
+        """Unit-length vectors for texts, in input order"""
+        self._load()
+        vectors = np.zeros((len(texts), self._full_dims), dtype=np.float32)
+        if self._sentence_model is not None:
+            lengths = [len(ids) for ids in self._tokenizer(texts, truncation=True,
+                                                           max_length=self.max_tokens)['input_ids']]
+            started = time.perf_counter()
+            vectors[:] = self._sentence_model.encode(texts, batch_size=self.batch_size,
+                                                     convert_to_numpy=True, show_progress_bar=False)
+            self.latencies.append(time.perf_counter() - started)
+            self.stats['requests'] += (len(texts) + self.batch_size - 1) // self.batch_size
+        else:
+            ids = [encoding.ids for encoding in self._tokenizer.encode_batch(texts)]
+            lengths = [len(row) for row in ids]
+            widths = [self.max_tokens] * len(ids) if self.padding == 'max' else lengths
+            for batch in token_batches(widths, self.batch_size, self.max_batch_tokens,
+                                       padded=True, sort=self.sort_by_length):
+                started = time.perf_counter()
+                vectors[batch] = self._run_onnx([ids[i] for i in batch])
+                self.latencies.append(time.perf_counter() - started)
+                self.stats['requests'] += 1
+        self.stats['inputs'] += len(texts)
+        self.stats['tokens'] += sum(lengths)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def _inputs(self, texts: List[str]) -> List[str]:
+        return [text or ' ' for text in texts]
+
+    def _encode_serial(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            return self._encode(texts).tolist()
+
+    def _finish(self, inputs: List[str], results: list, missing: List[int],
+                fresh: List[List[float]]) -> List[Optional[List[float]]]:
+        for i, vector in zip(missing, fresh):
+            results[i] = vector
+        if self.cache is not None and missing:
+            self.cache.put_many(self.cache_model, [inputs[i] for i in missing], fresh)
+        if self.dimensions is not None and results:
+            matrix = np.asarray(results, dtype=np.float32)[:, :self.dimensions]
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            results = matrix.tolist()
+        return results
+
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts, preserving order"""
+        inputs = self._inputs(texts)
+        results, missing = self._lookup(inputs)
+        fresh = self._encode_serial([inputs[i] for i in missing]) if missing else []
+        return self._finish(inputs, results, missing, fresh)
+
+    async def embed_async(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        embed() with only the model on a worker thread, so an event loop keeps
+        serving other stages; the cache is read and written on the caller's
+        thread, which owns its SQLite connection
+        """
+        inputs = self._inputs(texts)
+        results, missing = self._lookup(inputs)
+        fresh = []
+        if missing:
+            fresh = await asyncio.get_running_loop().run_in_executor(
+                None, self._encode_serial, [inputs[i] for i in missing])
+        return self._finish(inputs, results, missing, fresh)
@@ -0,0 +1,149 @@
+"""
+Cheap page triage before the expensive pdfplumber extractors
+Reads only the raw page objects (char, line, rect, curve and image counts,
+plus a few character-level signals, no text layout) and classifies each
+page as:
+
+  text    ordinary clause text            -> extract_text
+  table   enough ruling lines/rects       -> extract_text + table regions
+  toc     dot leaders / CONTENTS heading  -> skipped
+  cover   sparse or large-type front page -> skipped (unless it has a
+                                             numbered clause heading)
+  blank   (almost) no characters          -> skipped
+
+This replaces the processors' fixed "skip the first 3 pages". Features are
+cached per page, so re-runs classify without touching the PDF.
+"""
+
+import re
+import time
+from typing import Dict, List
+
+from clause_detector import detect_heading
+from table_extractor import is_table_page
+
+
+TEXT, TABLE, TOC, COVER, BLANK = 'text', 'table', 'toc', 'cover', 'blank'
+PAGE_CLASSES = (TEXT, TABLE, TOC, COVER, BLANK)
+
+# Classes whose text goes into chunks
+EXTRACT_TEXT = (TEXT, TABLE)
+
+# 2: clause_lines feature
+TRIAGE_KIND = 'triage/2'
+
+# pdfplumber object types counted per page
+OBJECT_KINDS = ('char', 'line', 'rect', 'curve', 'image')
+
+# Pages with at most this many characters are blank (running headers,
+# watermark lines and page numbers stay under it)
+BLANK_MAX_CHARS = 50
+
+# Front matter: only the first pages can be covers
+FRONT_MATTER_PAGES = 5
+COVER_MAX_CHARS = 600
+COVER_MIN_FONT = 20
+
+# Share of '.' characters above which dot leaders mark a contents page
+TOC_DOT_RATIO = 0.15
+TOC_HEADING_CHARS = 200
+CONTENTS_PATTERN = re.compile(r'C\s*O\s*N\s*T\s*E\s*N\s*T\s*S')
+
+
+def char_lines(chars: List[Dict]) -> List[str]:
+    """Rough text lines from char boxes: same baseline, a space at wide gaps"""
+    lines, line, last = [], [], None
+    for char in sorted(chars, key=lambda c: (round(c['top']), c['x0'])):
+        if last is None or abs(char['top'] - last['top']) > last['size'] / 2:
+            if line:
+                lines.append(''.join(line))
+            line = []
+        elif char['x0'] - last['x1'] > last['size'] * 0.2:
+            line.append(' ')
+        line.append(char['text'])
+        last = char
+    if line:
+        lines.append(''.join(line))
+    return lines
+
+
+def page_features(page) -> Dict:
+    """Object counts and character signals from the parsed page (no layout analysis)"""
+    objects = page.objects
+    chars = objects.get('char', [])
+    text = ''.join(char['text'] for char in chars)
+    features = {kind: len(objects.get(kind, [])) for kind in OBJECT_KINDS}
+    features['dots'] = text.count('.')
+    features['font_max'] = round(max((char['size'] for char in chars), default=0), 1)
+    features['contents'] = bool(CONTENTS_PATTERN.search(text[:TOC_HEADING_CHARS].upper()))
+    # Only front matter can be a cover, so other pages skip rebuilding lines
+    front = page.page_number <= FRONT_MATTER_PAGES
+    features['clause_lines'] = sum(1 for line in char_lines(chars) if detect_heading(line)) if front else 0
+    return features
+
+
+def classify_page(features: Dict, index: int) -> str:
+    """Page class from page_features; index is 0-based"""
+    chars = features['char']
+    # A short scope or foreword page with numbered clauses is content, not a cover
+    if (index < FRONT_MATTER_PAGES and not features['clause_lines']
+            and (chars < COVER_MAX_CHARS or features['font_max'] >= COVER_MIN_FONT)):
+        return COVER
+    if chars <= BLANK_MAX_CHARS:
+        return BLANK
+    if features['contents'] or features['dots'] / chars >= TOC_DOT_RATIO:
+        return TOC
+    if is_table_page(features):
+        return TABLE
+    return TEXT
+
+
+def triage_page(doc, index: int) -> str:
+    """Classify page index of an ExtractionCache document"""
+    return classify_page(doc.extract(index, TRIAGE_KIND, page_features), index)
+
+
+class TriageReport:
+    """Pages and seconds spent (triage vs extraction) per page class"""
+
+    def __init__(self):
+        self.pages = {name: 0 for name in PAGE_CLASSES}
+        self.triage_seconds = {name: 0.0 for name in PAGE_CLASSES}
+        self.extract_seconds = {name: 0.0 for name in PAGE_CLASSES}
+
+    def add(self, page_class: str, triage_seconds: float, extract_seconds: float = 0.0):
+        self.pages[page_class] += 1
+        self.triage_seconds[page_class] += triage_seconds
+        self.extract_seconds[page_class] += extract_seconds
+
+    def to_dict(self) -> Dict:
+        return {
+            name: {
+                'pages': self.pages[name],
+                'triage_seconds': round(self.triage_seconds[name], 4),
+                'extract_seconds': round(self.extract_seconds[name], 4),
+            }
+            for name in PAGE_CLASSES
+        }
+
+    def print_report(self):
+        print(f"\n📑 Page triage:")
+        print(f"  {'class':<7} {'pages':>6} {'triage':>10} {'extract':>10}")
+        for name in PAGE_CLASSES:
+            if self.pages[name]:
+                print(f"  {name:<7} {self.pages[name]:>6} "
+                      f"{self.triage_seconds[name]:>9.2f}s {self.extract_seconds[name]:>9.2f}s")
+        skipped = sum(self.pages[name] for name in PAGE_CLASSES if name not in EXTRACT_TEXT)
+        print(f"  Skipped {skipped} of {sum(self.pages.values())} pages\n")
+
+
+class Stopwatch:
+    """Split timer: lap() returns seconds since the previous lap"""
+
+    def __init__(self):
+        self.last = time.perf_counter()
+
+    def lap(self) -> float:
+        now = time.perf_counter()
+        elapsed, self.last = now - self.last, now
+        return elapsed
@@ -0,0 +1,197 @@
+"""
+Vector search over chunks stored in Postgres with pgvector
+Queries the vector table (bulk_loader.VECTOR_TABLE) written by
+upload_to_rcc_bot.py --pgvector, using its HNSW/IVFFlat cosine index, so
+every web worker shares one index instead of loading the JSON into memory.
+Results have the same shape as VectorIndex.search.
+
+--verify-artifact measures recall against exact search over the artifact
+the document was loaded from, matching rows by chunkIndex (the row's
+position in the artifact; chunk ids repeat) within that one document.
+
+Usage:
+  python pgvector_search.py "minimum cover for slab"
+  python pgvector_search.py --verify-artifact ../documents/IS_456_2000_v2_with_embeddings
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bulk_loader import VECTOR_COLUMN, VECTOR_TABLE, libpq_dsn, vector_literal
+from vector_search import format_citation
+
+
+# The inner query orders vectors alone by distance so Postgres can walk the
+# HNSW/IVFFlat index; document filters are applied to that candidate list
+SEARCH_SQL = f'''
+SELECT c."embeddingId", c."chunkIndex", c.content, c."clauseNumber", c."sectionTitle",
+       c."pageNumber", d."codeNumber", d.version, 1 - v.distance AS similarity
+FROM (
+    SELECT "chunkId", "documentId", "{VECTOR_COLUMN}" <=> %(query)s::vector AS distance
+    FROM {VECTOR_TABLE}
+    ORDER BY "{VECTOR_COLUMN}" <=> %(query)s::vector
+    LIMIT %(candidates)s
+) v JOIN chunks c ON c.id = v."chunkId" JOIN documents d ON d.id = v."documentId"
+WHERE d.status = 'INDEXED' AND (%(domain)s::text IS NULL OR d."domainId" = %(domain)s)
+  AND (%(document)s::text IS NULL OR d.id = %(document)s)
+ORDER BY v.distance
+LIMIT %(top_k)s
+'''
+
+LATEST_DOCUMENT_SQL = '''
+SELECT id FROM documents WHERE status = 'INDEXED' ORDER BY "indexedAt" DESC NULLS LAST LIMIT 1
+'''
+
+
+class PgVectorSearch:
+    """
+    ef_search  HNSW candidate list size (recall vs latency). Also the
+               number of nearest chunks fetched before document filters,
+               so a narrow --domain (or document) may return fewer than
+               top_k results
+    probes     IVFFlat lists scanned per query
+    """
+
+    def __init__(self, database_url: str, ef_search: int = 40, probes: int = 10):
+        import psycopg
+        self._psycopg = psycopg
+        self.dsn = libpq_dsn(database_url)
+        self.ef_search = ef_search
+        self.probes = probes
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = self._psycopg.connect(self.dsn, autocommit=True)
+            self._conn.execute(f'SET hnsw.ef_search = {int(self.ef_search)}')
+            self._conn.execute(f'SET ivfflat.probes = {int(self.probes)}')
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @property
+    def dims(self) -> int:
+        """Size of the stored vectors; query vectors must match it"""
+        column_type = self.conn.execute(
+            'SELECT format_type(atttypid, atttypmod) FROM pg_attribute '
+            'WHERE attrelid = %s::regclass AND attname = %s', (VECTOR_TABLE, VECTOR_COLUMN)
+        ).fetchone()[0]
+        return int(column_type[len('vector('):-1])
+
+    def search_vector(self, query, top_k: int = 5, domain: Optional[str] = None,
+                      document: Optional[str] = None) -> List[tuple]:
+        """Raw rows for one query vector, best first"""
+        return self.conn.execute(SEARCH_SQL, {
+            'query': vector_literal(query), 'domain': domain, 'document': document, 'top_k': top_k,
+            'candidates': max(top_k, self.ef_search),
+        }).fetchall()
+
+    def search(self, query, top_k: int = 5, min_similarity: float = 0.3,
+               domain: Optional[str] = None) -> List[Dict]:
+        """Results shaped like VectorStore.search: chunk, similarity, citation"""
+        results = []
+        for chunk_id, _, content, clause, title, page, code_number, version, similarity in \
+                self.search_vector(query, top_k, domain):
+            if similarity <= min_similarity:
+                continue
+            chunk = {
+                'id': chunk_id,
+                'code': f"{code_number}:{version}" if code_number and version else code_number,
+                'clause': clause,
+                'title': title,
+                'pages': [page] if page is not None else [],
+                'content': content,
+            }
+            results.append({'chunk': chunk, 'similarity': float(similarity),
+                            'citation': format_citation(chunk)})
+        return results
+
+
+def verify_against_artifact(search: PgVectorSearch, artifact: str, queries: int, top_k: int,
+                            document: Optional[str] = None):
+    """
+    Recall@k of the index vs exact search, using artifact rows as queries.
+    document is the documents.id loaded from the artifact (default: the
+    most recently indexed one); rows match on chunkIndex.
+    """
+    from vector_search import VectorIndex
+
+    if document is None:
+        row = search.conn.execute(LATEST_DOCUMENT_SQL).fetchone()
+        if row is None:
+            raise ValueError("no indexed document to verify against")
+        document = row[0]
+    exact = VectorIndex.from_artifact(artifact)
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(exact), size=min(queries, len(exact)), replace=False)
+
+    hits = 0
+    latencies = []
+    for row in picks:
+        # Perturb so the query is not an exact stored vector
+        query = exact.matrix[row] + rng.normal(0, 0.01, exact.dims).astype(np.float32)
+        expected, _ = exact.search_vector(query, top_k)
+        start = time.perf_counter()
+        found = {r[1] for r in search.search_vector(query, top_k, document=document)}
+        latencies.append(time.perf_counter() - start)
+        hits += len(found & set(expected.tolist()))
+
+    print(f"  Document: {document}")
+    print(f"  Queries: {len(picks)}")
+    print(f"  Recall@{top_k}: {hits / (len(picks) * top_k):.3f}")
+    print(f"  Latency: p50 {np.percentile(latencies, 50) * 1000:.2f} ms, "
+          f"p95 {np.percentile(latencies, 95) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search chunks with pgvector")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--min-similarity', type=float, default=0.3)
+    parser.add_argument('--domain', default=None, help="Restrict to one domain id (e.g. rcc)")
+    parser.add_argument('--ef-search', type=int, default=40)
+    parser.add_argument('--probes', type=int, default=10)
+    parser.add_argument('--verify-artifact', help="Compare against exact search over an artifact")
+    parser.add_argument('--queries', type=int, default=100, help="Queries for --verify-artifact")
+    parser.add_argument('--document', help="documents.id loaded from --verify-artifact "
+                                           "(default: the most recently indexed document)")
+    parser.add_argument('texts', nargs='*')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ DATABASE_URL environment variable not set!")
+        sys.exit(1)
+
+    search = PgVectorSearch(database_url, ef_search=args.ef_search, probes=args.probes)
+    try:
+        if args.verify_artifact:
+            print(f"\n{'='*60}")
+            print("pgvector Index Verification")
+            print(f"{'='*60}\n")
+            verify_against_artifact(search, args.verify_artifact, args.queries, args.top_k,
+                                    args.document)
+            print(f"\n{'='*60}\n")
+
+        if args.texts:
+            from embedding_engine import EmbeddingEngine
+
+            vectors = EmbeddingEngine.for_index(None, search.dims).embed(args.texts)
+            for text, vector in zip(args.texts, vectors):
+                print(f"🔍 {text}")
+                if vector is None:
+                    print("  ⚠️  Query embedding failed\n")
+                    continue
+                for result in search.search(vector, args.top_k, args.min_similarity, args.domain):
+                    print(f"  {result['similarity']:.3f}  {result['citation']}")
+                print()
+    finally:
+        search.close()
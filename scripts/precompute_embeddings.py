@@ -6,85 +6,115 @@ Generates embeddings once and saves to file for fast loading
 import sys
 import json
 import os
+import argparse
 from pathlib import Path
 from typing import List, Dict
 
-try:
-    from openai import OpenAI
-except ImportError:
-    print("Installing OpenAI...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "openai"])
-    from openai import OpenAI
+from embedding_engine import add_backend_arguments, create_engine
+from embedding_cache import EmbeddingCache, DEFAULT_CACHE_PATH
+from embedding_artifact import save_artifact
+from lexical_index import build_lexical_index
+from quantized_index import build_quantized_indexes
+from chunk_io import load_chunks
+from chunk_dedup import dedup_chunks, print_report
 
 
-def precompute_embeddings(chunks_file: str, output_file: str):
+def precompute_embeddings(chunks_file: str, output_file: str,
+                          batch_size: int = 64, concurrency: int = 4,
+                          cache_path: str = DEFAULT_CACHE_PATH,
+                          dtype: str = 'float32', write_json: bool = True,
+                          dimensions: int = None, truncate: bool = False,
+                          backend: str = 'openai', model: str = None, threads: int = None,
+                          runtime: str = 'onnx', max_batch_tokens: int = None,
+                          dedup: bool = True):
     """Generate and save embeddings for all chunks"""
     
-    # Check API key
+    # Check API key (the local backend needs neither key nor network)
     api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
+    if backend == 'openai' and not api_key:
         print("❌ OPENAI_API_KEY not set!")
-        print("Set it in environment or .env.local file")
+        print("Set it in environment or .env.local file (or use --backend local)")
         sys.exit(1)
     
-    client = OpenAI(api_key=api_key)
+    # Re-use vectors for chunks whose content has not changed
+    cache = EmbeddingCache(cache_path) if cache_path else None
+    engine = create_engine(backend, model, threads=threads, runtime=runtime, api_key=api_key,
+                           batch_size=batch_size, max_batch_tokens=max_batch_tokens,
+                           concurrency=concurrency, cache=cache,
+                           dimensions=dimensions, truncate=truncate)
     
     print(f"\n{'='*60}")
     print("Pre-computing Embeddings")
+    print(f"Model: {engine.model}, {engine.output_dims} dimensions"
+          + (" (truncated locally)" if engine.dimensions and truncate else ""))
     print(f"{'='*60}\n")
     
     # Load chunks
     print(f"📄 Loading chunks from: {chunks_file}")
-    with open(chunks_file, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
+    chunks = load_chunks(chunks_file)
     
     print(f"✅ Loaded {len(chunks)} chunks\n")
     
-    # Generate embeddings in batches
-    print("🔄 Generating embeddings...")
-    batch_size = 50  # Process 50 at a time
+    # Duplicates, contents pages and page headers are not worth a vector
+    if dedup:
+        chunks, report = dedup_chunks(chunks)
+        print_report(report)
+        print()
+    
+    # Generate embeddings in batched, concurrent requests
     total = len(chunks)
     
-    for i in range(0, total, batch_size):
-        batch = chunks[i:i + batch_size]
-        batch_num = (i // batch_size) + 1
-        total_batches = (total + batch_size - 1) // batch_size
-        
-        print(f"  Batch {batch_num}/{total_batches} (chunks {i+1}-{min(i+batch_size, total)})...")
-        
-        for chunk in batch:
-            # Skip if already has embedding
-            if 'embedding' in chunk and chunk['embedding']:
-                continue
-            
-            # Generate embedding
-            try:
-                response = client.embeddings.create(
-                    model='text-embedding-3-small',
-                    input=chunk['content'][:8000]  # Limit to 8k chars
-                )
-                chunk['embedding'] = response.data[0].embedding
-            except Exception as e:
-                print(f"    ⚠️  Error on chunk {chunk['id']}: {e}")
-                chunk['embedding'] = None
+    # Skip chunks that already have an embedding
+    pending = [chunk for chunk in chunks if not chunk.get('embedding')]
+    if backend == 'local':
+        print(f"🔄 Generating {len(pending)} embeddings "
+              f"(<= {batch_size} inputs / {engine.max_batch_tokens} padded tokens per batch, "
+              f"{engine.threads} threads)...")
+    else:
+        print(f"🔄 Generating {len(pending)} embeddings "
+              f"(<= {batch_size} inputs / {engine.max_batch_tokens} tokens per request, "
+              f"{concurrency} in flight)...")
+    
+    vectors = engine.embed([chunk['content'] for chunk in pending])
+    for chunk, vector in zip(pending, vectors):
+        chunk['embedding'] = vector
+    
+    if cache:
+        print(f"  Cache: {engine.stats['cache_hits']} hits, "
+              f"{engine.stats['cache_misses']} misses (embedded)")
+        cache.close()
+    if engine.stats['retries'] or engine.stats['failed']:
+        print(f"  Retries: {engine.stats['retries']}, failed inputs: {engine.stats['failed']}")
     
     # Count successful embeddings
     successful = sum(1 for c in chunks if c.get('embedding'))
     print(f"\n✅ Generated {successful}/{total} embeddings\n")
     
-    # Save to file
-    print(f"💾 Saving to: {output_file}")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(chunks, f, indent=2, ensure_ascii=False)
+    # Save binary artifact (<output>.npy + <output>.meta.json)
+    artifact_base = str(Path(output_file).with_suffix(''))
+    matrix_path, meta_path = save_artifact(chunks, artifact_base, dtype=dtype, model=engine.model)
+    print(f"💾 Saved {dtype} matrix to: {matrix_path}")
+    print(f"💾 Saved metadata to: {meta_path}")
+    bm25_path, refs_path = build_lexical_index(artifact_base, chunks)
+    print(f"💾 Saved lexical index to: {bm25_path} (+ {refs_path.name})")
+    int8_path, binary_path = build_quantized_indexes(artifact_base)
+    print(f"💾 Saved quantized variants to: {int8_path} (+ {binary_path.name})")
+    
+    # JSON copy for the Node VectorStore loader (compact, no indentation)
+    if write_json:
+        print(f"💾 Saving to: {output_file}")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(chunks, f, ensure_ascii=False, separators=(',', ':'))
     
     # Calculate file sizes
     original_size = os.path.getsize(chunks_file) / (1024 * 1024)
-    new_size = os.path.getsize(output_file) / (1024 * 1024)
+    artifact_size = (os.path.getsize(matrix_path) + os.path.getsize(meta_path)) / (1024 * 1024)
     
     print(f"\n📊 Summary:")
     print(f"  Original file: {original_size:.2f} MB")
-    print(f"  With embeddings: {new_size:.2f} MB")
+    print(f"  Binary artifact: {artifact_size:.2f} MB")
+    if write_json:
+        print(f"  JSON with embeddings: {os.path.getsize(output_file) / (1024 * 1024):.2f} MB")
     print(f"  Chunks processed: {successful}/{total}")
     print(f"{'='*60}\n")
     
@@ -93,11 +123,38 @@ def precompute_embeddings(chunks_file: str, output_file: str):
 
 
 if __name__ == "__main__":
-    chunks_file = r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000_chunks.json"
-    output_file = r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000_with_embeddings.json"
+    parser = argparse.ArgumentParser(description="Pre-compute embeddings for IS code chunks")
+    parser.add_argument('--input', default=r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000_chunks.json")
+    parser.add_argument('--output', default=r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000_with_embeddings.json")
+    parser.add_argument('--batch-size', type=int, default=64, help="Inputs per request or batch at most")
+    parser.add_argument('--max-batch-tokens', type=int,
+                        help="Tokens per request or batch at most (default 32000 API, 2048 local)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Requests in flight")
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH), help="Embedding cache file")
+    parser.add_argument('--no-cache', action='store_true', help="Embed every chunk again")
+    parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32',
+                        help="Element type of the .npy matrix")
+    parser.add_argument('--no-json', action='store_true',
+                        help="Only write the binary artifact, skip the JSON copy")
+    parser.add_argument('--dimensions', type=int, help="Reduced embedding size (e.g. 512)")
+    parser.add_argument('--truncate', action='store_true',
+                        help="Cut full (cached) vectors to --dimensions locally instead of requesting them")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Embed duplicate, contents-page and header lines as loaded")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+    
+    chunks_file = args.input
+    output_file = args.output
     
     if not Path(chunks_file).exists():
         print(f"❌ Chunks file not found: {chunks_file}")
         sys.exit(1)
     
-    precompute_embeddings(chunks_file, output_file)
+    precompute_embeddings(chunks_file, output_file, args.batch_size, args.concurrency,
+                          cache_path=None if args.no_cache else args.cache,
+                          dtype=args.dtype, write_json=not args.no_json,
+                          dimensions=args.dimensions, truncate=args.truncate,
+                          backend=args.backend, model=args.model, threads=args.threads,
+                          runtime=args.runtime, max_batch_tokens=args.max_batch_tokens,
+                          dedup=not args.no_dedup)
@@ -5,71 +5,106 @@ Pre-compute embeddings for IS 456:2000 V2 chunks
 import sys
 import json
 import os
+import argparse
 from pathlib import Path
 
-try:
-    from openai import OpenAI
-except ImportError:
-    print("Installing OpenAI...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "openai"])
-    from openai import OpenAI
+from embedding_engine import add_backend_arguments, create_engine
+from embedding_cache import EmbeddingCache, DEFAULT_CACHE_PATH
+from embedding_artifact import save_artifact
+from lexical_index import build_lexical_index
+from quantized_index import build_quantized_indexes
+from instrumentation import Metrics, add_arguments
+from chunk_dedup import dedup_chunks, print_report
 
 
-def main():
+def main(metrics: Metrics, dimensions: int = None, truncate: bool = False,
+         backend: str = 'openai', model: str = None, threads: int = None, runtime: str = 'onnx',
+         dedup: bool = True):
     api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        print("❌ OPENAI_API_KEY not set!")
+    if backend == 'openai' and not api_key:
+        print("❌ OPENAI_API_KEY not set! (or use --backend local)")
         sys.exit(1)
     
-    client = OpenAI(api_key=api_key)
+    cache = EmbeddingCache(DEFAULT_CACHE_PATH)
+    engine = create_engine(backend, model, threads=threads, runtime=runtime, api_key=api_key,
+                           batch_size=64, concurrency=4, cache=cache,
+                           dimensions=dimensions, truncate=truncate)
     
     chunks_file = r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000_v2.json"
     output_file = r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000_v2_with_embeddings.json"
     
     print(f"\n{'='*60}")
     print("Pre-computing Embeddings for IS 456:2000 V2")
+    print(f"Model: {engine.model}, {engine.output_dims} dimensions")
     print(f"{'='*60}\n")
     
-    with open(chunks_file, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
+    with metrics.stage('load') as stage:
+        with open(chunks_file, 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        stage.items = len(chunks)
     
     print(f"✅ Loaded {len(chunks)} chunks\n")
+    
+    if dedup:
+        with metrics.stage('dedup') as stage:
+            chunks, report = dedup_chunks(chunks)
+            stage.items = report['input_chunks']
+        print_report(report)
+        metrics.count('dedup_saved_chunks', report['saved_chunks'])
+        metrics.count('dedup_saved_tokens', report['saved_tokens'])
+        print()
     print("🔄 Generating embeddings...")
     
-    batch_size = 20
     total = len(chunks)
+    pending = [chunk for chunk in chunks if not chunk.get('embedding')]
     
-    for i in range(0, total, batch_size):
-        batch = chunks[i:i + batch_size]
-        batch_num = (i // batch_size) + 1
-        total_batches = (total + batch_size - 1) // batch_size
-        
-        print(f"  Batch {batch_num}/{total_batches}...")
-        
-        for chunk in batch:
-            if 'embedding' in chunk and chunk['embedding']:
-                continue
-            
-            try:
-                response = client.embeddings.create(
-                    model='text-embedding-3-small',
-                    input=chunk['content'][:8000]
-                )
-                chunk['embedding'] = response.data[0].embedding
-            except Exception as e:
-                print(f"    ⚠️  Error: {e}")
-                chunk['embedding'] = None
+    with metrics.stage('embed') as stage:
+        vectors = engine.embed([chunk['content'] for chunk in pending])
+        stage.items = len(pending)
+        stage.latencies.extend(engine.latencies)
+    for chunk, vector in zip(pending, vectors):
+        chunk['embedding'] = vector
+    for name, value in engine.stats.items():
+        metrics.count(name, value)
+    
+    print(f"  Cache: {engine.stats['cache_hits']} hits, "
+          f"{engine.stats['cache_misses']} misses (embedded)")
+    cache.close()
     
     successful = sum(1 for c in chunks if c.get('embedding'))
     print(f"\n✅ Generated {successful}/{total} embeddings\n")
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(chunks, f, indent=2, ensure_ascii=False)
+    with metrics.stage('save') as stage:
+        artifact_base = output_file[:-len('.json')]
+        matrix_path, meta_path = save_artifact(chunks, artifact_base, dtype='float32', model=engine.model)
+        print(f"💾 Saved matrix to: {matrix_path}")
+        print(f"💾 Saved metadata to: {meta_path}")
+        bm25_path, refs_path = build_lexical_index(artifact_base, chunks)
+        print(f"💾 Saved lexical index to: {bm25_path} (+ {refs_path.name})")
+        int8_path, binary_path = build_quantized_indexes(artifact_base)
+        print(f"💾 Saved quantized variants to: {int8_path} (+ {binary_path.name})")
+        
+        # Compact JSON copy for the Node VectorStore loader
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(chunks, f, ensure_ascii=False, separators=(',', ':'))
+        stage.items = successful
     
     print(f"💾 Saved to: {output_file}")
     print(f"✅ Done!")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Pre-compute embeddings for IS 456:2000 V2 chunks")
+    parser.add_argument('--dimensions', type=int, help="Reduced embedding size (e.g. 512)")
+    parser.add_argument('--truncate', action='store_true',
+                        help="Cut full (cached) vectors to --dimensions locally instead of requesting them")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Embed duplicate, contents-page and header lines as loaded")
+    add_backend_arguments(parser)
+    add_arguments(parser)
+    args = parser.parse_args()
+    
+    metrics = Metrics.from_args('precompute_v2', args)
+    with metrics.session():
+        main(metrics, args.dimensions, args.truncate,
+             args.backend, args.model, args.threads, args.runtime, not args.no_dedup)
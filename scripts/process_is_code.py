@@ -9,36 +9,39 @@ import re
 from pathlib import Path
 from typing import List, Dict, Any
 
-try:
-    import pdfplumber
-except ImportError:
-    print("Installing pdfplumber...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pdfplumber"])
-    import pdfplumber
+from extraction_cache import ExtractionCache, DEFAULT_EXTRACTION_CACHE
+from page_triage import BLANK, TABLE, TriageReport, Stopwatch, triage_page
 
 
 class ISCodeProcessor:
-    def __init__(self, pdf_path: str, code_number: str = "IS 456:2000"):
+    def __init__(self, pdf_path: str, code_number: str = "IS 456:2000",
+                 extraction_cache: str = DEFAULT_EXTRACTION_CACHE):
         self.pdf_path = pdf_path
         self.code_number = code_number
+        self.extraction_cache = extraction_cache
         self.chunks = []
         
     def extract_full_text(self) -> List[Dict[str, Any]]:
         """Extract text from all pages with metadata"""
         pages_data = []
+        report = TriageReport()
         
-        with pdfplumber.open(self.pdf_path) as pdf:
-            total_pages = len(pdf.pages)
+        with ExtractionCache(self.pdf_path, self.extraction_cache) as doc:
+            total_pages = doc.page_count
             print(f"📄 Processing {total_pages} pages...\n")
             
-            for i, page in enumerate(pdf.pages):
+            for i in range(total_pages):
                 page_num = i + 1
                 if page_num % 10 == 0:
                     print(f"  Processed {page_num}/{total_pages} pages...")
                 
-                text = page.extract_text()
-                tables = page.extract_tables()
+                # Triage first: no text on blank pages, tables only on ruled pages
+                watch = Stopwatch()
+                page_class = triage_page(doc, i)
+                triage_seconds = watch.lap()
+                text = doc.extract_text(i) if page_class != BLANK else None
+                tables = doc.extract_tables(i) if page_class == TABLE else []
+                report.add(page_class, triage_seconds, watch.lap())
                 
                 pages_data.append({
                     'page_num': page_num,
@@ -47,6 +50,7 @@ class ISCodeProcessor:
                     'has_tables': len(tables) > 0 if tables else False
                 })
         
+        report.print_report()
         print(f"✅ Extracted {len(pages_data)} pages\n")
         return pages_data
     
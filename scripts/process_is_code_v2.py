@@ -1,82 +1,212 @@
 """
 IS Code PDF Processor v2
-Extracts FULL clause content, not just TOC entries
+Extracts FULL clause content, not just TOC entries.
+Tables become separate 'table' chunks (see table_extractor.py).
+Cover, contents and blank pages are skipped by page triage (page_triage.py).
 """
 
 import sys
+import os
 import json
 import re
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
 
-try:
-    import pdfplumber
-except ImportError:
-    print("Installing pdfplumber...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pdfplumber"])
-    import pdfplumber
+from chunk_dedup import page_edges
+from chunk_io import write_jsonl
+from clause_detector import classify_line, detect_heading
+from extraction_cache import ExtractionCache, DEFAULT_EXTRACTION_CACHE
+from instrumentation import Metrics, add_arguments
+from page_triage import EXTRACT_TEXT, TABLE, Stopwatch, TriageReport, triage_page
+from table_extractor import TableStage, extract_regions
+from token_splitter import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS, TokenSplitter, count_tokens
+
+
+# Pages per work unit in parallel extraction. Small enough to balance uneven
+# pages (tables are slow), large enough to amortise re-opening the PDF.
+PAGES_PER_TASK = 16
+
+
+# (page_number, page_class, text, table_regions, triage_seconds, extract_seconds)
+PageResult = Tuple[int, str, Optional[str], List[Dict], float, float]
+
+
+def _extract_page(doc: ExtractionCache, index: int, tables: bool) -> PageResult:
+    """Triage one page, then run only the extractors its class needs (same parsed page)"""
+    watch = Stopwatch()
+    page_class = triage_page(doc, index)
+    triage_seconds = watch.lap()
+    
+    text, regions = None, []
+    if page_class in EXTRACT_TEXT:
+        text = doc.extract_text(index)
+        if tables and page_class == TABLE:
+            regions = extract_regions(doc, index)
+    return index + 1, page_class, text, regions, triage_seconds, watch.lap()
+
+
+def _extract_page_range(task: Tuple[str, str, str, List[int], bool]) -> List[PageResult]:
+    """Worker: open the PDF (through the cache) independently and extract the given page indices"""
+    pdf_path, cache_path, pdf_hash, indices, tables = task
+    results = []
+    with ExtractionCache(pdf_path, cache_path, pdf_hash=pdf_hash) as doc:
+        for index in indices:
+            results.append(_extract_page(doc, index, tables))
+            # Release the write lock between pages; other workers share the cache
+            doc.commit()
+    return results
 
 
 class ISCodeProcessorV2:
-    def __init__(self, pdf_path: str, code_number: str = "IS 456:2000"):
+    def __init__(self, pdf_path: str, code_number: str = "IS 456:2000",
+                 workers: int = 1, extraction_cache: str = DEFAULT_EXTRACTION_CACHE,
+                 tables: bool = True, metrics: Metrics = None,
+                 max_tokens: int = DEFAULT_MAX_TOKENS, overlap_tokens: int = DEFAULT_OVERLAP_TOKENS):
         self.pdf_path = pdf_path
         self.code_number = code_number
+        self.workers = workers
+        # None disables the on-disk extraction cache
+        self.extraction_cache = extraction_cache
+        self.tables = tables
+        # Table regions found during extraction, keyed by page number,
+        # consumed by iter_tables() as the pages stream past
+        self.table_regions = {}
+        self.table_chunks = []
+        # First / last lines of each text page, for chunk_dedup's furniture pass
+        self.page_edges = {}
+        self.triage = TriageReport()
+        self.metrics = metrics or Metrics('process_is_code_v2')
+        self.splitter = TokenSplitter(max_tokens, overlap_tokens)
         self.chunks = []
         
     def extract_all_text(self) -> str:
         """Extract all text from PDF as one continuous string"""
+        combined = self.join_pages(self.iter_tables(self.iter_pages()))
+        print(f"✅ Extracted {len(combined):,} characters\n")
+        return combined
+    
+    @staticmethod
+    def join_pages(pages: Iterable[Tuple[int, str]]) -> str:
+        """Join page texts into one string with [PAGE n] markers"""
         full_text = []
         
-        with pdfplumber.open(self.pdf_path) as pdf:
-            total_pages = len(pdf.pages)
+        for i, text in pages:
+            if text:
+                # Add page marker
+                full_text.append(f"\n[PAGE {i}]\n")
+                full_text.append(text)
+        
+        return '\n'.join(full_text)
+    
+    def iter_pages(self) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) for the pages triage classes as text or table, in page order"""
+        self.triage = TriageReport()
+        with ExtractionCache(self.pdf_path, self.extraction_cache) as doc:
+            total_pages = doc.page_count
             print(f"📄 Extracting text from {total_pages} pages...\n")
             
-            # Skip first 3 pages (cover, disclaimer, title)
-            for i, page in enumerate(pdf.pages[3:], start=4):
-                if i % 20 == 0:
-                    print(f"  Page {i}/{total_pages}...")
-                
-                text = page.extract_text()
-                if text:
-                    # Add page marker
-                    full_text.append(f"\n[PAGE {i}]\n")
-                    full_text.append(text)
+            results = self.extract_pages(doc, range(total_pages))
+            
+            # Cover, contents and blank pages are dropped here
+            for page_number, page_class, text, regions, triage_seconds, extract_seconds in results:
+                self.triage.add(page_class, triage_seconds, extract_seconds)
+                if regions:
+                    self.table_regions[page_number] = regions
+                if page_class in EXTRACT_TEXT:
+                    self.page_edges[page_number] = page_edges(text)
+                    yield page_number, text
         
-        combined = '\n'.join(full_text)
-        print(f"✅ Extracted {len(combined):,} characters\n")
-        return combined
+        # Summed per page, so with workers these exceed the extract wall time
+        triage = self.triage
+        self.metrics.record('extract.triage', seconds=sum(triage.triage_seconds.values()),
+                            items=sum(triage.pages.values()))
+        self.metrics.record('extract.pdfplumber', seconds=sum(triage.extract_seconds.values()),
+                            items=sum(triage.pages[name] for name in EXTRACT_TEXT))
+        triage.print_report()
+    
+    def extract_pages(self, doc: ExtractionCache, indices: Iterable[int]) -> Iterator[PageResult]:
+        """Triage and extract the given page indices of doc, in order, across the worker pool if any"""
+        indices = list(indices)
+        if self.workers > 1:
+            doc.commit()
+            return self._extract_parallel(indices, doc.page_count, doc.pdf_hash)
+        return self._extract_serial(doc, indices)
+    
+    def _extract_serial(self, doc: ExtractionCache, indices: List[int]) -> Iterator[PageResult]:
+        """Triage and extract pages in a single process"""
+        total_pages = doc.page_count
+        for index in indices:
+            i = index + 1
+            if i % 20 == 0:
+                print(f"  Page {i}/{total_pages}...")
+            yield _extract_page(doc, index, self.tables)
+    
+    def _extract_parallel(self, indices: List[int], total_pages: int,
+                          pdf_hash: str = None) -> Iterator[PageResult]:
+        """Triage and extract pages across a process pool, preserving page order"""
+        # Hashed once here rather than by every page-range task
+        tasks = [
+            (self.pdf_path, self.extraction_cache, pdf_hash, indices[start:start + PAGES_PER_TASK],
+             self.tables)
+            for start in range(0, len(indices), PAGES_PER_TASK)
+        ]
+        print(f"  Using {self.workers} workers ({len(tasks)} page ranges)...")
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # Keep a bounded window of ranges in flight and consume them in
+            # submission order, so pages stay sorted and memory stays flat
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(_extract_page_range, task))
+                if len(pending) >= self.workers * 2:
+                    yield from self._finish_range(pending.popleft(), total_pages)
+            while pending:
+                yield from self._finish_range(pending.popleft(), total_pages)
+    
+    @staticmethod
+    def _finish_range(future, total_pages: int) -> List[PageResult]:
+        page_range = future.result()
+        print(f"  Page {page_range[-1][0]}/{total_pages}...")
+        return page_range
+    
+    def iter_tables(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        """Pass pages through, building self.table_chunks from the tables found on them"""
+        stage = TableStage(self.code_number)
+        self.table_chunks = stage.chunks
+        yield from stage.observe(pages, self.table_regions)
+    
+    @staticmethod
+    def iter_lines(pages: Iterable[Tuple[int, str]]) -> Iterator[str]:
+        """
+        Lazily yield the same lines as extract_all_text().split('\n'):
+        a blank line, the [PAGE n] marker and a blank line before each page
+        """
+        for i, text in pages:
+            if text:
+                yield ''
+                yield f"[PAGE {i}]"
+                yield ''
+                yield from text.split('\n')
     
     def detect_clause(self, line: str) -> Tuple[str, str, int]:
         """Detect if a line is a clause heading. Returns (clause_num, title, level) or None"""
-        line = line.strip()
-        
-        # Pattern: "26.4.2.1 Nominal Cover to Meet Durability Requirements"
-        # Matches: 1.2, 26.4, 26.4.2, 26.4.2.1
-        match = re.match(r'^(\d+(?:\.\d+){0,3})\s+([A-Z][^0-9\n]{3,})$', line)
-        if match:
-            clause_num = match.group(1)
-            title = match.group(2).strip()
-            level = len(clause_num.split('.'))
-            return (clause_num, title, level)
-        
-        # Pattern: "SECTION 1 GENERAL"
-        match = re.match(r'^(SECTION\s+\d+)\s+(.+)$', line)
-        if match:
-            return (match.group(1), match.group(2).strip(), 0)
-        
-        # Pattern: "ANNEX A" or "ANNEX B-1"
-        match = re.match(r'^(ANNEX\s+[A-Z](?:-\d+)?)\s*(.*)$', line)
-        if match:
-            return (match.group(1), match.group(2).strip() or "Annex", 0)
-        
-        return None
+        # Patterns (see clause_detector.HEADING_PATTERN):
+        #   "26.4.2.1 Nominal Cover to Meet Durability Requirements"
+        #   "SECTION 1 GENERAL"
+        #   "ANNEX A" or "ANNEX B-1"
+        return detect_heading(line)
     
     def chunk_by_content(self, full_text: str) -> List[Dict[str, Any]]:
         """Create chunks with FULL content between clause headings"""
-        lines = full_text.split('\n')
-        chunks = []
-        
+        chunks = list(self.iter_chunks(full_text.split('\n')))
+        print(f"✅ Created {len(chunks)} content-rich chunks\n")
+        return chunks
+    
+    def iter_chunks(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Yield chunks one at a time as each clause heading closes the previous one"""
         current_clause = None
         current_title = None
         current_level = 0
@@ -85,29 +215,28 @@ class ISCodeProcessorV2:
         current_page = 0
         
         for line in lines:
+            # Page marker or clause heading, classified in one pass
+            page_number, clause_info = classify_line(line)
+            
             # Track page numbers
-            page_match = re.match(r'\[PAGE (\d+)\]', line)
-            if page_match:
-                current_page = int(page_match.group(1))
+            if page_number is not None:
+                current_page = page_number
                 continue
             
             # Skip empty lines at chunk start
             if not current_content and not line.strip():
                 continue
             
-            # Check for new clause
-            clause_info = self.detect_clause(line)
-            
             if clause_info:
                 # Save previous chunk if it has content
                 if current_content and len(''.join(current_content)) > 50:
-                    chunks.append(self._create_chunk(
+                    yield self._create_chunk(
                         current_clause, 
                         current_title,
                         current_level,
                         current_content,
                         list(current_pages)
-                    ))
+                    )
                 
                 # Start new chunk
                 current_clause, current_title, current_level = clause_info
@@ -121,16 +250,13 @@ class ISCodeProcessorV2:
         
         # Add final chunk
         if current_content and len(''.join(current_content)) > 50:
-            chunks.append(self._create_chunk(
+            yield self._create_chunk(
                 current_clause,
                 current_title, 
                 current_level,
                 current_content,
                 list(current_pages)
-            ))
-        
-        print(f"✅ Created {len(chunks)} content-rich chunks\n")
-        return chunks
+            )
     
     def _create_chunk(self, clause: str, title: str, level: int, 
                       content: List[str], pages: List[int]) -> Dict:
@@ -152,42 +278,33 @@ class ISCodeProcessorV2:
             'pages': sorted(pages),
             'content': text,
             'char_count': len(text),
-            'word_count': len(text.split())
+            'word_count': len(text.split()),
+            'token_count': count_tokens(text)
         }
     
-    def split_large_chunks(self, chunks: List[Dict], max_words: int = 500) -> List[Dict]:
+    def split_large_chunks(self, chunks: List[Dict]) -> List[Dict]:
         """Split chunks that are too large for embedding"""
-        final_chunks = []
-        
+        return list(self.iter_split(chunks))
+    
+    def iter_split(self, chunks: Iterable[Dict]) -> Iterator[Dict]:
+        """Streaming version of split_large_chunks (token budget and overlap from self.splitter)"""
         for chunk in chunks:
-            if chunk['word_count'] <= max_words:
-                final_chunks.append(chunk)
+            if chunk['token_count'] <= self.splitter.max_tokens:
+                yield chunk
             else:
-                # Split into smaller parts
-                words = chunk['content'].split()
-                parts = []
-                current = []
-                
-                for word in words:
-                    current.append(word)
-                    if len(current) >= max_words:
-                        parts.append(' '.join(current))
-                        current = []
-                
-                if current:
-                    parts.append(' '.join(current))
+                # Cut at sentence / sub-clause boundaries, with overlap
+                parts = self.splitter.split(chunk['content'])
                 
                 # Create sub-chunks
-                for i, part in enumerate(parts):
+                for i, (part, tokens) in enumerate(parts):
                     sub_chunk = chunk.copy()
                     sub_chunk['id'] = f"{chunk['id']}_part{i+1}"
                     sub_chunk['content'] = part
                     sub_chunk['char_count'] = len(part)
                     sub_chunk['word_count'] = len(part.split())
+                    sub_chunk['token_count'] = tokens
                     sub_chunk['part'] = f"{i+1}/{len(parts)}"
-                    final_chunks.append(sub_chunk)
-        
-        return final_chunks
+                    yield sub_chunk
     
     def process(self) -> List[Dict]:
         """Main processing pipeline"""
@@ -198,13 +315,22 @@ class ISCodeProcessorV2:
         print(f"{'='*60}\n")
         
         # Step 1: Extract all text
-        full_text = self.extract_all_text()
+        with self.metrics.stage('extract') as stage:
+            full_text = self.extract_all_text()
+            stage.items = sum(self.triage.pages.values())
         
         # Step 2: Chunk by clause (with full content)
-        chunks = self.chunk_by_content(full_text)
+        with self.metrics.stage('chunk') as stage:
+            chunks = self.chunk_by_content(full_text)
+            stage.items = len(chunks)
         
         # Step 3: Split large chunks
-        chunks = self.split_large_chunks(chunks, max_words=500)
+        with self.metrics.stage('split') as stage:
+            chunks = self.split_large_chunks(chunks)
+            
+            # Step 4: Table chunks (kept whole, not split)
+            chunks += self.table_chunks
+            stage.items = len(chunks)
         
         # Stats
         total_chars = sum(c['char_count'] for c in chunks)
@@ -214,12 +340,60 @@ class ISCodeProcessorV2:
         print(f"  Total chunks: {len(chunks)}")
         print(f"  Total characters: {total_chars:,}")
         print(f"  Average words/chunk: {avg_words}")
+        print(f"  Total tokens: {sum(c['token_count'] for c in chunks):,}")
         print(f"  Chunks with clauses: {sum(1 for c in chunks if c['clause'])}")
+        print(f"  Table chunks: {len(self.table_chunks)}")
         print(f"{'='*60}\n")
         
         self.chunks = chunks
         return chunks
     
+    def process_to_jsonl(self, output_path: str) -> Dict[str, int]:
+        """
+        Streaming pipeline: pages -> lines -> chunks -> split -> JSON Lines.
+        Nothing holds the whole document; peak memory follows the largest clause.
+        """
+        print(f"\n{'='*60}")
+        print(f"Processing IS Code (V2 - Streaming)")
+        print(f"Code: {self.code_number}")
+        print(f"File: {self.pdf_path}")
+        print(f"{'='*60}\n")
+        
+        stats = {'chunks': 0, 'chars': 0, 'words': 0, 'tokens': 0, 'with_clause': 0, 'tables': 0}
+        
+        def counted(chunks):
+            for chunk in chunks:
+                stats['chunks'] += 1
+                stats['chars'] += chunk['char_count']
+                stats['words'] += chunk['word_count']
+                stats['tokens'] += chunk['token_count']
+                stats['with_clause'] += 1 if chunk['clause'] else 0
+                stats['tables'] += 1 if chunk.get('type') == 'table' else 0
+                yield chunk
+        
+        def with_tables(chunks):
+            yield from chunks
+            # Every page has been seen once the text chunks are exhausted
+            yield from self.table_chunks
+        
+        # Stages interleave while streaming, so they are timed as one
+        with self.metrics.stage('stream') as stage:
+            lines = self.iter_lines(self.iter_tables(self.iter_pages()))
+            chunks = self.iter_split(self.iter_chunks(lines))
+            write_jsonl(counted(with_tables(chunks)), output_path)
+            stage.items = stats['chunks']
+        
+        print(f"\n📊 Processing Summary:")
+        print(f"  Total chunks: {stats['chunks']}")
+        print(f"  Total characters: {stats['chars']:,}")
+        print(f"  Average words/chunk: {stats['words'] // max(stats['chunks'], 1)}")
+        print(f"  Total tokens: {stats['tokens']:,}")
+        print(f"  Chunks with clauses: {stats['with_clause']}")
+        print(f"  Table chunks: {stats['tables']}")
+        print(f"✅ Streamed {stats['chunks']} chunks to: {output_path}")
+        print(f"{'='*60}\n")
+        return stats
+    
     def save(self, output_path: str):
         """Save chunks to JSON"""
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -230,22 +404,57 @@ class ISCodeProcessorV2:
         print("📋 Sample chunks:\n")
         for chunk in self.chunks[:3]:
             print(f"  [{chunk['clause']}] {chunk['title']}")
-            print(f"  Pages: {chunk['pages']}, Words: {chunk['word_count']}")
+            print(f"  Pages: {chunk['pages']}, Words: {chunk['word_count']}, Tokens: {chunk['token_count']}")
             print(f"  Preview: {chunk['content'][:150]}...")
             print()
 
 
 if __name__ == "__main__":
-    pdf_path = r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000.pdf"
-    output_path = r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000_v2.json"
+    parser = argparse.ArgumentParser(description="Process an IS code PDF into full-content chunks")
+    parser.add_argument('--input', default=r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000.pdf")
+    parser.add_argument('--output', default=r"C:\Users\moink\Desktop\CivilLLM\documents\IS_456_2000_v2.json")
+    parser.add_argument('--code', default="IS 456:2000")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Extraction processes (0 = one per CPU, 1 = serial)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write chunks incrementally as JSON Lines (use a .jsonl output)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-extract changed pages and write a chunk delta")
+    parser.add_argument('--no-extract-cache', action='store_true',
+                        help="Always parse the PDF instead of reading the extraction cache")
+    parser.add_argument('--no-tables', action='store_true',
+                        help="Skip the table stage (no separate table chunks)")
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS,
+                        help="Split chunks above this many model tokens")
+    parser.add_argument('--overlap-tokens', type=int, default=DEFAULT_OVERLAP_TOKENS,
+                        help="Tokens repeated at the start of each split part")
+    add_arguments(parser)
+    args = parser.parse_args()
+    
+    pdf_path = args.input
+    output_path = args.output
     
     if not Path(pdf_path).exists():
         print(f"❌ PDF not found: {pdf_path}")
         sys.exit(1)
     
-    processor = ISCodeProcessorV2(pdf_path, "IS 456:2000")
-    processor.process()
-    processor.save(output_path)
+    workers = args.workers or os.cpu_count() or 1
+    processor = ISCodeProcessorV2(pdf_path, args.code, workers=workers,
+                                  extraction_cache=None if args.no_extract_cache else DEFAULT_EXTRACTION_CACHE,
+                                  tables=not args.no_tables,
+                                  metrics=Metrics.from_args('process_is_code_v2', args),
+                                  max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens)
+    with processor.metrics.session():
+        if args.incremental:
+            from incremental import process_incremental
+            process_incremental(processor, output_path)
+        elif args.stream:
+            processor.process_to_jsonl(output_path)
+        else:
+            processor.process()
+            with processor.metrics.stage('save') as stage:
+                processor.save(output_path)
+                stage.items = len(processor.chunks)
     
     print("🎯 Next step: Run precompute_embeddings.py on the new file")
     print(f"   python precompute_embeddings.py --input {output_path}")
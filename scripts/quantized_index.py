@@ -0,0 +1,187 @@
+"""
+Quantized embedding indexes (NumPy only, CPU)
+Compact variants of an embedding artifact, written next to it:
+
+  <artifact>.int8.npz     per-dimension scalar int8: code = round(x_d / scale_d),
+                          scale_d = max |x_d| / 127; 1 byte per dimension
+  <artifact>.binary.npz   1 bit per dimension: x_d > mean_d, packed into
+                          uint64 words and compared by Hamming distance
+
+Both search in two stages when given the float vectors (usually the
+memory-mapped artifact): the compact codes rank every row, then only the
+best top_k * shortlist rows are read and rescored exactly, so the float
+matrix never has to be resident in full.
+"""
+
+import sys
+from pathlib import Path
+from typing import Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+from embedding_artifact import artifact_paths, load_artifact
+from vector_search import normalize_rows, select_top_k
+
+
+# Rows dequantized per step when scoring int8 codes: a block small enough
+# to stay in cache keeps the int8 pass faster than a float32 mat-vec
+SCORE_BLOCK = 128
+
+# Set bits per byte value, for NumPy < 2.0 (no np.bitwise_count)
+POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1, dtype=np.uint8)
+
+
+def popcount_rows(words: 'np.ndarray') -> 'np.ndarray':
+    """Set bits per row of a (N, words) uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+    return POPCOUNT_TABLE[words.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+def quantized_paths(base_path: str) -> Tuple[Path, Path]:
+    """(int8_path, binary_path) beside an artifact base path"""
+    base = artifact_paths(base_path)[0].with_suffix('')
+    return base.with_name(base.name + '.int8.npz'), base.with_name(base.name + '.binary.npz')
+
+
+def rerank(candidates: 'np.ndarray', query: 'np.ndarray', vectors: 'np.ndarray',
+           top_k: int) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Exact cosine of the candidate rows only (vectors may be a memory map)"""
+    order = np.sort(candidates)  # ascending rows read the map sequentially
+    exact = normalize_rows(vectors[order]) @ query
+    best, best_scores = select_top_k(exact, top_k)
+    return order[best], best_scores
+
+
+class Int8Index:
+    """Per-dimension symmetric int8 codes; scores are dequantized in blocks"""
+
+    def __init__(self):
+        self.codes = None    # (N, dims) int8
+        self.scale = None    # (dims,) float32
+
+    def __len__(self) -> int:
+        return 0 if self.codes is None else len(self.codes)
+
+    @property
+    def dims(self) -> int:
+        return self.codes.shape[1]
+
+    def build(self, matrix: 'np.ndarray') -> 'Int8Index':
+        x = normalize_rows(matrix)
+        self.scale = np.abs(x).max(axis=0, initial=0.0) / 127.0
+        self.scale[self.scale == 0] = 1.0
+        self.codes = np.clip(np.rint(x / self.scale), -127, 127).astype(np.int8)
+        return self
+
+    def scores(self, query: 'np.ndarray') -> 'np.ndarray':
+        """Approximate cosine of every row"""
+        q = normalize_rows(query) * self.scale
+        scores = np.empty(len(self), dtype=np.float32)
+        block = np.empty((SCORE_BLOCK, self.dims), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK):
+            codes = self.codes[start:start + SCORE_BLOCK]
+            rows = block[:len(codes)]
+            rows[...] = codes
+            np.matmul(rows, q, out=scores[start:start + len(codes)])
+        return scores
+
+    def search(self, query: 'np.ndarray', top_k: int = 5, rerank_vectors: 'np.ndarray' = None,
+               shortlist: int = 4) -> Tuple['np.ndarray', 'np.ndarray']:
+        """(rows, similarities) best first; exact on a top_k * shortlist rerank if vectors are given"""
+        scores = self.scores(query)
+        if rerank_vectors is None:
+            return select_top_k(scores, top_k)
+        candidates, _ = select_top_k(scores, top_k * shortlist)
+        return rerank(candidates, normalize_rows(query), rerank_vectors, top_k)
+
+    def save(self, path: str):
+        np.savez(path, codes=self.codes, scale=self.scale)
+
+    @classmethod
+    def load(cls, path: str) -> 'Int8Index':
+        index = cls()
+        with np.load(path) as data:
+            index.codes = data['codes']
+            index.scale = data['scale']
+        return index
+
+    def memory_bytes(self) -> int:
+        return self.codes.nbytes + self.scale.nbytes
+
+
+class BinaryIndex:
+    """1-bit codes (above / below the per-dimension mean) ranked by Hamming distance"""
+
+    def __init__(self):
+        self.codes = None    # (N, words) uint64, dims bits zero-padded to whole words
+        self.mean = None     # (dims,) float32
+        self.n_dims = 0
+
+    def __len__(self) -> int:
+        return 0 if self.codes is None else len(self.codes)
+
+    @property
+    def dims(self) -> int:
+        return self.n_dims
+
+    def _pack(self, x: 'np.ndarray') -> 'np.ndarray':
+        bits = np.packbits(x > self.mean, axis=-1)
+        pad = -bits.shape[-1] % 8
+        if pad:
+            bits = np.concatenate([bits, np.zeros(bits.shape[:-1] + (pad,), dtype=np.uint8)], axis=-1)
+        return np.ascontiguousarray(bits).view(np.uint64)
+
+    def build(self, matrix: 'np.ndarray') -> 'BinaryIndex':
+        x = normalize_rows(matrix)
+        self.n_dims = x.shape[1]
+        self.mean = x.mean(axis=0) if len(x) else np.zeros(self.n_dims, dtype=np.float32)
+        self.codes = self._pack(x)
+        return self
+
+    def distances(self, query: 'np.ndarray') -> 'np.ndarray':
+        """Hamming distance from the query's code to every row"""
+        code = self._pack(normalize_rows(query))
+        return popcount_rows(self.codes ^ code)
+
+    def search(self, query: 'np.ndarray', top_k: int = 5, rerank_vectors: 'np.ndarray' = None,
+               shortlist: int = 10) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        (rows, similarities) best first. Without rerank_vectors the
+        similarity is 1 - 2 * hamming / dims (ranks like the cosine).
+        """
+        similarities = 1.0 - 2.0 * self.distances(query).astype(np.float32) / self.n_dims
+        if rerank_vectors is None:
+            return select_top_k(similarities, top_k)
+        candidates, _ = select_top_k(similarities, top_k * shortlist)
+        return rerank(candidates, normalize_rows(query), rerank_vectors, top_k)
+
+    def save(self, path: str):
+        np.savez(path, codes=self.codes, mean=self.mean, params=np.array([self.n_dims]))
+
+    @classmethod
+    def load(cls, path: str) -> 'BinaryIndex':
+        index = cls()
+        with np.load(path) as data:
+            index.codes = data['codes']
+            index.mean = data['mean']
+            index.n_dims = int(data['params'][0])
+        return index
+
+    def memory_bytes(self) -> int:
+        return self.codes.nbytes + self.mean.nbytes
+
+
+def build_quantized_indexes(base_path: str) -> Tuple[Path, Path]:
+    """Write the int8 and binary variants of an artifact"""
+    matrix, _ = load_artifact(base_path)
+    int8_path, binary_path = quantized_paths(base_path)
+    Int8Index().build(matrix).save(str(int8_path))
+    BinaryIndex().build(matrix).save(str(binary_path))
+    return int8_path, binary_path
@@ -0,0 +1,160 @@
+"""
+Query caches in front of retrieval (reference for app/src/lib/rag/query-cache.ts)
+  - embedding cache: query embeddings memoized by normalized text, LRU
+    with a per-entry TTL, so a repeated question skips the API round trip
+  - result cache: search results keyed by query vector; a query whose
+    embedding is at least result_similarity cosine-similar to a cached one
+    (same top_k / min_similarity) reuses its results
+
+Both count hits and misses, and the time spent on misses, so stats()
+can estimate the API calls and milliseconds the hits saved. The clock is
+injectable for replaying query logs.
+"""
+
+import re
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+from vector_search import normalize_rows
+
+
+EMBEDDING_MAX_ENTRIES = 1000
+EMBEDDING_TTL_SECONDS = 24 * 60 * 60
+RESULT_MAX_ENTRIES = 200
+RESULT_TTL_SECONDS = 60 * 60
+RESULT_SIMILARITY = 0.97
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING = re.compile(r'[\s?.!]+$')
+
+
+def normalize_query(query: str) -> str:
+    """'Minimum cover for slab?' and 'minimum  cover for slab' share an entry"""
+    return _TRAILING.sub('', _WHITESPACE.sub(' ', query.lower()).strip())
+
+
+class QueryCache:
+    """Embedding LRU + TTL and semantic result cache, with hit-rate counters"""
+
+    def __init__(self, max_embeddings: int = EMBEDDING_MAX_ENTRIES,
+                 embedding_ttl: float = EMBEDDING_TTL_SECONDS,
+                 max_results: int = RESULT_MAX_ENTRIES, result_ttl: float = RESULT_TTL_SECONDS,
+                 result_similarity: float = RESULT_SIMILARITY, clock: Callable[[], float] = time.monotonic):
+        self.max_embeddings = max_embeddings
+        self.embedding_ttl = embedding_ttl
+        self.max_results = max_results
+        self.result_ttl = result_ttl
+        self.result_similarity = result_similarity
+        self.clock = clock
+        self.embeddings = OrderedDict()   # normalized query -> (vector, expires_at)
+        self.results = []                 # [vector, top_k, min_similarity, results, expires_at], MRU last
+        self._matrix = None               # stacked result vectors, rebuilt after changes
+        self.counters = {
+            'embedding_hits': 0, 'embedding_misses': 0, 'result_hits': 0, 'result_misses': 0,
+            'evictions': 0, 'expirations': 0,
+        }
+        self.embed_seconds = 0.0
+        self.search_seconds = 0.0
+
+    def get_embedding(self, query: str, embed: Callable[[str], Optional[List[float]]], variant: str = ''):
+        """
+        Cached vector for query; embed(query) only on a miss (None results
+        are not cached). variant separates embeddings of another model or size.
+        """
+        key = f"{variant}:{normalize_query(query)}" if variant else normalize_query(query)
+        entry = self.embeddings.pop(key, None)
+        if entry is not None:
+            if entry[1] > self.clock():
+                self.embeddings[key] = entry
+                self.counters['embedding_hits'] += 1
+                return entry[0]
+            self.counters['expirations'] += 1
+
+        self.counters['embedding_misses'] += 1
+        started = time.perf_counter()
+        vector = embed(query)
+        self.embed_seconds += time.perf_counter() - started
+        if vector is not None:
+            self.embeddings[key] = (vector, self.clock() + self.embedding_ttl)
+            while len(self.embeddings) > self.max_embeddings:
+                self.embeddings.popitem(last=False)
+                self.counters['evictions'] += 1
+        return vector
+
+    def _expire_results(self):
+        now = self.clock()
+        live = [entry for entry in self.results if entry[4] > now]
+        if len(live) != len(self.results):
+            self.counters['expirations'] += len(self.results) - len(live)
+            self.results = live
+            self._matrix = None
+
+    def get_results(self, vector, top_k: int, min_similarity: float):
+        """Results cached for a query vector at least result_similarity close, else None"""
+        self._expire_results()
+        if self.results:
+            if self._matrix is None:
+                self._matrix = normalize_rows(np.array([entry[0] for entry in self.results]))
+            similarities = self._matrix @ normalize_rows(np.asarray(vector, dtype=np.float32))
+            for i in np.argsort(-similarities).tolist():
+                if similarities[i] < self.result_similarity:
+                    break
+                entry = self.results[i]
+                if entry[1] == top_k and entry[2] == min_similarity:
+                    self.counters['result_hits'] += 1
+                    self.results.append(self.results.pop(i))
+                    self._matrix = None
+                    return entry[3]
+        self.counters['result_misses'] += 1
+        return None
+
+    def set_results(self, vector, top_k: int, min_similarity: float, results, search_seconds: float = 0.0):
+        self.search_seconds += search_seconds
+        self.results.append([np.asarray(vector, dtype=np.float32), top_k, min_similarity, results,
+                             self.clock() + self.result_ttl])
+        while len(self.results) > self.max_results:
+            self.results.pop(0)
+            self.counters['evictions'] += 1
+        self._matrix = None
+
+    def search(self, query: str, embed: Callable, search: Callable, top_k: int = 5,
+               min_similarity: float = 0.3, variant: str = ''):
+        """The VectorStore.search flow: cached embedding, then cached or fresh results"""
+        vector = self.get_embedding(query, embed, variant)
+        if vector is None:
+            return []
+        results = self.get_results(vector, top_k, min_similarity)
+        if results is None:
+            started = time.perf_counter()
+            results = search(vector, top_k, min_similarity)
+            self.set_results(vector, top_k, min_similarity, results, time.perf_counter() - started)
+        return results
+
+    def clear_results(self):
+        """Drop cached results (index reloaded); embeddings stay valid"""
+        self.results = []
+        self._matrix = None
+
+    def stats(self) -> Dict[str, float]:
+        c = self.counters
+        embed_lookups = c['embedding_hits'] + c['embedding_misses']
+        result_lookups = c['result_hits'] + c['result_misses']
+        average_embed = self.embed_seconds / c['embedding_misses'] if c['embedding_misses'] else 0.0
+        average_search = self.search_seconds / c['result_misses'] if c['result_misses'] else 0.0
+        return {
+            **c,
+            'embedding_hit_rate': c['embedding_hits'] / embed_lookups if embed_lookups else 0.0,
+            'result_hit_rate': c['result_hits'] / result_lookups if result_lookups else 0.0,
+            'api_calls_saved': c['embedding_hits'],
+            'ms_saved': 1000 * (c['embedding_hits'] * average_embed + c['result_hits'] * average_search),
+        }
@@ -0,0 +1,128 @@
+"""
+Synthetic IS-code style PDFs for offline benchmarks
+Layout follows the real codes closely enough to exercise every stage:
+
+  page 1      cover (large type)
+  page 2      CONTENTS with dot leaders
+  pages 3..N  running header rule, numbered clause headings
+              ("12.3 Nominal Cover Requirement", "12.3.1 ..."), body text,
+              and a ruled "Table k ..." every tables_every pages
+
+Output is deterministic for a given (pages, seed).
+
+  python synthetic_pdf.py --pages 500 --output /tmp/is_synthetic_500.pdf
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+except ImportError:
+    print("Installing reportlab...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "reportlab"])
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+
+WORDS = ("concrete reinforcement cover shall be not less than mm the member exposure "
+         "condition nominal minimum grade of steel bars spacing durability cement "
+         "content water ratio maximum beam slab column 25 40 0.45 N/mm2").split()
+
+TITLES = ("Nominal Cover", "Durability Requirements", "Minimum Cement Content", "Spacing of Bars",
+          "Effective Depth", "Control of Deflection", "Curtailment of Tension Reinforcement",
+          "Development Length", "Lap Splices", "Exposure Conditions", "Workmanship",
+          "Formwork", "Curing", "Sampling and Strength of Designed Concrete Mix")
+
+EXPOSURES = ("Mild", "Moderate", "Severe", "Very severe", "Extreme")
+
+LINE_HEIGHT = 13
+TOP, BOTTOM, LEFT, RIGHT = 800, 60, 50, 545
+
+
+def _body_line(rng: random.Random) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 14)))
+
+
+def _draw_table(c, rng: random.Random, y: float, number: int) -> float:
+    c.drawString(LEFT, y, f"Table {number} {rng.choice(TITLES)} Requirements")
+    y -= 8
+    rows = [["Exposure", "Minimum Cement kg/m3", "Max Free Water Ratio", "Minimum Grade"]]
+    for i, exposure in enumerate(EXPOSURES):
+        rows.append([exposure, str(300 + 20 * i), f"0.{55 - 5 * i}", f"M {20 + 5 * i}"])
+    xs = [LEFT, 160, 290, 420, RIGHT]
+    height = 16
+    for r, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            c.drawString(xs[j] + 4, y - height * r - 12, cell)
+    for r in range(len(rows) + 1):
+        c.line(xs[0], y - height * r, xs[-1], y - height * r)
+    for x in xs:
+        c.line(x, y, x, y - height * len(rows))
+    return y - height * len(rows) - 20
+
+
+def write_synthetic_pdf(path: str, pages: int, tables_every: int = 5, seed: int = 0) -> Path:
+    """Write a pages-long synthetic code to path (cover and contents included)"""
+    rng = random.Random(seed)
+    c = canvas.Canvas(str(path), pagesize=A4)
+
+    # Cover
+    c.setFont("Helvetica-Bold", 28)
+    c.drawString(LEFT + 10, 600, "IS 9999 : 2024")
+    c.setFont("Helvetica", 18)
+    c.drawString(LEFT + 10, 560, "SYNTHETIC CONCRETE CODE OF PRACTICE")
+    c.showPage()
+
+    # Contents
+    c.setFont("Helvetica", 10)
+    c.drawString(250, TOP, "CONTENTS")
+    y = TOP - 30
+    for k in range(1, 45):
+        c.drawString(LEFT, y, f"{k} {TITLES[k % len(TITLES)]} " + '.' * 50 + f" {k * 3}")
+        y -= 16
+    c.showPage()
+
+    clause, sub, table = 1, 0, 1
+    for page in range(3, pages + 1):
+        c.setFont("Helvetica", 10)
+        c.drawString(LEFT, TOP, "IS 9999 : 2024")
+        c.line(LEFT, TOP - 4, RIGHT, TOP - 4)
+        y = TOP - 24
+        if tables_every and page % tables_every == 0:
+            y = _draw_table(c, rng, y, table)
+            table += 1
+        while y > BOTTOM + 5 * LINE_HEIGHT:
+            sub += 1
+            if sub > rng.randint(6, 12):
+                clause, sub = clause + 1, 1
+            c.drawString(LEFT, y, f"{clause}.{sub} {rng.choice(TITLES)}")
+            y -= LINE_HEIGHT + 3
+            for n in range(rng.randint(2, 6)):
+                if n == 2 and rng.random() < 0.3:
+                    c.drawString(LEFT, y, f"{clause}.{sub}.1 {rng.choice(TITLES)}")
+                    y -= LINE_HEIGHT + 3
+                c.drawString(LEFT, y, _body_line(rng))
+                y -= LINE_HEIGHT
+                if y < BOTTOM:
+                    break
+        c.showPage()
+
+    c.save()
+    return Path(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic IS-code style PDF")
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--tables-every', type=int, default=5, help="One table every N pages (0 = none)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    path = write_synthetic_pdf(args.output, args.pages, args.tables_every, args.seed)
+    print(f"✅ Wrote {args.pages} pages to: {path} ({path.stat().st_size / 1024:.0f} KB)")
@@ -0,0 +1,176 @@
+"""
+Table-aware stage for IS code processing
+Tables (e.g. IS 456 Table 5 and Table 16, durability and cover) are
+extracted once each and become their own 'table' chunks instead of being
+flattened into, or dropped from, the surrounding clause text.
+
+  1. Cheap check: count ruling lines and rects on the page (no table
+     finding). Pages below MIN_TABLE_RULES never reach find_tables.
+  2. Flagged pages: pdfplumber find_tables, with each table's bbox, rows
+     and the caption text just above it ("Table 16 Nominal Cover ...").
+  3. Each table becomes a chunk with cells stored column by column and
+     'parent' pointing at the clause chunk in effect where it appears.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from clause_detector import detect_heading
+from token_splitter import count_tokens
+
+
+# Ruling lines + rects needed before a page is worth running find_tables on.
+# Running headers/footers contribute one or two rules on ordinary pages.
+MIN_TABLE_RULES = 4
+
+# Points above a table's top edge searched for its caption
+CAPTION_HEIGHT = 40
+
+TABLE_REGIONS_KIND = 'table_regions/1'
+
+CAPTION_PATTERN = re.compile(r'^(Table\s+\d+[A-Z]?)\b\s*(.*)$')
+
+
+def is_table_page(counts: Dict[str, int]) -> bool:
+    """Cheap pre-check from page_triage features (ruling line and rect counts)"""
+    return counts.get('line', 0) + counts.get('rect', 0) >= MIN_TABLE_RULES
+
+
+def table_regions(page) -> List[Dict]:
+    """bbox, rows and caption text for every table pdfplumber finds on the page"""
+    regions = []
+    for table in page.find_tables():
+        x0, top, x1, bottom = table.bbox
+        above = ''
+        if top > 1:
+            above = page.crop((0, max(0, top - CAPTION_HEIGHT), page.width, top)).extract_text() or ''
+        regions.append({
+            'bbox': [x0, top, x1, bottom],
+            'rows': table.extract(),
+            'caption': above.strip().split('\n')[-1] if above.strip() else '',
+        })
+    return regions
+
+
+def extract_regions(doc, index: int) -> List[Dict]:
+    """Cached table_regions for a page of an ExtractionCache document"""
+    return doc.extract(index, TABLE_REGIONS_KIND, table_regions)
+
+
+def _clean(cell) -> str:
+    return ' '.join(str(cell).split()) if cell is not None else ''
+
+
+def columnar(rows: List[List[Optional[str]]]) -> Tuple[List[str], List[List[str]]]:
+    """First row as column names, remaining rows transposed into one list per column"""
+    width = max((len(row) for row in rows), default=0)
+    rows = [[_clean(cell) for cell in row] + [''] * (width - len(row)) for row in rows]
+    if not rows:
+        return [], []
+
+    columns = []
+    for j, name in enumerate(rows[0]):
+        name = name or f"col{j + 1}"
+        # Keep names unique so the columns can be addressed by name
+        columns.append(name if name not in columns else f"{name} ({j + 1})")
+    cells = [[row[j] for row in rows[1:]] for j in range(width)]
+    return columns, cells
+
+
+def to_markdown(caption: str, columns: List[str], cells: List[List[str]]) -> str:
+    lines = [caption] if caption else []
+    lines.append('| ' + ' | '.join(columns) + ' |')
+    lines.append('|' + '---|' * len(columns))
+    for i in range(len(cells[0]) if cells else 0):
+        lines.append('| ' + ' | '.join(column[i] for column in cells) + ' |')
+    return '\n'.join(lines)
+
+
+class ParentTracker:
+    """
+    Follows clause headings through the page stream, with the same
+    detect_heading rules as ISCodeProcessorV2.iter_chunks, to find the
+    clause a table belongs to.
+    """
+
+    def __init__(self):
+        self.current = None  # (clause, title, level) at the end of the last page
+
+    def parent_for(self, text: str, caption: str) -> Optional[Tuple[str, str, int]]:
+        """Clause in effect at the caption line (or the top of the page if not found)"""
+        heading = self.current
+        if caption:
+            for line in (text or '').split('\n'):
+                if line.strip() == caption:
+                    return heading
+                heading = detect_heading(line) or heading
+        return self.current or self.first_heading(text)
+
+    @staticmethod
+    def first_heading(text: str) -> Optional[Tuple[str, str, int]]:
+        for line in (text or '').split('\n'):
+            heading = detect_heading(line)
+            if heading:
+                return heading
+        return None
+
+    def update(self, text: str):
+        for line in (text or '').split('\n'):
+            self.current = detect_heading(line) or self.current
+
+
+class TableStage:
+    """Turns per-page table regions into table chunks as pages stream past"""
+
+    def __init__(self, code_number: str):
+        self.code_number = code_number
+        self.tracker = ParentTracker()
+        self.chunks = []
+
+    def _id(self, suffix: str) -> str:
+        return f"{self.code_number}_{suffix}".replace(' ', '_').replace(':', '_')
+
+    def observe(self, pages: Iterable[Tuple[int, str]],
+                regions_by_page: Dict[int, List[Dict]]) -> Iterable[Tuple[int, str]]:
+        """
+        Pass (page_number, text) through unchanged, building chunks for the
+        regions found on each page. regions_by_page is filled by the
+        extractor before each page is yielded and drained here.
+        """
+        for page_number, text in pages:
+            for n, region in enumerate(regions_by_page.pop(page_number, []), start=1):
+                chunk = self.table_chunk(page_number, n, text, region)
+                if chunk:
+                    self.chunks.append(chunk)
+            self.tracker.update(text)
+            yield page_number, text
+
+    def table_chunk(self, page_number: int, n: int, text: str, region: Dict) -> Optional[Dict]:
+        columns, cells = columnar(region['rows'])
+        if not columns or not any(any(column) for column in cells):
+            return None
+
+        match = CAPTION_PATTERN.match(region['caption'])
+        caption = region['caption'] if match else ''
+        table = match.group(1) if match else None
+        parent = self.tracker.parent_for(text, caption)
+        parent_clause, _, parent_level = parent if parent else (None, None, 0)
+
+        content = to_markdown(caption, columns, cells)
+        return {
+            'id': self._id(table if table else f"table_p{page_number}_{n}"),
+            'type': 'table',
+            'code': self.code_number,
+            'clause': parent_clause,
+            'title': (match.group(2).strip() or None) if match else None,
+            'level': parent_level,
+            'pages': [page_number],
+            'table': table,
+            'parent': self._id(parent_clause or 'intro'),
+            'columns': columns,
+            'cells': cells,
+            'content': content,
+            'char_count': len(content),
+            'word_count': len(content.split()),
+            'token_count': count_tokens(content),
+        }
@@ -0,0 +1,44 @@
+"""
+IVF-PQ probing and the chunk-level query API in ann_index.
+
+  python -m pytest test_ann_index.py
+"""
+
+import numpy as np
+
+from ann_index import IVFPQIndex, ANNVectorIndex
+
+
+def clustered(seed=0):
+    """One tight cluster and one wide cluster, so centroid norms differ a lot"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((2, 32)).astype(np.float32)
+    tight = centers[0] + 0.05 * rng.standard_normal((200, 32)).astype(np.float32)
+    wide = centers[1] + 3.0 * rng.standard_normal((200, 32)).astype(np.float32)
+    return np.vstack([tight, wide])
+
+
+def test_single_probe_scans_the_list_the_vector_was_assigned_to():
+    matrix = clustered()
+    index = IVFPQIndex(n_lists=2, n_subvectors=4).build(matrix)
+    norms = np.linalg.norm(index.centroids, axis=1)
+    assert norms.max() / norms.min() > 2  # q . centroid alone would prefer the tight list
+
+    for row in range(200, 400, 20):
+        ids, _ = index.search(matrix[row], top_k=1, n_probe=1, rerank_vectors=matrix)
+        assert ids.tolist() == [row]
+
+
+def test_query_api_returns_chunks_and_citations():
+    matrix = clustered()
+    chunks = [{'id': f'IS_9999_{i}', 'code': 'IS 9999:2024', 'clause': str(i)}
+              for i in range(len(matrix))]
+    index = ANNVectorIndex(IVFPQIndex(n_lists=2, n_subvectors=4).build(matrix), chunks,
+                           matrix=matrix)
+
+    results = index.search(matrix[250], top_k=3, min_similarity=0.0)
+    assert results[0]['chunk']['id'] == 'IS_9999_250'
+    assert results[0]['citation'] == 'IS 9999:2024, Clause 250'
+    assert abs(results[0]['similarity'] - 1.0) < 1e-5
+    assert [r['similarity'] for r in results] == sorted((r['similarity'] for r in results),
+                                                        reverse=True)
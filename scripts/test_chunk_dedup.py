@@ -0,0 +1,52 @@
+"""
+Page-furniture stripping in chunk_dedup: running headers are removed,
+while short body lines of a chunk that spans many pages are kept.
+
+  python -m pytest test_chunk_dedup.py
+"""
+
+from chunk_dedup import dedup_chunks, page_edges
+
+HEADER = 'BUREAU OF INDIAN STANDARDS'
+
+
+def chunk(chunk_id, pages, lines):
+    return {'id': chunk_id, 'code': 'IS 9999:2024', 'clause': chunk_id, 'pages': pages,
+            'content': '\n'.join(lines)}
+
+
+def long_chunk():
+    """One clause over six pages, a running header at each page break"""
+    lines = ['26.4 Nominal Cover', 'Table 5 applies', 'The design shall follow']
+    for page in range(2, 7):
+        lines += [HEADER, f'Reinforcement on page {page} shall be tied with binding wire.']
+    return chunk('26.4', [1, 2, 3, 4, 5, 6], lines)
+
+
+def contents(chunks):
+    return {c['id']: c['content'].split('\n') for c in chunks}
+
+
+def test_multi_page_chunk_keeps_body_text():
+    chunks = [long_chunk(), chunk('26.5', [6], ['26.5 Requirements', 'IS 9999:2024', 'See 26.4'])]
+    result, report = dedup_chunks(chunks, near_threshold=None)
+    lines = contents(result)
+    assert 'Table 5 applies' in lines['26.4']
+    assert 'The design shall follow' in lines['26.4']
+    assert HEADER not in lines['26.4']
+    assert 'IS 9999:2024' not in lines['26.5']
+    assert report['furniture_lines'] == 6
+
+
+def test_page_edges_locate_furniture():
+    pages = {page: f'{HEADER}\nbody text of page {page}\nmore body\nTable 5 applies\n'
+                   f'even more\nand more\nlast body line\n{page}'
+             for page in range(1, 7)}
+    page_lines = {page: page_edges(text) for page, text in pages.items()}
+    assert HEADER in page_lines[1] and 'Table 5 applies' not in page_lines[1]
+
+    result, report = dedup_chunks([long_chunk()], near_threshold=None, page_lines=page_lines)
+    lines = contents(result)['26.4']
+    assert 'Table 5 applies' in lines and 'The design shall follow' in lines
+    assert HEADER not in lines
+    assert report['furniture_lines'] == 5
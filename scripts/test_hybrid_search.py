@@ -0,0 +1,69 @@
+"""
+HybridRetriever reference handling: explicit references and bare clause
+numbers answer from the reference map, while numbers inside an ordinary
+question ("0.45 fck", "1.5 m") go through the fused ranking.
+
+  python -m pytest test_hybrid_search.py
+"""
+
+import numpy as np
+
+from hybrid_search import HybridRetriever, parse_references
+from lexical_index import BM25Index, reference_map
+from vector_search import VectorIndex
+
+CHUNKS = [
+    {'id': 'c1', 'clause': '1.5', 'title': 'Loads', 'content': '1.5 Loads The design loads are given in IS 875.'},
+    {'id': 'c2', 'clause': '26.3.3', 'title': 'Spacing',
+     'content': '26.3.3 Maximum distance between bars in tension shall not exceed 300 mm.'},
+    {'id': 'c3', 'clause': '26.4', 'title': 'Nominal Cover', 'content': '26.4 Nominal cover to meet durability.'},
+    {'id': 'c4', 'clause': '26.4.1', 'title': 'Columns', 'content': '26.4.1 Longitudinal bars in a column.'},
+    {'id': 'c5', 'clause': '5.2', 'title': 'Admixtures',
+     'content': '5.2 Water cement ratio 0.45 for severe exposure with fck of M 30.'},
+]
+
+
+def retriever(query_rows):
+    """Orthogonal chunk vectors; a query embeds onto the rows in query_rows[query]"""
+    matrix = np.eye(len(CHUNKS), dtype=np.float32)
+    calls = []
+
+    def embed(query):
+        calls.append(query)
+        vector = np.zeros(len(CHUNKS), dtype=np.float32)
+        vector[query_rows.get(query, [])] = 1.0
+        return vector.tolist()
+
+    bm25 = BM25Index().build([chunk['content'] for chunk in CHUNKS])
+    return HybridRetriever(VectorIndex(matrix, CHUNKS), bm25, reference_map(CHUNKS), embed=embed), calls
+
+
+def clauses(results):
+    return [result['chunk']['clause'] for result in results]
+
+
+def test_bare_numbers_need_a_known_clause():
+    known = reference_map(CHUNKS)['clauses']
+    assert parse_references('0.45 fck for 2.5 m', known) == []
+    assert parse_references('what is 26.4', known) == [('clause', '26.4', False)]
+    assert parse_references('clause 7.1', known) == [('clause', '7.1', True)]
+
+
+def test_numeric_question_is_ranked_not_answered_directly():
+    search, calls = retriever({'1.5 m spacing between bars in tension': [1],
+                               'water cement ratio 0.45 fck': [4]})
+    results = search.search('1.5 m spacing between bars in tension', top_k=3)
+    assert clauses(results)[0] == '26.3.3'
+    assert results[0]['match'] == 'hybrid'
+    assert '1.5' in clauses(results)
+
+    results = search.search('water cement ratio 0.45 fck', top_k=3)
+    assert clauses(results)[0] == '5.2'
+    assert search.stats['direct'] == 0 and len(calls) == 2
+
+
+def test_references_answer_directly():
+    search, calls = retriever({})
+    assert clauses(search.search('26.4')) == ['26.4', '26.4.1']
+    assert clauses(search.search('clause 26.4 nominal cover')) == ['26.4', '26.4.1']
+    assert search.stats['direct'] == 2 and not calls
@@ -0,0 +1,44 @@
+"""
+Incremental re-ingestion produces the same chunks, table chunks included,
+as a full run of ISCodeProcessorV2 on the same PDF, both on the first run
+(empty manifest) and on a re-run that reuses every page from the manifest.
+
+  python -m pytest test_incremental.py
+"""
+
+import io
+import json
+from contextlib import redirect_stdout
+
+from incremental import delta_path_for, process_incremental
+from process_is_code_v2 import ISCodeProcessorV2
+from synthetic_pdf import write_synthetic_pdf
+
+
+def incremental_chunks(pdf_path, output_path):
+    processor = ISCodeProcessorV2(str(pdf_path), 'IS 9999:2024', extraction_cache=None)
+    with redirect_stdout(io.StringIO()):
+        delta = process_incremental(processor, str(output_path))
+    with open(output_path, 'r', encoding='utf-8') as f:
+        return json.load(f), delta
+
+
+def test_incremental_matches_full_run(tmp_path):
+    pdf_path = tmp_path / 'synthetic.pdf'
+    write_synthetic_pdf(str(pdf_path), pages=12, tables_every=3, seed=1)
+
+    processor = ISCodeProcessorV2(str(pdf_path), 'IS 9999:2024', extraction_cache=None)
+    with redirect_stdout(io.StringIO()):
+        full = processor.process()
+    assert any(chunk.get('type') == 'table' for chunk in full)
+
+    output_path = tmp_path / 'chunks.json'
+    first, delta = incremental_chunks(pdf_path, output_path)
+    assert first == full
+    with open(delta_path_for(output_path), 'r', encoding='utf-8') as f:
+        assert len(json.load(f)['added']) == len(full)
+    assert len(delta['added']) == len(full)
+
+    second, delta = incremental_chunks(pdf_path, output_path)
+    assert second == full
+    assert not delta['added'] and not delta['changed'] and not delta['removed']
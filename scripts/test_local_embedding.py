@@ -0,0 +1,90 @@
+"""
+LocalEmbeddingEngine with an embedding cache, as ingest drives it: the
+cache is opened on the event-loop thread and embed_async runs the model
+on a worker thread. The model is stubbed (a directory with a placeholder
+model.onnx), so no download is needed.
+
+  python -m pytest test_local_embedding.py
+"""
+
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache
+from local_embedding import LocalEmbeddingEngine
+
+
+class StubEngine(LocalEmbeddingEngine):
+    """Vectors from the text length instead of a model"""
+
+    def _load(self):
+        self._full_dims = 384
+
+    def _encode(self, texts):
+        self.stats['inputs'] += len(texts)
+        vectors = np.zeros((len(texts), self.full_dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row, len(text) % self.full_dims] = 1.0
+        return vectors
+
+
+def stub_model(tmp_path):
+    directory = tmp_path / 'model'
+    directory.mkdir(exist_ok=True)
+    (directory / 'model.onnx').write_bytes(b'weights v1')
+    return str(directory)
+
+
+def test_embed_async_with_cache(tmp_path):
+    texts = ['5.1 Cement', '26.4 Nominal Cover', 'Table 16 Nominal Cover']
+
+    async def run():
+        cache = EmbeddingCache(tmp_path / 'cache.sqlite')
+        engine = StubEngine(stub_model(tmp_path), cache=cache)
+        first = await engine.embed_async(texts)
+        second = await engine.embed_async(texts + ['new clause'])
+        cache.db.close()
+        return engine, first, second
+
+    engine, first, second = asyncio.run(run())
+    assert second[:3] == first
+    assert engine.stats['cache_hits'] == 3
+    assert engine.stats['cache_misses'] == 4
+    assert engine.stats['inputs'] == 4
+
+
+def test_embed_async_reduced_dimensions(tmp_path):
+    async def run():
+        cache = EmbeddingCache(tmp_path / 'cache.sqlite')
+        engine = StubEngine(stub_model(tmp_path), cache=cache, dimensions=64)
+        vectors = await engine.embed_async(['a', 'bb'])
+        cache.db.close()
+        return vectors
+
+    vectors = asyncio.run(run())
+    assert [len(vector) for vector in vectors] == [64, 64]
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+
+def test_dimensions_resolved_at_construction(tmp_path):
+    model = stub_model(tmp_path)
+    assert StubEngine(model, dimensions=384).dimensions is None
+    assert StubEngine(model, dimensions=64).output_dims == 64
+    with pytest.raises(ValueError):
+        StubEngine(model, dimensions=512)
+
+
+def test_cache_key_follows_model_revision_and_size(tmp_path):
+    model = stub_model(tmp_path)
+    full, reduced = StubEngine(model), StubEngine(model, dimensions=64)
+    # Full vectors are cached and cut afterwards, so both sizes share entries
+    assert full.cache_model == reduced.cache_model
+    assert full.cache_model.endswith(':384')
+
+    onnx = tmp_path / 'model' / 'model.onnx'
+    onnx.write_bytes(b'weights v2, re-exported')
+    os.utime(onnx, ns=(0, 0))
+    assert StubEngine(model).cache_model != full.cache_model
@@ -0,0 +1,213 @@
+"""
+Token-aware chunk splitting
+Counts real model tokens with tiktoken (cl100k_base, the encoding of the
+text-embedding-3 models) instead of whitespace words, and cuts oversized
+clauses at sentence or sub-clause boundaries:
+
+  1. segments end at a sentence end ('. ' / '; ' before a capital or '(')
+     or before a new line opening a sub-clause ("(a)", "ii)", "NOTE",
+     "26.4.2.1 ...")
+  2. segments are packed greedily up to max_tokens; each new part starts
+     with the trailing segments of the previous one, up to overlap_tokens
+  3. a segment longer than max_tokens on its own is cut at line breaks,
+     then at fixed token windows
+
+The encoding is loaded once per process and token counts are memoised by
+text, so repeated segments (running headers, notes, table rows) and the
+engine's input check reuse the counts taken while splitting.
+
+tiktoken downloads the encoding on first use. Where it cannot (offline
+machine, empty TIKTOKEN_CACHE_DIR), counts fall back to an approximation
+that splits text the way cl100k_base pre-tokenizes it, with a warning. To
+count exactly offline, copy a populated tiktoken cache to the machine and
+point TIKTOKEN_CACHE_DIR at it.
+
+token_batches groups inputs for the embedding engines by token count
+rather than by a fixed number of inputs.
+"""
+
+import re
+import sys
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    print("Installing tiktoken...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "tiktoken"])
+    import tiktoken
+
+
+DEFAULT_ENCODING = 'cl100k_base'
+
+# Input limit of the OpenAI embedding models, and of all inputs in one request
+MAX_INPUT_TOKENS = 8191
+MAX_REQUEST_TOKENS = 300_000
+
+DEFAULT_MAX_TOKENS = 512
+DEFAULT_OVERLAP_TOKENS = 64
+
+COUNT_CACHE_SIZE = 1 << 16
+
+# cl100k_base's pre-tokenizer with letter runs capped at 6 characters (longer
+# words take several BPE tokens); the pieces always join back to the text
+APPROXIMATE_PIECES = re.compile(
+    r"'(?:s|t|re|ve|m|ll|d)\b|[^\r\n\w]?[^\W\d_]{1,6}|\d{1,3}| ?(?:[^\s\w]|_)+[\r\n]*"
+    r"|\s*[\r\n]+|\s+(?!\S)|\s+"
+)
+
+BOUNDARY_PATTERN = re.compile(
+    r'(?<=[.;:?!])[ \t]+(?=[A-Z(])'                                       # sentence end
+    r'|\n(?=[ \t]*(?:\(?[a-z0-9]{1,4}\)|NOTE|\d+(?:\.\d+)+[ \t]))'        # sub-clause line
+)
+
+
+class ApproximateEncoding:
+    """Stand-in with tiktoken's encode_ordinary / decode over APPROXIMATE_PIECES"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def encode_ordinary(self, text: str) -> List[str]:
+        return APPROXIMATE_PIECES.findall(text)
+
+    def decode(self, tokens: Sequence[str]) -> str:
+        return ''.join(tokens)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = DEFAULT_ENCODING):
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as error:
+        # The first load downloads the BPE file (requests / urllib errors).
+        # stderr: ingest's chunking workers silence stdout
+        print(f"⚠️  tiktoken encoding {name} unavailable ({type(error).__name__}: {error})\n"
+              f"   Token counts are approximate; set TIKTOKEN_CACHE_DIR to a directory holding "
+              f"the cached encoding to count exactly offline.", file=sys.stderr)
+        return ApproximateEncoding(name)
+
+
+@lru_cache(maxsize=COUNT_CACHE_SIZE)
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    # encode_ordinary: special-token strings in a PDF are plain text
+    return len(get_encoding(encoding).encode_ordinary(text))
+
+
+def truncate_tokens(text: str, max_tokens: int = MAX_INPUT_TOKENS,
+                    encoding: str = DEFAULT_ENCODING) -> str:
+    """text cut to its first max_tokens tokens (unchanged if it already fits)"""
+    if count_tokens(text, encoding) <= max_tokens:
+        return text
+    codec = get_encoding(encoding)
+    return codec.decode(codec.encode_ordinary(text)[:max_tokens])
+
+
+def token_batches(lengths: Sequence[int], max_items: int, max_tokens: int = None,
+                  padded: bool = False, sort: bool = True) -> List[List[int]]:
+    """
+    Input indices grouped into batches of at most max_items inputs and
+    max_tokens tokens, longest inputs first when sorted so similar lengths
+    share a batch (callers put results back by index). padded prices a
+    batch as its longest input times its size, what a padded forward pass
+    computes; otherwise the lengths add up, as in an API request. An input
+    over max_tokens on its own gets a batch to itself.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i]) if sort else range(len(lengths))
+    batches, batch, total, longest = [], [], 0, 0
+    for i in order:
+        length = lengths[i]
+        cost = max(longest, length) * (len(batch) + 1) if padded else total + length
+        if batch and (len(batch) >= max_items or (max_tokens and cost > max_tokens)):
+            batches.append(batch)
+            batch, total, longest = [], 0, 0
+        batch.append(i)
+        total += length
+        longest = max(longest, length)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def split_segments(text: str) -> List[str]:
+    """Cut text at sentence / sub-clause boundaries; ''.join(result) == text"""
+    segments, start = [], 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        segments.append(text[start:match.end()])
+        start = match.end()
+    segments.append(text[start:])
+    return [segment for segment in segments if segment]
+
+
+class TokenSplitter:
+    """Split text into parts of at most max_tokens tokens with overlap_tokens of carry-over"""
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 overlap_tokens: int = DEFAULT_OVERLAP_TOKENS, encoding: str = DEFAULT_ENCODING):
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError(f"overlap_tokens must be in [0, {max_tokens}), got {overlap_tokens}")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding = encoding
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.encoding)
+
+    def _segments(self, text: str) -> List[Tuple[str, int]]:
+        """(segment, tokens) pairs, none longer than max_tokens"""
+        result = []
+        for segment in split_segments(text):
+            tokens = self.count(segment)
+            if tokens <= self.max_tokens:
+                result.append((segment, tokens))
+                continue
+            for line in segment.splitlines(keepends=True):
+                tokens = self.count(line)
+                if tokens <= self.max_tokens:
+                    result.append((line, tokens))
+                    continue
+                codec = get_encoding(self.encoding)
+                ids = codec.encode_ordinary(line)
+                for start in range(0, len(ids), self.max_tokens):
+                    piece = codec.decode(ids[start:start + self.max_tokens])
+                    result.append((piece, self.count(piece)))
+        return result
+
+    def _carry(self, window: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        """Trailing segments of window worth at most overlap_tokens (never the whole window)"""
+        carry, tokens = [], 0
+        for segment in reversed(window[1:]):
+            if tokens + segment[1] > self.overlap_tokens:
+                break
+            carry.insert(0, segment)
+            tokens += segment[1]
+        return carry
+
+    def split(self, text: str) -> List[Tuple[str, int]]:
+        """[(part, exact token count)]; text that fits comes back whole"""
+        total = self.count(text)
+        if total <= self.max_tokens:
+            return [(text, total)]
+
+        windows, window, used = [], [], 0
+        for segment, tokens in self._segments(text):
+            if window and used + tokens > self.max_tokens:
+                windows.append(window)
+                window = self._carry(window)
+                used = sum(n for _, n in window)
+                if used + tokens > self.max_tokens:
+                    window, used = [], 0
+            window.append((segment, tokens))
+            used += tokens
+        if window:
+            windows.append(window)
+
+        parts = []
+        for window in windows:
+            part = ''.join(segment for segment, _ in window).strip()
+            if part:
+                # Counted again as a whole: BPE merges across segment joins
+                parts.append((part, self.count(part)))
+        return parts
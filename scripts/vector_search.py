@@ -0,0 +1,140 @@
+"""
+Vectorized similarity search over precomputed embedding artifacts
+Rows are unit-normalized once at load time, so cosine similarity is a
+single matrix-vector product and top-K selection uses argpartition
+instead of sorting every score.
+
+Usage (offline evaluation against an artifact):
+  python vector_search.py --artifact ../documents/IS_456_2000_v2_with_embeddings "minimum cover for slab"
+"""
+
+import sys
+import argparse
+from typing import List, Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    import subprocess
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy"])
+    import numpy as np
+
+from embedding_artifact import load_artifact
+
+
+def normalize_rows(matrix: 'np.ndarray') -> 'np.ndarray':
+    """Return a float32 copy with every row scaled to unit length (zero rows stay zero)"""
+    matrix = np.array(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        norm = np.linalg.norm(matrix)
+        return matrix / norm if norm else matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def select_top_k(scores: 'np.ndarray', k: int) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Indices and scores of the k best entries along the last axis, best first"""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        empty = np.empty(scores.shape[:-1] + (0,))
+        return empty.astype(np.int64), empty.astype(scores.dtype)
+    if k < scores.shape[-1]:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(k), scores.shape[:-1] + (k,))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    order = np.argsort(-candidate_scores, axis=-1)
+    return (np.take_along_axis(candidates, order, axis=-1),
+            np.take_along_axis(candidate_scores, order, axis=-1))
+
+
+def format_citation(chunk: Dict) -> str:
+    """Same citation text the chat VectorStore builds"""
+    code = chunk.get('code') or 'IS 456:2000'
+    if chunk.get('table'):
+        title = f" ({chunk['title']})" if chunk.get('title') else ''
+        return f"{code}, {chunk['table']}{title}"
+    if chunk.get('clause'):
+        title = f" ({chunk['title']})" if chunk.get('title') else ''
+        return f"{code}, Clause {chunk['clause']}{title}"
+    pages = chunk.get('pages') or [None]
+    return f"{code}, Page {pages[0]}"
+
+
+class VectorIndex:
+    """Exact cosine search over a unit-normalized (N, dims) float32 matrix"""
+
+    def __init__(self, matrix: 'np.ndarray', chunks: List[Dict] = None, model: str = None):
+        self.matrix = normalize_rows(matrix)
+        self.model = model  # query vectors must come from this model at self.dims
+        self.chunks = chunks if chunks is not None else [{} for _ in range(len(self.matrix))]
+        if len(self.chunks) != len(self.matrix):
+            raise ValueError(f"{len(self.chunks)} chunks for {len(self.matrix)} vectors")
+
+    @classmethod
+    def from_artifact(cls, base_path: str) -> 'VectorIndex':
+        matrix, meta = load_artifact(base_path)
+        return cls(matrix, meta['chunks'], meta.get('model'))
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    @property
+    def dims(self) -> int:
+        return self.matrix.shape[1]
+
+    def search_vector(self, query: 'np.ndarray', top_k: int = 5) -> Tuple['np.ndarray', 'np.ndarray']:
+        """(indices, similarities) for one query vector"""
+        scores = self.matrix @ normalize_rows(query)
+        return select_top_k(scores, top_k)
+
+    def search_batch(self, queries: 'np.ndarray', top_k: int = 5) -> Tuple['np.ndarray', 'np.ndarray']:
+        """(Q, k) indices and similarities for a (Q, dims) batch of queries"""
+        scores = normalize_rows(queries) @ self.matrix.T
+        return select_top_k(scores, top_k)
+
+    def search(self, query: 'np.ndarray', top_k: int = 5, min_similarity: float = 0.3) -> List[Dict]:
+        """Results shaped like VectorStore.search: chunk, similarity, citation"""
+        indices, scores = self.search_vector(query, top_k)
+        return [
+            {
+                'chunk': self.chunks[i],
+                'similarity': float(score),
+                'citation': format_citation(self.chunks[i]),
+            }
+            for i, score in zip(indices.tolist(), scores.tolist())
+            if score > min_similarity
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search an embedding artifact")
+    parser.add_argument('--artifact', required=True, help="Artifact base path (without .npy)")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--min-similarity', type=float, default=0.3)
+    parser.add_argument('--ann', action='store_true',
+                        help="Search the IVF-PQ index from build_ann_index.py instead of brute force")
+    parser.add_argument('queries', nargs='+')
+    args = parser.parse_args()
+
+    from embedding_engine import engine_for_index
+
+    if args.ann:
+        from ann_index import ANNVectorIndex
+        index = ANNVectorIndex.from_artifact(args.artifact)
+    else:
+        index = VectorIndex.from_artifact(args.artifact)
+    print(f"✅ Loaded {len(index)} vectors ({index.dims} dims)\n")
+
+    vectors = engine_for_index(index.model, index.dims).embed(args.queries)
+    for query, vector in zip(args.queries, vectors):
+        print(f"🔍 {query}")
+        if vector is None:
+            print("  ⚠️  Query embedding failed\n")
+            continue
+        for result in index.search(np.asarray(vector), args.top_k, args.min_similarity):
+            print(f"  {result['similarity']:.3f}  {result['citation']}")
+        print()